@@ -0,0 +1,58 @@
+"""
+Read-only access to lineup archives (`champions.archive`, written by `main.py --archive`) under
+PROPEDGE_ARCHIVE_DIR. Open archives are kept, keyed by path and mtime, so a request costs only the
+rows it slices; a rewritten file is re-opened on the next request.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+import threading
+from .config import ARCHIVE_DIR
+
+SORT_KEYS = {"ev": "expected_value", "win_prob": "expected_win_prob"}
+
+class ArchiveCache:
+    def __init__(self, root: Optional[str] = ARCHIVE_DIR or None, max_open: int = 16):
+        self.root = Path(root).resolve() if root else None
+        self.max_open = max_open
+        self._open: "OrderedDict[str, Tuple[int, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None
+
+    def names(self) -> list:
+        from champions.archive import SUFFIX
+        return sorted(p.name[:-len(SUFFIX)] for p in self.root.glob(f"*{SUFFIX}")) if self.enabled else []
+
+    def get(self, name: str):
+        """The LineupArchive for `name` (with or without suffix); KeyError when missing or outside the root."""
+        from champions.archive import LineupArchive, SUFFIX
+        if not self.enabled:
+            raise KeyError(name)
+        path = (self.root / (name if name.endswith(SUFFIX) else name + SUFFIX)).resolve()
+        if path.parent != self.root or not path.is_file():
+            raise KeyError(name)
+        mtime = path.stat().st_mtime_ns
+        with self._lock:
+            hit = self._open.get(str(path))
+            if hit is not None and hit[0] == mtime:
+                self._open.move_to_end(str(path))
+                return hit[1]
+        arc = LineupArchive(path)
+        with self._lock:
+            self._open[str(path)] = (mtime, arc)
+            self._open.move_to_end(str(path))
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return arc
+
+    def page(self, name: str, offset: int = 0, limit: int = 50, sort: str = "ev", num_legs: Optional[int] = None) -> dict:
+        arc = self.get(name)
+        rows = arc.top(offset + limit, by=SORT_KEYS[sort], num_legs=num_legs)[offset:]
+        return {"name": name, "n": len(arc), "created": arc.created, "meta": arc.meta, "offset": offset,
+                "lineups": arc.records(rows)}
+
+ARCHIVES = ArchiveCache()
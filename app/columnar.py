@@ -0,0 +1,94 @@
+"""
+Columnar prop uploads: CSV (data/props_sample.csv layout) or Arrow IPC bodies parsed straight
+into a typed DataFrame, validated per column instead of per-row PropRow objects.
+pyarrow is optional; without it only CSV is accepted.
+"""
+from __future__ import annotations
+from typing import Dict, List
+import io
+import numpy as np
+import pandas as pd
+
+CSV_TYPES = ("text/csv", "application/csv", "text/plain")
+ARROW_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file", "application/x-arrow")
+
+# PropRow fields: required string / float columns and optional ones (filled with NaN/None)
+REQUIRED_STR = ["source", "sport", "game_datetime_utc", "player", "market", "side"]
+REQUIRED_FLOAT = ["line"]
+OPTIONAL_STR = ["platform", "team", "opponent", "proj_dist", "confidence_tag", "meta", "event_id", "player_id", "source_id"]
+OPTIONAL_FLOAT = ["proj_mean", "prob_over", "prob_under", "odds_american"]
+SIDES = ("over", "under")
+
+class PropsValidationError(ValueError):
+    def __init__(self, errors: List[Dict]):
+        super().__init__("; ".join(f"{e['column']}: {e['error']}" for e in errors))
+        self.errors = errors
+
+def parse_csv(body: bytes) -> pd.DataFrame:
+    dtype = {c: str for c in REQUIRED_STR + OPTIONAL_STR}
+    return pd.read_csv(io.BytesIO(body), dtype=dtype, skipinitialspace=True)
+
+def parse_arrow(body: bytes) -> pd.DataFrame:
+    try:
+        import pyarrow as pa
+    except ImportError as err:
+        raise RuntimeError("Arrow uploads need pyarrow installed") from err
+    buf = pa.py_buffer(body)
+    try:
+        table = pa.ipc.open_stream(buf).read_all()
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_file(buf).read_all()
+    return table.to_pandas()
+
+def _bad_rows(mask: np.ndarray, limit: int = 10) -> List[int]:
+    return np.flatnonzero(mask)[:limit].tolist()
+
+def validate_props_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce to PropRow column types; raises PropsValidationError listing offending rows per column."""
+    errors = []
+    missing = [c for c in REQUIRED_STR + REQUIRED_FLOAT if c not in df.columns]
+    if missing:
+        raise PropsValidationError([{"column": c, "error": "missing column"} for c in missing])
+    out = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for c in REQUIRED_STR + OPTIONAL_STR:
+        if c not in df.columns:
+            out[c] = "underdog" if c == "platform" else None
+            continue
+        col = df[c].reset_index(drop=True)
+        if col.dtype != object:
+            col = col.astype(object).where(col.notna())
+        if c in REQUIRED_STR:
+            empty = col.isna().to_numpy() | (col.to_numpy() == "")
+            if empty.any():
+                errors.append({"column": c, "error": "empty value", "rows": _bad_rows(empty)})
+        out[c] = col.where(col.notna(), None)
+    if "platform" in df.columns:
+        out["platform"] = out["platform"].fillna("underdog")
+    for c in REQUIRED_FLOAT + OPTIONAL_FLOAT:
+        if c not in df.columns:
+            out[c] = np.nan
+            continue
+        raw = df[c].reset_index(drop=True)
+        num = raw.astype(float) if raw.dtype.kind in "fiu" else pd.to_numeric(raw, errors="coerce").astype(float)
+        bad = num.isna().to_numpy() & (raw.notna().to_numpy() | (c in REQUIRED_FLOAT))
+        if bad.any():
+            errors.append({"column": c, "error": "not a number", "rows": _bad_rows(bad)})
+        out[c] = num
+    side = out["side"].str.lower()
+    bad_side = ~side.isin(SIDES) & side.notna()
+    if bad_side.any():
+        errors.append({"column": "side", "error": f"expected one of {SIDES}", "rows": _bad_rows(bad_side.to_numpy())})
+    if errors:
+        raise PropsValidationError(errors)
+    out["side"] = side
+    return out
+
+def props_frame_from_body(body: bytes, content_type: str) -> pd.DataFrame:
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype in ARROW_TYPES:
+        df = parse_arrow(body)
+    elif ctype in CSV_TYPES or not ctype:
+        df = parse_csv(body)
+    else:
+        raise ValueError(f"unsupported content type {ctype!r}")
+    return validate_props_frame(df)
@@ -2,3 +2,20 @@ import os
 BALLDONTLIE_API_KEY = os.getenv("BALLDONTLIE_API_KEY", "")
 TZ_LOCAL = os.getenv("TZ_LOCAL", "America/Chicago")
 DEFAULT_BANKROLL = float(os.getenv("DEFAULT_BANKROLL", "50"))
+CONFIG_PATH = os.getenv("PROPEDGE_CONFIG", os.path.join(os.path.dirname(__file__), "..", "config.yaml"))
+PROMO_TEMPLATE_PATH = os.getenv("PROPEDGE_PROMOS", os.path.join(os.path.dirname(__file__), "..", "promo_template.yaml"))
+CONFIG_RELOAD_SECONDS = float(os.getenv("PROPEDGE_CONFIG_RELOAD_SECONDS", "2"))
+WORKERS = int(os.getenv("PROPEDGE_WORKERS", "2"))
+MAX_QUEUE = int(os.getenv("PROPEDGE_MAX_QUEUE", "16"))
+DEADLINE_SECONDS = float(os.getenv("PROPEDGE_DEADLINE_SECONDS", "10"))
+CACHE_SIZE = int(os.getenv("PROPEDGE_CACHE_SIZE", "256"))
+CACHE_TTL_SECONDS = float(os.getenv("PROPEDGE_CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_BYTES = int(float(os.getenv("PROPEDGE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+CACHE_DIR = os.getenv("PROPEDGE_CACHE_DIR", "")
+NBA_API_URL = os.getenv("NBA_API_URL", "https://api.balldontlie.io/v1").rstrip("/")
+SLATE_TTL_SECONDS = float(os.getenv("PROPEDGE_SLATE_TTL_SECONDS", "60"))
+SLATE_MAX_STALE_SECONDS = float(os.getenv("PROPEDGE_SLATE_MAX_STALE_SECONDS", "3600"))
+SLATE_CACHE_SIZE = int(os.getenv("PROPEDGE_SLATE_CACHE_SIZE", "32"))
+SLATE_PREWARM = os.getenv("PROPEDGE_SLATE_PREWARM", "1") != "0"
+ARCHIVE_DIR = os.getenv("PROPEDGE_ARCHIVE_DIR", "")
+METRICS_SAMPLE = float(os.getenv("PROPEDGE_METRICS_SAMPLE", "0"))
@@ -0,0 +1,132 @@
+"""
+Warm, compiled config for the API.
+
+config.yaml (+ promo_template.yaml) is read and compiled once: payout tables/arrays, thresholds,
+sigma tables and promos. A background thread polls the files' mtime and swaps in a freshly
+compiled snapshot when the content hash changes, so request handlers only ever read
+`CONFIG.current` (a plain attribute; the swap is a single reference assignment).
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import hashlib, os, threading
+import numpy as np
+import yaml
+from .config import CONFIG_PATH, PROMO_TEMPLATE_PATH, CONFIG_RELOAD_SECONDS
+from .optimizer import SigmaTable, load_sigma_table
+from .promo import effective_payouts, payout_matrix
+from .promo_engine import normalize_promos
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    version: str
+    loaded_at: str
+    raw: Dict[str, Any]
+    base_payouts: Dict[str, Any]          # PAYOUTS.UNDERDOG as written
+    payouts: Dict[str, Any]               # after PROMO (effective_payouts)
+    std_matrix: np.ndarray                # [num_legs, hits] return multiples
+    flex_matrix: np.ndarray
+    thresholds: Dict[str, float]          # FILTERS.GLOBAL as floats
+    sigma_table: SigmaTable
+    promos: List[Dict[str, Any]] = field(default_factory=list)
+
+def _read(path: str) -> bytes:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return b""
+
+def compile_config(cfg_bytes: bytes, promo_bytes: bytes = b"") -> CompiledConfig:
+    raw = yaml.safe_load(cfg_bytes) or {}
+    std, flex = payout_matrix(raw["PAYOUTS"]["UNDERDOG"])
+    promos_raw = (yaml.safe_load(promo_bytes) or {}).get("promos", []) if promo_bytes else []
+    return CompiledConfig(
+        version=hashlib.sha256(cfg_bytes + b"\0" + promo_bytes).hexdigest()[:12],
+        loaded_at=datetime.utcnow().isoformat() + "Z",
+        raw=raw,
+        base_payouts=raw["PAYOUTS"]["UNDERDOG"],
+        payouts=effective_payouts(raw),
+        std_matrix=std, flex_matrix=flex,
+        thresholds={k: float(v) for k, v in ((raw.get("FILTERS", {}) or {}).get("GLOBAL", {}) or {}).items()},
+        sigma_table=load_sigma_table(raw),
+        promos=normalize_promos(promos_raw or []),
+    )
+
+class ConfigCache:
+    """Holds the active CompiledConfig and hot-reloads it when either file changes."""
+
+    def __init__(self, path: str = CONFIG_PATH, promo_path: str = PROMO_TEMPLATE_PATH,
+                 interval: float = CONFIG_RELOAD_SECONDS):
+        self.path, self.promo_path, self.interval = path, promo_path, interval
+        self._current: Optional[CompiledConfig] = None
+        self._mtimes: tuple = ()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[CompiledConfig], None]] = []
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+
+    @property
+    def current(self) -> CompiledConfig:
+        cur = self._current
+        if cur is None:
+            self.reload(force=True)
+            cur = self._current
+        return cur
+
+    def on_reload(self, fn: Callable[[CompiledConfig], None]) -> None:
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def _stat(self) -> tuple:
+        out = []
+        for p in (self.path, self.promo_path):
+            try:
+                st = os.stat(p); out.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                out.append(None)
+        return tuple(out)
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile if mtime changed and content hash differs. Returns True when swapped."""
+        with self._lock:
+            mtimes = self._stat()
+            if not force and mtimes == self._mtimes:
+                return False
+            self._mtimes = mtimes
+            try:
+                compiled = compile_config(_read(self.path), _read(self.promo_path))
+            except Exception as err:  # keep serving the last good config
+                self.last_error = f"{type(err).__name__}: {err}"
+                if self._current is None:
+                    raise
+                return False
+            self.last_error = None
+            if self._current is not None and compiled.version == self._current.version:
+                return False
+            self._current = compiled
+            self.reloads += 1
+        for fn in self._listeners:
+            fn(compiled)
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.reload()
+
+    def start(self) -> None:
+        self.current  # compile eagerly at startup
+        if self._thread is None and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="config-reload", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0); self._thread = None
+
+CONFIG = ConfigCache()
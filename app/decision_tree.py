@@ -20,6 +20,7 @@ Default delta = 0.02 (2% EV margin required for STANDARD).
 from __future__ import annotations
 from typing import Dict, List, Any, Tuple
 import math, os, yaml
+from .promo import effective_payouts
 
 def _exactly_two_hits_prob(p1: float, p2: float, p3: float) -> float:
     return (p1*p2*(1-p3) + p1*p3*(1-p2) + p2*p3*(1-p1))
@@ -39,9 +40,12 @@ def ev_multiple_standard3(p: List[float], payouts_std: Dict[str, Any]) -> float:
 def _roi(ev_mult: float) -> float:
     return ev_mult - 1.0
 
-def decide_format(p: List[float], cfg: Dict[str,Any], delta: float = 0.02) -> Dict[str,Any]:
-    """Return dict: {format, ev_std, ev_flex, roi_std, roi_flex, reason} or {format: 'REJECT', ...}"""
-    payouts = effective_payouts(cfg)
+def decide_format(p: List[float], cfg: Dict[str,Any], delta: float = 0.02, payouts: Dict[str,Any] | None = None) -> Dict[str,Any]:
+    """Return dict: {format, ev_std, ev_flex, roi_std, roi_flex, reason} or {format: 'REJECT', ...}
+
+    Pass precompiled `payouts` (config_cache) to skip rebuilding effective_payouts per call."""
+    if payouts is None:
+        payouts = effective_payouts(cfg)
     ev_std  = ev_multiple_standard3(p, payouts["STANDARD"])
     ev_flex = ev_multiple_flex3(p, payouts["FLEX"])
     roi_std, roi_flex = _roi(ev_std), _roi(ev_flex)
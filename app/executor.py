@@ -0,0 +1,131 @@
+"""
+Bounded execution layer for CPU-bound /optimize work.
+
+- A ProcessPoolExecutor (spawn context) whose workers import pandas/NumPy and run a tiny
+  optimization at start-up, so the first real request doesn't pay for imports.
+- Admission control: at most `workers + max_queue` jobs in flight; beyond that callers get
+  `Saturated` (-> 429 + Retry-After) immediately instead of piling up behind the GIL.
+- Per-request deadline (-> 503 + Retry-After). A worker that is already running the job
+  finishes it in the background; its slot is released when it does.
+- Queue depth, in-flight and latency percentiles for /stats; per-stage spans recorded in the worker
+  come back with each result and feed /metrics.
+PROPEDGE_WORKERS=0 runs jobs on the threadpool with the same admission/deadline rules.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio, multiprocessing, threading, time
+import numpy as np
+from .config import WORKERS, MAX_QUEUE, DEADLINE_SECONDS
+from .metrics import METRICS, collecting
+
+class Saturated(Exception):
+    """Admission queue is full."""
+
+class DeadlineExceeded(Exception):
+    """Job did not finish within the per-request deadline."""
+
+def _warm_worker() -> None:
+    import pandas as pd
+    from .optimizer import build_entries
+    build_entries(pd.DataFrame([{"player": "warm", "sport": "NBA", "market": "points", "line": 10.5,
+                                 "side": "over", "proj_mean": 12.0, "prob_over": None}]), 1.0)
+
+def _ping() -> int:
+    return 1
+
+class OptimizeExecutor:
+    def __init__(self, workers: int = WORKERS, max_queue: int = MAX_QUEUE, deadline: float = DEADLINE_SECONDS):
+        self.workers, self.max_queue, self.deadline = workers, max_queue, deadline
+        self._pool: Optional[Any] = None
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._latency = deque(maxlen=2048)      # seconds, most recent jobs
+        self._wait = deque(maxlen=2048)         # admission -> worker start
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.workers) + self.max_queue
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                return
+            if self.workers > 0:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_warm_worker)
+                for f in [self._pool.submit(_ping) for _ in range(self.workers)]:
+                    f.result()                  # block until every worker is up and warm
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="optimize")
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True); self._pool = None
+
+    def _release(self, _fut=None) -> None:
+        with self._lock:
+            self.inflight -= 1
+
+    async def run(self, fn: Callable, *args, timings: Optional[Dict[str, float]] = None) -> Any:
+        """`timings`, when given, receives the job's spans plus queue_wait and job (seconds)."""
+        if self._pool is None:
+            self.start()
+        with self._lock:
+            if self.inflight >= self.capacity:
+                self.rejected += 1
+                raise Saturated()
+            self.inflight += 1
+        t0 = time.perf_counter()
+        fut = self._pool.submit(_timed, fn, args, time.time())
+        fut.add_done_callback(self._release)
+        try:
+            result, started, spans = await asyncio.wait_for(asyncio.wrap_future(fut), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DeadlineExceeded()
+        except Exception:
+            self.errors += 1
+            raise
+        self.completed += 1
+        self._latency.append(time.perf_counter() - t0)
+        self._wait.append(max(0.0, started))
+        spans["queue_wait"] = max(0.0, started)
+        METRICS.observe_stages(spans)
+        if timings is not None:
+            timings.update(spans)
+        return result
+
+    def retry_after(self) -> int:
+        """Seconds a rejected caller should wait: roughly one queue drain at recent p50."""
+        lat = np.median(self._latency) if self._latency else 1.0
+        return max(1, int(np.ceil(lat * max(1, self.inflight) / max(1, self.workers))))
+
+    def stats(self) -> Dict[str, Any]:
+        lat = np.asarray(self._latency) * 1000.0
+        wait = np.asarray(self._wait) * 1000.0
+        pct = lambda a, q: round(float(np.percentile(a, q)), 2) if len(a) else None
+        return {
+            "mode": "process" if self.workers > 0 else "thread", "workers": self.workers,
+            "max_queue": self.max_queue, "deadline_s": self.deadline,
+            "inflight": self.inflight, "queue_depth": max(0, self.inflight - max(1, self.workers)),
+            "completed": self.completed, "rejected": self.rejected, "timeouts": self.timeouts, "errors": self.errors,
+            "latency_ms": {"p50": pct(lat, 50), "p95": pct(lat, 95), "p99": pct(lat, 99)},
+            "queue_wait_ms": {"p50": pct(wait, 50), "p99": pct(wait, 99)},
+        }
+
+def _timed(fn: Callable, args: tuple, submitted_at: float):
+    started = time.time() - submitted_at
+    t0 = time.perf_counter()
+    with collecting({}) as spans:
+        result = fn(*args)
+    spans["job"] = time.perf_counter() - t0
+    return result, started, spans
+
+EXECUTOR = OptimizeExecutor()
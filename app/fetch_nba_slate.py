@@ -1,24 +1,192 @@
+"""
+NBA slate from balldontlie.
+
+One pooled `requests.Session` (keep-alive, retries) shared by every fetch; dates and pages are
+fetched concurrently. `SLATES` keeps the rendered slate per date-range in memory with
+stale-while-revalidate: a fresh entry is returned as-is, a stale one is returned immediately
+while a single background refresh runs, and a failed refresh keeps serving the last good copy.
+Concurrent cold misses for one date-range share a single upstream fetch, and the least recently
+used ranges are dropped past PROPEDGE_SLATE_CACHE_SIZE.
+Point NBA_API_URL at a local stub server to exercise it offline.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json, threading, time
 import pandas as pd, pytz, requests
-from datetime import datetime
-from .config import BALLDONTLIE_API_KEY, TZ_LOCAL
-API = "https://api.balldontlie.io/v1"
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import BALLDONTLIE_API_KEY, TZ_LOCAL, NBA_API_URL, SLATE_TTL_SECONDS, SLATE_MAX_STALE_SECONDS, SLATE_CACHE_SIZE
+API = NBA_API_URL
 HDRS = {"Authorization": f"Bearer {BALLDONTLIE_API_KEY}"} if BALLDONTLIE_API_KEY else {}
-def get_games_by_date_local(d_local: datetime) -> pd.DataFrame:
-    params = {"dates[]": d_local.date().isoformat(), "per_page": 100}
-    r = requests.get(f"{API}/games", params=params, headers=HDRS, timeout=30)
+PER_PAGE = 100
+TIMEOUT = (3.05, 10)
+COLUMNS = ["event_id","game_time_local","game_time_utc","away","home"]
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+# separate pools so a date task waiting on its pages can never starve them
+_date_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="slate-date")
+_page_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="slate-page")
+
+def session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+            s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+            s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+            s.headers.update(HDRS)
+            _session = s
+        return _session
+
+def _get(params: Dict[str, Any]) -> Dict[str, Any]:
+    r = session().get(f"{API}/games", params=params, timeout=TIMEOUT)
     r.raise_for_status()
-    data = r.json().get("data", [])
+    return r.json()
+
+def _fetch_date(d: date) -> List[dict]:
+    """All games on one date. Page-numbered responses fan out the remaining pages concurrently;
+    cursor-paginated ones (v1 `meta.next_cursor`) are followed in order."""
+    params = {"dates[]": d.isoformat(), "per_page": PER_PAGE}
+    first = _get(params)
+    data = list(first.get("data", []))
+    meta = first.get("meta", {}) or {}
+    if meta.get("total_pages"):
+        pages = range(2, int(meta["total_pages"]) + 1)
+        for page in _page_pool.map(lambda p: _get({**params, "page": p}), pages):
+            data.extend(page.get("data", []))
+    else:
+        cursor = meta.get("next_cursor")
+        while cursor:
+            page = _get({**params, "cursor": cursor})
+            data.extend(page.get("data", []))
+            cursor = (page.get("meta", {}) or {}).get("next_cursor")
+    return data
+
+def _first_present(df: pd.DataFrame, keys: Sequence[str]) -> pd.Series:
+    out = pd.Series(None, index=df.index, dtype=object)
+    for k in keys:
+        if k in df.columns:
+            out = out.fillna(df[k])
+    return out.fillna("UNK").astype(str)
+
+def games_frame(data: List[dict]) -> pd.DataFrame:
     if not data:
-        return pd.DataFrame()
+        return pd.DataFrame(columns=COLUMNS)
     df = pd.json_normalize(data)
     df["game_time_utc"] = pd.to_datetime(df["date"], utc=True)
-    local_tz = pytz.timezone(TZ_LOCAL)
-    df["game_time_local"] = df["game_time_utc"].dt.tz_convert(local_tz)
-    def abbr(row, keys):
-        for k in keys:
-            if k in row and pd.notnull(row[k]): return row[k]
-        return "UNK"
-    df["away"] = df.apply(lambda r: abbr(r, ["visitor_team.abbreviation","visitor_team.abbr"]), axis=1)
-    df["home"] = df.apply(lambda r: abbr(r, ["home_team.abbreviation","home_team.abbr"]), axis=1)
+    df["game_time_local"] = df["game_time_utc"].dt.tz_convert(pytz.timezone(TZ_LOCAL))
+    df["away"] = _first_present(df, ["visitor_team.abbreviation","visitor_team.abbr"])
+    df["home"] = _first_present(df, ["home_team.abbreviation","home_team.abbr"])
     df["event_id"] = df["game_time_utc"].dt.strftime("NBA%Y%m%d-") + df["away"] + "@" + df["home"]
-    return df[["event_id","game_time_local","game_time_utc","away","home"]]
+    return df[COLUMNS].drop_duplicates("event_id").sort_values("game_time_utc", kind="stable").reset_index(drop=True)
+
+def fetch_games(dates: Sequence[date]) -> pd.DataFrame:
+    """Games for every date, dates fetched concurrently on the shared session."""
+    data: List[dict] = []
+    for rows in _date_pool.map(_fetch_date, list(dates)):
+        data.extend(rows)
+    return games_frame(data)
+
+def get_games_by_date_local(d_local: datetime) -> pd.DataFrame:
+    return fetch_games([d_local.date()])
+
+def render(df: pd.DataFrame) -> bytes:
+    """JSON body for /nba/slate, rendered once per refresh."""
+    out = df.copy()
+    for c in ("game_time_local", "game_time_utc"):
+        out[c] = out[c].map(lambda t: t.isoformat())   # keeps the local UTC offset
+    games = out.to_dict(orient="records")
+    return json.dumps({"count": len(df), "games": games}, separators=(",", ":")).encode()
+
+class SlateCache:
+    """(dates) -> (frame, rendered body) with TTL, stale-while-revalidate and an LRU cap on entries."""
+
+    def __init__(self, ttl: float = SLATE_TTL_SECONDS, max_stale: float = SLATE_MAX_STALE_SECONDS,
+                 maxsize: int = SLATE_CACHE_SIZE):
+        self.ttl, self.max_stale, self.maxsize = ttl, max_stale, max(1, maxsize)
+        self._data: "OrderedDict[Tuple[date, ...], Tuple[float, pd.DataFrame, bytes]]" = OrderedDict()
+        self._inflight: Dict[Tuple[date, ...], Future] = {}   # one fetch per key; cold misses wait on it
+        self._lock = threading.Lock()
+        self.hits = 0; self.stale_hits = 0; self.misses = 0; self.refreshes = 0; self.failures = 0
+        self.evictions = 0; self.coalesced = 0
+        self.last_error: Optional[str] = None
+
+    def _refresh(self, key: Tuple[date, ...], fut: Future) -> Tuple[pd.DataFrame, bytes]:
+        try:
+            df = fetch_games(key); body = render(df)
+        except Exception as err:
+            with self._lock:
+                self._inflight.pop(key, None)
+            self.failures += 1; self.last_error = f"{type(err).__name__}: {err}"
+            fut.set_exception(err)
+            raise
+        with self._lock:
+            self._data[key] = (time.time(), df, body); self._data.move_to_end(key); self.refreshes += 1
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False); self.evictions += 1
+            self._inflight.pop(key, None)
+        self.last_error = None
+        fut.set_result((df, body))
+        return df, body
+
+    def _refresh_quietly(self, key: Tuple[date, ...], fut: Future) -> None:
+        try:
+            self._refresh(key, fut)
+        except Exception:
+            pass  # keep serving the stale copy; error is in last_error
+
+    def _background(self, key: Tuple[date, ...]) -> None:
+        """Start a refresh unless one is running; call with the lock held."""
+        if key in self._inflight:
+            return
+        fut = self._inflight[key] = Future()
+        threading.Thread(target=self._refresh_quietly, args=(key, fut), name="slate-refresh", daemon=True).start()
+
+    def get(self, dates: Sequence[date]) -> Tuple[pd.DataFrame, bytes, str]:
+        """(frame, body, 'fresh' | 'stale' | 'miss'). Only a cold miss waits on upstream, and
+        concurrent cold misses for one key share a single fetch."""
+        key = tuple(dates)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now - entry[0] <= self.ttl + self.max_stale:
+                self._data.move_to_end(key)
+                if now - entry[0] <= self.ttl:
+                    self.hits += 1
+                    return entry[1], entry[2], "fresh"
+                self.stale_hits += 1
+                self._background(key)
+                return entry[1], entry[2], "stale"
+            self.misses += 1
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            df, body = self._refresh(key, fut)
+        else:
+            df, body = fut.result()
+        return df, body, "miss"
+
+    def prewarm(self, dates: Sequence[date]) -> None:
+        with self._lock:
+            self._background(tuple(dates))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._data), "max_entries": self.maxsize, "ttl_s": self.ttl,
+                "max_stale_s": self.max_stale, "hits": self.hits, "stale_hits": self.stale_hits,
+                "misses": self.misses, "coalesced": self.coalesced, "refreshes": self.refreshes,
+                "evictions": self.evictions, "failures": self.failures, "last_error": self.last_error}
+
+SLATES = SlateCache()
+
+def local_dates(days: int = 1, now: Optional[datetime] = None) -> List[date]:
+    today = (now or datetime.now(pytz.timezone(TZ_LOCAL))).date()
+    return [today + timedelta(days=i) for i in range(max(1, days))]
@@ -1,84 +1,183 @@
-from fastapi import FastAPI
-import pandas as pd
-from datetime import datetime
-from .schemas import OptimizeRequest, OptimizeResponse
-from .optimizer import build_entries
-from .decision_tree import decide_format, ev_multiple_flex3, ev_multiple_standard3
-from .fetch_nba_slate import get_games_by_date_local
-from .config import DEFAULT_BANKROLL
-import pytz
-app = FastAPI(title="PropEdge Lineup API")
+from contextlib import asynccontextmanager
+from time import perf_counter
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from .schemas import OptimizeRequest, OptimizeResponse, BatchOptimizeRequest, BatchOptimizeResponse, STD_TOP_K_MAX
+from .fetch_nba_slate import SLATES, local_dates
+from .config import DEFAULT_BANKROLL, SLATE_PREWARM
+from .config_cache import CONFIG
+from .service import run_optimize, run_optimize_batch
+from .executor import EXECUTOR, Saturated, DeadlineExceeded
+from .columnar import props_frame_from_body, PropsValidationError
+from .response_cache import RESPONSE_CACHE, request_key
+from .ndjson import MEDIA_TYPE as NDJSON, optimize_lines
+from .archives import ARCHIVES, SORT_KEYS
+from .metrics import METRICS, CONTENT_TYPE as METRICS_TYPE, MetricsMiddleware, timings_ms
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    CONFIG.start()
+    CONFIG.on_reload(RESPONSE_CACHE.clear)  # after the initial load, so the disk tier survives restarts
+    if SLATE_PREWARM:
+        SLATES.prewarm(local_dates(1))
+    EXECUTOR.start()
+    yield
+    EXECUTOR.stop()
+    CONFIG.stop()
+
+app = FastAPI(title="PropEdge Lineup API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+for _name, _help, _fn, _kind in [
+        ("propedge_executor_inflight", "Optimize jobs admitted and not finished.", lambda: EXECUTOR.inflight, "gauge"),
+        ("propedge_executor_completed_total", "Optimize jobs completed.", lambda: EXECUTOR.completed, "counter"),
+        ("propedge_executor_rejected_total", "Optimize jobs rejected with 429.", lambda: EXECUTOR.rejected, "counter"),
+        ("propedge_executor_timeouts_total", "Optimize jobs past the deadline (503).", lambda: EXECUTOR.timeouts, "counter"),
+        ("propedge_cache_hits_total", "Response cache hits.", lambda: RESPONSE_CACHE.hits, "counter"),
+        ("propedge_cache_misses_total", "Response cache misses.", lambda: RESPONSE_CACHE.misses, "counter")]:
+    METRICS.gauge(_name, _help, _fn, _kind)
 @app.get("/healthz")
-def health(): return {"ok": True}
+def health():
+    cc = CONFIG.current
+    return {"ok": True, "config_version": cc.version, "config_loaded_at": cc.loaded_at,
+            "config_error": CONFIG.last_error}
 @app.get("/nba/slate")
-def slate():
-    now_local = datetime.now(pytz.timezone("America/Chicago"))
-    df = get_games_by_date_local(now_local)
-    return {"count": len(df), "games": df.to_dict(orient="records")}
+def slate(days: int = 1):
+    """Today's games (local TZ) plus the next days-1, served from memory; see fetch_nba_slate.SLATES."""
+    try:
+        _, body, status = SLATES.get(local_dates(min(days, 14)))
+    except Exception as err:
+        raise HTTPException(502, f"slate upstream unavailable: {err}")
+    return Response(body, media_type="application/json", headers={"X-Cache": status})
+@app.get("/stats")
+def stats():
+    return {"executor": EXECUTOR.stats(), "cache": RESPONSE_CACHE.stats(), "slate": SLATES.stats()}
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition: request/stage histograms, body size and prop-count distributions."""
+    return Response(METRICS.render(), media_type=METRICS_TYPE)
+@app.get("/archives")
+def archives():
+    return {"archives": ARCHIVES.names()}
+@app.get("/archives/{name}")
+def archive_page(name: str, offset: int = 0, limit: int = 50, sort: str = "ev", num_legs: int | None = None):
+    """A page of an archived slate's lineups, best first; read from the memory-mapped file."""
+    if sort not in SORT_KEYS:
+        raise HTTPException(422, f"sort must be one of {sorted(SORT_KEYS)}")
+    try:
+        return ARCHIVES.page(name, max(0, offset), max(1, min(limit, 500)), sort, num_legs)
+    except KeyError:
+        raise HTTPException(404, f"no archive named {name!r}")
+async def _offload(fn, *args, timings=None):
+    """Run on the executor, mapping saturation/deadline to 429/503 with Retry-After."""
+    try:
+        return await EXECUTOR.run(fn, *args, timings=timings)
+    except Saturated:
+        raise HTTPException(429, "optimizer saturated, retry later", headers={"Retry-After": str(EXECUTOR.retry_after())})
+    except DeadlineExceeded:
+        raise HTTPException(503, f"optimization exceeded {EXECUTOR.deadline:.0f}s deadline",
+                            headers={"Retry-After": str(EXECUTOR.retry_after())})
+def _cached_response(key: str):
+    body, status = RESPONSE_CACHE.get(key) if RESPONSE_CACHE.enabled else (None, "BYPASS")
+    return (Response(body, media_type="application/json", headers={"X-Cache": status}) if body is not None else None), status
+def _parsed(request: Request, route: str, *n_props: int) -> dict:
+    """Record parse time (request start -> now) and prop counts per slate; returns the request's timings."""
+    parse = perf_counter() - request.state.t0
+    METRICS.stage.observe(parse, "parse")
+    for n in n_props:
+        METRICS.props.observe(n, route)
+    return {"parse": parse}
+def _sample(force: bool, status: str) -> tuple:
+    """(sampled, cache status). Sampled responses carry their own timings, so they are not cached."""
+    sampled = METRICS.sampled(force)
+    return sampled, ("BYPASS" if sampled else status)
+def _store_response(key: str, status: str, model) -> Response:
+    t0 = perf_counter()
+    resp = JSONResponse(jsonable_encoder(model), headers={"X-Cache": status})
+    METRICS.stage.observe(perf_counter() - t0, "serialize")
+    if status != "BYPASS":
+        RESPONSE_CACHE.put(key, resp.body)
+    return resp
+def _wants_ndjson(request: Request, format: str) -> bool:
+    return format == "ndjson" or NDJSON in request.headers.get("accept", "")
+def _stream(result: dict) -> StreamingResponse:
+    """NDJSON for a finished result: header, then each entry preceded by the props it references
+    first, then totals. Lines are encoded as they are sent; the result itself is already complete."""
+    return StreamingResponse(optimize_lines(result), media_type=NDJSON)
 @app.post("/optimize", response_model=OptimizeResponse)
-def optimize(req: OptimizeRequest):
-    props_df = pd.DataFrame([p.dict() for p in req.props])
+async def optimize(req: OptimizeRequest, request: Request, format: str = "json", timings: bool = False):
+    cc = CONFIG.current  # one snapshot for the whole request, even if a reload lands mid-way
+    spans = _parsed(request, "/optimize", len(req.props))
     bankroll = req.bankroll or DEFAULT_BANKROLL
-    result = build_entries(props_df, bankroll)
-    
-    
-    # Attach promo diagnostics if any
-    try:
-        if isinstance(result, dict):
-            result.setdefault('meta', {})['promo_haircut'] = _PROMO_DIAG
-    except Exception: pass
-## BEGIN FORMAT DECISION POST
+    props = [p.dict() for p in req.props]
+    if _wants_ndjson(request, format):
+        sampled = METRICS.sampled(timings)
+        result = await _offload(run_optimize, props, bankroll, cc, req.std_top_k, timings=spans)
+        if sampled:
+            result.setdefault("meta", {})["timings_ms"] = timings_ms(spans)
+        return _stream(result)
+    key = await run_in_threadpool(request_key, "optimize", {"bankroll": bankroll, "std_top_k": req.std_top_k,
+                                                            "props": props}, cc.version)
+    hit, status = _cached_response(key) if not timings else (None, "BYPASS")
+    if hit is not None:
+        return hit
+    sampled, status = _sample(timings, status)
+    result = await _offload(run_optimize, props, bankroll, cc, req.std_top_k, timings=spans)
+    if sampled:
+        result.setdefault("meta", {})["timings_ms"] = timings_ms(spans)
+    return _store_response(key, status, OptimizeResponse(**result))
+@app.post("/optimize/upload", response_model=OptimizeResponse)
+async def optimize_upload(request: Request, bankroll: float = DEFAULT_BANKROLL,
+                          std_top_k: int = Query(1, ge=1, le=STD_TOP_K_MAX), format: str = "json", timings: bool = False):
+    """Raw CSV (props_sample.csv columns) or Arrow IPC body; validated per column, no per-row models."""
+    cc = CONFIG.current
+    body = await request.body()
+    ctype = request.headers.get("content-type", "")
+    bankroll = bankroll or DEFAULT_BANKROLL
+    stream = _wants_ndjson(request, format)
+    key = request_key(f"upload:{ctype}:{bankroll}:{std_top_k}", body, cc.version)
+    hit, status = _cached_response(key) if not (stream or timings) else (None, "BYPASS")
+    if hit is not None:
+        return hit
     try:
-        # Load CFG for payouts/thresholds
-        import os, yaml
-        with open(os.path.join(os.path.dirname(__file__),'..','config.yaml'),'r',encoding='utf-8') as _f:
-            _CFG = yaml.safe_load(_f)
-
-        # If the optimizer returned entries, annotate each with chosen format
-        if isinstance(result, dict) and 'entries' in result and isinstance(result['entries'], list):
-            for _e in result['entries']:
-                # Try to recover per-leg probabilities
-                p_list = []
-                legs = _e.get('legs') or _e.get('props') or []
-                for _leg in legs:
-                    p = (_leg.get('p_final') or _leg.get('prob') or _leg.get('p') or
-                         (_leg.get('meta',{}) or {}).get('p_final'))
-                    if p is not None:
-                        try: p_list.append(float(p))
-                        except: pass
-                # If not 3 probs found, do a best-effort join from props_df by (player, market)
-                if len(p_list) < 3:
-                    try:
-                        for _leg in legs:
-                            _pl = str(_leg.get('player','')).strip().lower()
-                            _mk = str(_leg.get('market','')).strip().lower()
-                            _cand = props_df.loc[(props_df['player'].str.lower()==_pl) &
-                                                 (props_df['market'].str.lower()==_mk)]
-                            if not _cand.empty:
-                                p_list.append(float(_cand.iloc[0]['p_final']))
-                    except Exception:
-                        pass
-
-                if len(p_list) == 3:
-                    _pick = decide_format(p_list, _CFG, delta=0.02)
-                    # Harmonize naming for clients
-                    chosen = _pick['format']
-                    if chosen == 'STD3':
-                        _e['format'] = 'standard'
-                    elif chosen == 'FLEX3':
-                        _e['format'] = 'flex'
-                    else:
-                        _e['format'] = _e.get('format','unknown')  # leave as-is if reject
-
-                    # add diagnostics
-                    _meta = _e.get('meta',{})
-                    _meta['format_decision'] = _pick
-                    _meta['p_list'] = p_list
-                    _e['meta'] = _meta
-    except Exception as _err:
-        # Non-fatal: keep original result if annotate failed
-        if isinstance(result, dict):
-            result.setdefault('meta',{})['format_decision_error'] = str(_err)
-    ## END FORMAT DECISION POSTreturn OptimizeResponse(**result)
-
-
+        props_df = await run_in_threadpool(props_frame_from_body, body, ctype)   # pandas parse off the event loop
+    except PropsValidationError as err:
+        raise HTTPException(422, err.errors)
+    except RuntimeError as err:
+        raise HTTPException(415, str(err))
+    except ValueError as err:
+        raise HTTPException(415 if "content type" in str(err) else 422, str(err))
+    spans = _parsed(request, "/optimize/upload", len(props_df))
+    sampled, status = _sample(timings, status)
+    result = await _offload(run_optimize, props_df, bankroll, cc, std_top_k, timings=spans)
+    if sampled:
+        result.setdefault("meta", {})["timings_ms"] = timings_ms(spans)
+    if stream:
+        return _stream(result)
+    return _store_response(key, status, OptimizeResponse(**result))
+@app.post("/optimize/batch", response_model=BatchOptimizeResponse)
+async def optimize_batch(req: BatchOptimizeRequest, request: Request, timings: bool = False):
+    """One prop set x many bankroll variants and/or several slates; probabilities are computed once per slate."""
+    cc = CONFIG.current
+    slates = [{"id": s.id, "props": [p.dict() for p in s.props],
+               "variants": [v.dict() for v in s.variants]} for s in req.slates]
+    if req.props is not None:
+        slates.insert(0, {"props": [p.dict() for p in req.props], "variants": [v.dict() for v in req.variants]})
+    if not slates or not any(s["variants"] for s in slates):
+        raise HTTPException(422, "batch needs props + variants or at least one slate with variants")
+    for s in slates:
+        for v in s["variants"]:
+            v["bankroll"] = v["bankroll"] or DEFAULT_BANKROLL
+    spans = _parsed(request, "/optimize/batch", *(len(s["props"]) for s in slates))
+    key = await run_in_threadpool(request_key, "batch", slates, cc.version)
+    hit, status = _cached_response(key) if not timings else (None, "BYPASS")
+    if hit is not None:
+        return hit
+    sampled, status = _sample(timings, status)
+    results = await _offload(run_optimize_batch, slates, cc, True, timings=spans)
+    meta = {"config_version": cc.version, "slates": len(slates), "results": len(results)}
+    if sampled:
+        meta["timings_ms"] = timings_ms(spans)
+    return _store_response(key, status, BatchOptimizeResponse(
+        results=[OptimizeResponse(**r) for r in results], meta=meta))
@@ -0,0 +1,185 @@
+"""
+Prometheus-style metrics for the API: counters and fixed-bucket histograms, served as text by
+GET /metrics. Stdlib only; an observation is one bisect and a few adds under a lock.
+
+Hot-path stages are timed with `span(name)`. Inside a job wrapped by `collecting(spans)` (the
+executor wraps every job, so this works in worker processes) the elapsed seconds accumulate in
+`spans`, which travels back with the result and is folded into `propedge_stage_seconds` by the API
+process. Outside `collecting` a span only costs a thread-local lookup.
+
+PROPEDGE_METRICS_SAMPLE (0..1) is the share of computed responses that carry their own breakdown
+under `meta.timings_ms`; `?timings=1` forces it for one request.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import random, threading
+from .config import METRICS_SAMPLE
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(float(256 * 4 ** i) for i in range(10))          # 256 B .. 64 MB
+COUNT_BUCKETS = (1.0, 3.0, 10.0, 30.0, 100.0, 300.0, 1000.0, 3000.0, 10000.0, 30000.0, 100000.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_local = threading.local()
+
+@contextmanager
+def collecting(spans: Dict[str, float]) -> Iterator[Dict[str, float]]:
+    """Spans opened on this thread inside the block add their seconds to `spans`."""
+    prev, _local.spans = getattr(_local, "spans", None), spans
+    try:
+        yield spans
+    finally:
+        _local.spans = prev
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        yield
+        return
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = spans.get(name, 0.0) + perf_counter() - t0
+
+def _fmt(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, by: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + by
+
+    def lines(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for lv, v in items:
+            yield f"{self.name}{_labels(self.labelnames, lv)} {_fmt(v)}"
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}        # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][i] += 1
+            s[1] += value
+
+    def lines(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((lv, (list(c), total)) for lv, (c, total) in self._series.items())
+        for lv, (counts, total) in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                bound = 'le="+Inf"' if le == float("inf") else f'le="{_fmt(le)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, lv, bound)} {acc}"
+            yield f"{self.name}_sum{_labels(self.labelnames, lv)} {_fmt(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, lv)} {acc}"
+
+class Metrics:
+    def __init__(self, sample_rate: float = METRICS_SAMPLE):
+        self.sample_rate = sample_rate
+        self.requests = Counter("propedge_requests_total", "HTTP requests by route and status.", ("route", "status"))
+        self.latency = Histogram("propedge_request_seconds", "Request latency, first byte in to last byte out.",
+                                 LATENCY_BUCKETS, ("route",))
+        self.request_bytes = Histogram("propedge_request_bytes", "Request body size.", BYTES_BUCKETS, ("route",))
+        self.props = Histogram("propedge_request_props", "Props per optimized slate.", COUNT_BUCKETS, ("route",))
+        self.stage = Histogram("propedge_stage_seconds", "Time spent per hot-path stage of an optimize request.",
+                               LATENCY_BUCKETS, ("stage",))
+        self._metrics: List = [self.requests, self.latency, self.request_bytes, self.props, self.stage]
+        self._gauges: List[Tuple[str, str, str, Callable[[], float]]] = []
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge") -> None:
+        """A value read at scrape time (e.g. executor and cache counters kept elsewhere)."""
+        self._gauges.append((name, help, kind, fn))
+
+    def sampled(self, force: bool = False) -> bool:
+        return force or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def observe_stages(self, spans: Dict[str, float]) -> None:
+        for name, seconds in spans.items():
+            self.stage.observe(seconds, name)
+
+    def render(self) -> str:
+        out: List[str] = []
+        for m in self._metrics:
+            out += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}", *m.lines()]
+        for name, help, kind, fn in self._gauges:
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            out += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_fmt(value)}"]
+        return "\n".join(out) + "\n"
+
+def timings_ms(spans: Dict[str, float]) -> Dict[str, float]:
+    """A request's spans as the `meta.timings_ms` breakdown."""
+    return {k: round(v * 1000.0, 3) for k, v in spans.items()}
+
+class MetricsMiddleware:
+    """Pure ASGI (no per-request task, unlike BaseHTTPMiddleware): counts, latency and body size by
+    route template, and stamps `request.state.t0` so handlers can time request parsing."""
+
+    def __init__(self, app, metrics: Optional[Metrics] = None):
+        self.app, self.metrics = app, metrics or METRICS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = perf_counter()
+        scope.setdefault("state", {})["t0"] = t0
+        status, size = 500, 0
+
+        async def _receive():
+            nonlocal size
+            msg = await receive()
+            if msg["type"] == "http.request":
+                size += len(msg.get("body", b""))
+            return msg
+
+        async def _send(msg):
+            nonlocal status
+            if msg["type"] == "http.response.start":
+                status = msg["status"]
+            await send(msg)
+
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            route = getattr(scope.get("route"), "path", "other")
+            self.metrics.requests.inc(route, str(status))
+            self.metrics.latency.observe(perf_counter() - t0, route)
+            if scope["method"] != "GET":
+                self.metrics.request_bytes.observe(size, route)
+
+METRICS = Metrics()
@@ -0,0 +1,87 @@
+"""
+NDJSON output shared by the API (`/optimize?format=ndjson`) and the CLI (`--output-format ndjson`).
+
+One JSON object per line, tagged by "type". Legs are written once as {"type": "prop", "id": n, ...}
+the first time a lineup uses them; lineups then carry `"legs": [n, ...]` instead of repeating the
+full prop dict. orjson is used when installed, the stdlib encoder otherwise.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import json, math
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+MEDIA_TYPE = "application/x-ndjson"
+
+def _default(o: Any) -> Any:
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    raise TypeError(f"not JSON serializable: {type(o).__name__}")
+
+def _clean(o: Any) -> Any:
+    """NaN/inf -> null (pandas records carry NaN for missing optional columns)."""
+    if isinstance(o, float):
+        return o if math.isfinite(o) else None
+    if isinstance(o, dict):
+        return {k: _clean(v) for k, v in o.items()}
+    if isinstance(o, (list, tuple)):
+        return [_clean(v) for v in o]
+    return o
+
+def dumps_line(obj: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(_clean(obj), default=_default, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    return json.dumps(_clean(obj), default=_default, separators=(",", ":"), allow_nan=False).encode() + b"\n"
+
+class LegRefs:
+    """Assigns compact ids to legs by identity key; `ref` returns (id, first-time prop line or None)."""
+
+    def __init__(self, key: Callable[[Any], tuple], record: Callable[[Any], Dict[str, Any]]):
+        self.key, self.record = key, record
+        self.ids: Dict[tuple, int] = {}
+
+    def ref(self, leg: Any) -> Tuple[int, Optional[bytes]]:
+        k = self.key(leg)
+        i = self.ids.get(k)
+        if i is not None:
+            return i, None
+        i = self.ids[k] = len(self.ids)
+        return i, dumps_line({"type": "prop", "id": i, **self.record(leg)})
+
+def stream_lineups(header: Dict[str, Any], lineups: Iterable[Any], refs: LegRefs,
+                   to_record: Callable[[Any], Dict[str, Any]], legs_of: Callable[[Any], List[Any]],
+                   footer: Optional[Callable[[], Dict[str, Any]]] = None, kind: str = "entry") -> Iterator[bytes]:
+    """header line, then for each lineup its new prop lines followed by the lineup line, then footer."""
+    yield dumps_line({"type": "header", **header})
+    for item in lineups:
+        ids = []
+        for leg in legs_of(item):
+            i, line = refs.ref(leg)
+            if line is not None:
+                yield line
+            ids.append(i)
+        yield dumps_line({"type": kind, **to_record(item), "legs": ids})
+    if footer is not None:
+        yield dumps_line({"type": "footer", **footer()})
+
+# -- /optimize results (entries with full leg dicts from build_entries)
+
+def _entry_leg_key(leg: Dict[str, Any]) -> tuple:
+    return (leg.get("player"), leg.get("market"), leg.get("line"), leg.get("side"), leg.get("sport"))
+
+def optimize_lines(result: Dict[str, Any]) -> Iterator[bytes]:
+    refs = LegRefs(_entry_leg_key, lambda leg: leg)
+    entries = result.get("entries", [])
+    return stream_lineups(
+        {"meta": result.get("meta", {})}, entries, refs,
+        to_record=lambda e: {k: v for k, v in e.items() if k != "legs"},
+        legs_of=lambda e: e.get("legs") or [],
+        footer=lambda: {"totals": result.get("totals", {}), "props": len(refs.ids)})
@@ -1,68 +1,248 @@
-import numpy as np, pandas as pd
-from typing import List, Dict
+import heapq, math
+from functools import lru_cache
+import numpy as np, pandas as pd, yaml
+from typing import List, Dict, Optional
+from .config import CONFIG_PATH
+from .metrics import span
+from .promo import promo_haircut_fill
+from probability.normal import (SigmaTable, base_sigma as _base_sigma, load_sigma_table as _load_sigma_table,
+                                normal_over_prob_vec)
 STANDARD = {2:3.0, 3:6.0}
 FLEX3 = {3:3.0, 2:1.0}
 WHITELIST_PLUS = {("ast","points")}
 BLACKLIST_MINUS = {("reb","reb"), ("points","points")}
-def sigma_for_market(m, pace=100.0):
-    base = {"points":7.0,"reb":3.0,"ast":3.2,"pa":6.0,"pr":7.0,"ra":4.8,"pra":8.5}.get(m,6.5)
-    return base*np.sqrt(pace/100.0)
+
+@lru_cache(maxsize=1)
+def _default_sigma_table() -> SigmaTable:
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return _load_sigma_table(yaml.safe_load(f))
+
+def load_sigma_table(cfg: Optional[dict] = None) -> SigmaTable:
+    """FILTERS.SIGMA of `cfg`, or of the API's config.yaml when None."""
+    return _default_sigma_table() if cfg is None else _load_sigma_table(cfg)
+
+def base_sigma(m, sport=None, table: Optional[SigmaTable] = None) -> float:
+    return _base_sigma(m, sport, _default_sigma_table() if table is None else table)
+
+def sigma_for_market(m, pace=100.0, sport=None, table: Optional[SigmaTable] = None):
+    return base_sigma(m, sport, table)*np.sqrt(pace/100.0)
+
 def normal_over_prob(mu, line, sigma):
     z = (line - mu)/max(1e-6, sigma)
-    from math import erf, sqrt
-    cdf = 0.5*(1.0 + erf(z/np.sqrt(2)))
+    cdf = 0.5*(1.0 + math.erf(z/np.sqrt(2)))
     return 1.0 - cdf
-def blend_p(row, pace=100.0):
+
+def blend_p(row, pace=100.0, table: Optional[SigmaTable] = None):
     p = None
     if pd.notnull(row.get("prob_over")):
         p = 0.2*0.60 + 0.8*float(row["prob_over"])
     elif pd.notnull(row.get("proj_mean")):
         mkey = str(row["market"]).lower()
-        sigma = sigma_for_market(mkey, pace)
+        sigma = sigma_for_market(mkey, pace, row.get("sport"), table)
         p = normal_over_prob(float(row["proj_mean"]), float(row["line"]), sigma)
         if str(row.get("side","over")) == "under": p = 1.0 - p
     else:
         p = 0.55
     return min(max(p, 0.01), 0.99)
+
+def sigma_column(props_df: pd.DataFrame, table: Optional[SigmaTable] = None) -> np.ndarray:
+    """Base sigma per row, looked up once per distinct (sport, market)."""
+    markets = props_df["market"].astype(str).str.lower()
+    sports = props_df["sport"].astype(str) if "sport" in props_df.columns else pd.Series("None", index=props_df.index)
+    codes, uniques = pd.factorize(pd.MultiIndex.from_arrays([sports, markets]))
+    lut = np.array([base_sigma(m, sp, table) for sp, m in uniques], dtype=float)
+    return lut[codes]
+
+def blend_p_frame(props_df: pd.DataFrame, pace=100.0, table: Optional[SigmaTable] = None) -> np.ndarray:
+    """
+    Column-wise `blend_p` for the whole frame (same branches and arithmetic; projection rows use
+    `probability.normal.erf_vec`, so they match the scalar path to 2e-16 rather than bit for bit).
+    `pace` is a scalar or a per-row array (see `pace_lookup` in build_entries).
+    """
+    n = len(props_df)
+    p = np.full(n, 0.55)
+    cols = props_df.columns
+    prob_over = pd.to_numeric(props_df["prob_over"], errors="coerce").to_numpy(float) if "prob_over" in cols else np.full(n, np.nan)
+    has_prob = pd.notnull(props_df["prob_over"]).to_numpy() if "prob_over" in cols else np.zeros(n, bool)
+    p[has_prob] = 0.2*0.60 + 0.8*prob_over[has_prob]
+
+    has_proj = (~has_prob) & (pd.notnull(props_df["proj_mean"]).to_numpy() if "proj_mean" in cols else np.zeros(n, bool))
+    if has_proj.any():
+        sub = props_df[has_proj]
+        pace_sub = np.asarray(pace, dtype=float)[has_proj] if np.ndim(pace) else float(pace)
+        sigma = sigma_column(sub, table)*np.sqrt(pace_sub/100.0)
+        q = normal_over_prob_vec(sub["proj_mean"].to_numpy(float), sub["line"].to_numpy(float), sigma)
+        under = (sub["side"].astype(str) == "under").to_numpy() if "side" in cols else np.zeros(len(sub), bool)
+        q[under] = 1.0 - q[under]
+        p[has_proj] = q
+    return np.minimum(np.maximum(p, 0.01), 0.99)
+
 def ev_3flex(p_list: List[float]) -> float:
     p = np.array(p_list); ev = 3.0*np.prod(p)
     for i in range(3): ev += 1.0*np.prod(np.delete(p, i))*(1.0 - p[i])
     return float(ev)
 def ev_standard_k(p_list: List[float], k:int) -> float:
     return float(STANDARD[k]*np.prod(p_list))
-def build_entries(props_df: pd.DataFrame, bankroll: float, pace_lookup=None) -> Dict:
+def _pair_set(pairs) -> set:
+    return {(a, b) for a, b in pairs} | {(b, a) for a, b in pairs}
+
+def top_standard_triples(p: np.ndarray, markets: np.ndarray, k: int = 1, max_pops: int = 20000,
+                         stats: Optional[dict] = None) -> List[tuple]:
+    """
+    True top-k staggered 3-leg standard entries over the whole pool (p sorted descending,
+    one row per player): a WHITELIST_PLUS market pair plus a third leg whose market forms no
+    BLACKLIST_MINUS pair with either of them.
+
+    One heap holds pairs, keyed by the bound p_a*p_b*max(p), and (pair, r) triples, keyed by
+    their product with the pair's r-th best allowed third leg. Popping a pair pushes its neighbour
+    pairs (best-first per whitelist pair, over a market -> rows index) and its best triple;
+    popping a triple emits it and pushes the pair's next third leg. No bound is ever above what
+    it covers, so triples come off in product order and the first k distinct ones are the answer.
+    Returns [(i, j, c, p_i*p_j*p_c)] with i < j the pair rows, sorted by product. Fewer than k
+    come back when the pool has no more, or when `max_pops` heap pops ran out first: then `stats`
+    (if given) gets truncated=True, alongside found and pops.
+    """
+    n = len(p)
+    if n < 3 or k <= 0:
+        return []
+    by_market: Dict[str, np.ndarray] = {}
+    codes, uniq = pd.factorize(markets)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniq) + 1))
+    for c, m in enumerate(uniq):
+        by_market[m] = order[bounds[c]:bounds[c+1]]          # rows of market m, in pool (p-desc) order
+    black = _pair_set(BLACKLIST_MINUS)
+    banned = {m: np.isin(markets, [y for x, y in black if x == m]) for m in uniq}
+    third_cache: Dict[tuple, np.ndarray] = {}
+
+    def third(i: int, j: int, r: int) -> int:
+        """Row of the first allowed third leg at rank >= r (ranks skip i and j), or -1."""
+        key = (markets[i], markets[j])
+        cand = third_cache.get(key)
+        if cand is None:
+            cand = third_cache[key] = np.flatnonzero(~(banned[key[0]] | banned[key[1]]))
+        while r < len(cand) and cand[r] in (i, j):
+            r += 1
+        return r if r < len(cand) else -1
+
+    lists = []
+    for m1, m2 in sorted({tuple(sorted(x)) for x in WHITELIST_PLUS}):
+        A, B = by_market.get(m1), by_market.get(m2)
+        if A is None or B is None or not len(A) or not len(B):
+            continue
+        lists.append((A, B, m1 == m2))
+    heap: List[tuple] = []; seen = set(); p_max = float(p[0]); tick = 0
+
+    def push_pair(t: int, a: int, b: int) -> None:
+        nonlocal tick
+        A, B, same = lists[t]
+        if a < len(A) and b < len(B) and (not same or a < b) and (t, a, b) not in seen:
+            seen.add((t, a, b)); tick += 1
+            heapq.heappush(heap, (-p[A[a]]*p[B[b]]*p_max, 1, 0.0, tick, (t, a, b, -1)))
+
+    def push_triple(t: int, a: int, b: int, r: int) -> None:
+        nonlocal tick
+        A, B, _ = lists[t]
+        i, j = int(A[a]), int(B[b])
+        r = third(i, j, r)
+        if r >= 0:
+            c = int(third_cache[(markets[i], markets[j])][r]); tick += 1
+            x, y, z = sorted((i, j, c))                         # one product per leg set; ties go to the best pair
+            heapq.heappush(heap, (-p[x]*p[y]*p[z], 0, -p[i]*p[j], tick, (t, a, b, r)))
+
+    for t, (A, B, same) in enumerate(lists):
+        push_pair(t, 0, 1 if same else 0)
+    best: List[tuple] = []; found = set(); pops = 0
+    while heap and len(best) < k and pops < max_pops:
+        _, kind, _, _, (t, a, b, r) = heapq.heappop(heap); pops += 1
+        if kind == 1:
+            push_pair(t, a + 1, b); push_pair(t, a, b + 1)
+            push_triple(t, a, b, 0)
+            continue
+        A, B, _ = lists[t]
+        i, j = int(A[a]), int(B[b])
+        c = int(third_cache[(markets[i], markets[j])][r])
+        tri = frozenset((i, j, c))
+        if tri not in found:
+            found.add(tri)
+            i, j = min(i, j), max(i, j)
+            best.append((i, j, c, float(p[i]*p[j]*p[c])))
+        push_triple(t, a, b, r + 1)
+    if stats is not None:
+        stats.update(found=len(best), pops=pops, truncated=len(best) < k and bool(heap))
+    return best
+
+def candidate_entries(props_df: pd.DataFrame, pace_lookup=None, sigma_table: Optional[SigmaTable] = None,
+                      std_top_k: int = 1, cfg: Optional[dict] = None, haircut: Optional[dict] = None,
+                      std_search: Optional[dict] = None) -> List[Dict]:
+    """
+    Bankroll-independent part of build_entries: probabilities, pools and unstaked entries.
+    With an active PROMO in `cfg`, a card short of passing legs is filled from the near-threshold
+    band (promo.promo_haircut_fill) and added as a `promo_haircut` entry; its diagnostics go to `haircut`.
+    `std_search` receives top_standard_triples' stats (found, pops, truncated).
+    """
     out = []; props_df = props_df.copy()
-    props_df["p_est"] = props_df.apply(lambda r: blend_p(r, 100.0), axis=1)
-    legs_std  = props_df[props_df["p_est"]>=0.58]
-    legs_flex = props_df[props_df["p_est"]>=0.577]
-    flex_pool = (legs_flex.sort_values("p_est", ascending=False).drop_duplicates(subset=["player"]))
+    pace = 100.0
+    if pace_lookup and "team" in props_df.columns:
+        pace = props_df["team"].map(pace_lookup).fillna(100.0).to_numpy(float)
+    with span("blend_p"):
+        props_df["p_est"] = blend_p_frame(props_df, pace, sigma_table)
+    with span("pool_sort"):
+        legs_std  = props_df[props_df["p_est"]>=0.58]
+        legs_flex = props_df[props_df["p_est"]>=0.577]
+        flex_pool = (legs_flex.sort_values("p_est", ascending=False).drop_duplicates(subset=["player"]))
+        std_pool = legs_std.sort_values("p_est", ascending=False).drop_duplicates(subset=["player"])
     if len(flex_pool)>=3:
         tri = flex_pool.head(3); p = tri["p_est"].tolist(); ev = ev_3flex(p)
-        stake = min(1.0, bankroll*0.025)
         out.append({"product":"classic_flex","format":"3-leg","legs":tri.to_dict("records"),
-                    "EV_multiple":round(ev,4),"ROI":round(ev-1,4),"stake":stake,
+                    "EV_multiple":round(ev,4),"ROI":round(ev-1,4),
                     "notes":["independent 3-flex"]})
-    std_pool = legs_std.sort_values("p_est", ascending=False).drop_duplicates(subset=["player"])
     if len(std_pool)>=3:
-        found = False; recs = std_pool.head(6).to_dict("records")
-        for i in range(len(recs)):
-            for j in range(i+1, len(recs)):
-                a, b = recs[i], recs[j]
-                pair = (str(a["market"]).lower(), str(b["market"]).lower())
-                pair_rev = (pair[1], pair[0])
-                if pair in WHITELIST_PLUS or pair_rev in WHITELIST_PLUS:
-                    for k in range(len(recs)):
-                        if k in (i,j): continue
-                        c = recs[k]; legs = [a,b,c]
-                        p = [x["p_est"] for x in legs]; ev = ev_standard_k(p,3)
-                        stake = min(1.0, bankroll*0.025)
-                        out.append({"product":"classic_standard","format":"3-leg(staggered)",
-                                    "legs":legs,"EV_multiple":round(ev,4),"ROI":round(ev-1,4),"stake":stake,
-                                    "contingency":{"trigger":"early_leg_miss",
-                                                   "ev_2leg": round(3.0*(p[1]*p[2]) - 1.0,4),
-                                                   "rule":"place if ev_2leg >= +0.05"},
-                                    "notes":["whitelist same-game pair"]})
-                        found = True; break
-                if found: break
+        recs = std_pool.to_dict("records")
+        with span("whitelist_search"):
+            triples = top_standard_triples(std_pool["p_est"].to_numpy(float),
+                                           std_pool["market"].astype(str).str.lower().to_numpy(), std_top_k,
+                                           stats=std_search)
+        for i, j, k, _ in triples:
+            legs = [recs[i], recs[j], recs[k]]
+            p = [x["p_est"] for x in legs]; ev = ev_standard_k(p,3)
+            out.append({"product":"classic_standard","format":"3-leg(staggered)",
+                        "legs":legs,"EV_multiple":round(ev,4),"ROI":round(ev-1,4),
+                        "contingency":{"trigger":"early_leg_miss",
+                                       "ev_2leg": round(3.0*(p[1]*p[2]) - 1.0,4),
+                                       "rule":"place if ev_2leg >= +0.05"},
+                        "notes":["whitelist same-game pair"]})
+    promo = (cfg or {}).get("PROMO", {}) or {}
+    if promo.get("active"):
+        fmt = str(promo.get("format", "FLEX"))
+        with span("promo_haircut"):
+            card, diag = promo_haircut_fill(props_df.assign(p_final=props_df["p_est"]), cfg, fmt)
+        if haircut is not None:
+            haircut.update(diag)
+        if card is not None:
+            out.append({"product":"promo_haircut","format":f"{len(card)}-leg {'flex' if fmt.upper().startswith('FLEX') else 'standard'}",
+                        "legs":card.to_dict("records"),"EV_multiple":round(diag["roi_after"]+1,4),"ROI":diag["roi_after"],
+                        "notes":[f"{diag['added']} near-threshold leg(s) within {diag['margin_p']} of {diag['thr']}"]})
+    return out
+
+def stake_entries(candidates: List[Dict], bankroll: float, std_top_k: Optional[int] = None) -> Dict:
+    """
+    Stake a candidate list for one bankroll. Entries are shallow copies (legs are shared), so one
+    candidate list can be fanned out to many bankrolls; std_top_k trims the best-first standard entries.
+    """
+    out, n_std = [], 0
+    for c in candidates:
+        if c["product"] == "classic_standard":
+            n_std += 1
+            if std_top_k is not None and n_std > std_top_k:
+                continue
+        e = dict(c); e["stake"] = min(1.0, bankroll*0.025)
+        if "meta" in e:
+            e["meta"] = dict(e["meta"])
+        out.append(e)
     totals = {"entries":len(out),"stake_sum": round(sum(e["stake"] for e in out),2)}
     return {"entries": out, "totals": totals}
+
+def build_entries(props_df: pd.DataFrame, bankroll: float, pace_lookup=None, sigma_table: Optional[SigmaTable] = None,
+                  std_top_k: int = 1) -> Dict:
+    return stake_entries(candidate_entries(props_df, pace_lookup, sigma_table, std_top_k), bankroll)
@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import copy
+import numpy as np
 import pandas as pd
 
 def _prod(p: List[float]) -> float:
@@ -8,6 +9,35 @@ def _prod(p: List[float]) -> float:
     for x in p: out *= float(x)
     return out
 
+def hit_distribution(P: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
+    """
+    Batch Poisson-binomial: P is (N, L) leg probabilities, mask marks real legs (padding ignored).
+    Returns (N, L+1) where out[i, k] = P(exactly k hits) for lineup i.
+    """
+    P = np.atleast_2d(np.asarray(P, dtype=float))
+    n, L = P.shape
+    if mask is None:
+        mask = ~np.isnan(P)
+    dist = np.zeros((n, L + 1)); dist[:, 0] = 1.0
+    for j in range(L):
+        p = np.where(mask[:, j], P[:, j], 0.0)[:, None]
+        step = dist * (1.0 - p)
+        step[:, 1:] += dist[:, :-1] * p
+        dist = np.where(mask[:, j:j+1], step, dist)
+    return dist
+
+def payout_matrix(payouts: Dict[str,Any], max_legs: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+    """(STANDARD, FLEX) return multiples indexed [num_legs, hits] from a PAYOUTS.UNDERDOG-shaped dict."""
+    std = np.zeros((max_legs + 1, max_legs + 1)); flex = np.zeros((max_legs + 1, max_legs + 1))
+    for k, v in (payouts.get("STANDARD") or {}).items():
+        n = int(k)
+        if n <= max_legs: std[n, n] = float(v)
+    for k, v in (payouts.get("FLEX") or {}).items():
+        n = int(k)
+        if n <= max_legs and isinstance(v, dict):
+            flex[n, n] = float(v.get("perfect", 0.0)); flex[n, n - 1] = float(v.get("one_miss", 0.0))
+    return std, flex
+
 def effective_payouts(cfg: Dict[str,Any]) -> Dict[str,Any]:
     """
     Return payouts after applying any active promo.
@@ -64,71 +94,83 @@ def _threshold(cfg: Dict[str,Any], fmt: str) -> float:
     G = cfg["FILTERS"]["GLOBAL"]
     return float(G["min_p_final_flex"]) if fmt.upper().startswith("FLEX") else float(G["min_p_final_std"])
 
-def promo_haircut_fill(enriched: pd.DataFrame, cfg: Dict[str,Any], fmt: str = "FLEX3") -> Tuple[pd.DataFrame, Dict[str,Any]]:
+def card_ev(p: np.ndarray, payouts: Dict[str,Any], flex: bool) -> float:
+    """EV multiple of one len(p)-leg card (STANDARD: all hit; FLEX: hit distribution x payout row)."""
+    legs = len(p)
+    std, flx = payout_matrix(payouts, max(8, legs))
+    if not flex:
+        return float(std[legs, legs] * np.prod(p))
+    return float(hit_distribution(p[None, :])[0] @ flx[legs, :legs + 1])
+
+def promo_haircut_fill(enriched: pd.DataFrame, cfg: Dict[str,Any], fmt: str = "FLEX3") -> Tuple[Optional[pd.DataFrame], Dict[str,Any]]:
     """
     If promo is active and we don't have enough passing legs for the target format,
     relax the p_final threshold by a small margin to fill exactly as many legs as needed.
     Only accept if card-level ROI after promo >= min_roi_after_haircut.
 
-    Assumptions:
-    - We target 3 legs (FLEX3 or STD3). For >3 legs we do NOT relax (safety).
-    - We choose the top missing leg(s) from a near-threshold band.
+    - The card size is PROMO.min_legs (2-6 legs, STANDARD or FLEX per `fmt`).
+    - At most HAIRCUT.max_props_relaxed legs may come from the near-threshold band.
+    - The fill is the top `need` near candidates (one per player, none already on the card):
+      card EV only grows with each leg's p (FLEX payouts rise with hits), so no other subset
+      can beat it, and the band costs one sort however many props it holds.
+
+    Returns (card legs, base then fill, or None when nothing was filled; diagnostics).
     """
     promo = (cfg or {}).get("PROMO", {}) or {}
     diag = {"applied": False, "format": fmt}
     if not promo.get("active"):
         diag["reason"] = "promo_inactive"
-        return enriched, diag
+        return None, diag
 
     min_legs = int(promo.get("min_legs", 3))
-    if min_legs != 3:
-        diag["reason"] = "only_3_leg_supported_for_haircut"
-        return enriched, diag
+    if not 2 <= min_legs <= 6:
+        diag["reason"] = "leg_count_out_of_range(2-6)"
+        return None, diag
 
     # Thresholds and margins
+    flex = fmt.upper().startswith("FLEX")
     thr = _threshold(cfg, fmt)
     hc  = (promo.get("HAIRCUT", {}) or {})
-    margin_p = float(hc.get("margin_p_final_flex" if fmt.upper().startswith("FLEX") else "margin_p_final_std", 0.01))
+    margin_p = float(hc.get("margin_p_final_flex" if flex else "margin_p_final_std", 0.01))
     max_relaxed = int(hc.get("max_props_relaxed", 2))
     min_roi_after = float(hc.get("min_roi_after_haircut", 0.01))
 
     # Pools
-    base = enriched[ enriched["p_final"] >= thr ].copy()
+    base = enriched[ enriched["p_final"] >= thr ].sort_values("p_final", ascending=False)
+    if "player" in base.columns:
+        base = base.drop_duplicates(subset=["player"])
     need = max(0, min_legs - len(base))
     if need <= 0:
         diag["reason"] = "enough_legs_already"
-        return enriched, diag
-
-    # near-threshold candidates within band [thr - margin_p, thr)
-    near = enriched[(enriched["p_final"] >= (thr - margin_p)) & (enriched["p_final"] < thr)].copy()
+        return None, diag
+    if need > max_relaxed:
+        diag["reason"] = f"need_exceeds_max_relaxed({need}>{max_relaxed})"
+        return None, diag
+
+    # near-threshold candidates within band [thr - margin_p, thr): best line per player, not already on the card
+    near = enriched[(enriched["p_final"] >= (thr - margin_p)) & (enriched["p_final"] < thr)]
+    near = near.sort_values("p_final", ascending=False)
+    if "player" in near.columns:
+        near = near[~near["player"].isin(base["player"])].drop_duplicates(subset=["player"])
     if near.empty:
         diag["reason"] = "no_near_threshold_candidates"
-        return enriched, diag
+        return None, diag
+    if len(near) < need:
+        diag["reason"] = "insufficient_candidates_in_margin"
+        return None, diag
 
-    # Try top "need" among top-N near candidates
-    near = near.sort_values("p_final", ascending=False).head(max_relaxed)
+    # EV/ROI of base + best fill with promo-adjusted payouts
     add = near.head(need)
-    if len(add) < need:
-        diag["reason"] = "insufficient_candidates_in_margin"
-        return enriched, diag
-
-    # Evaluate EV/ROI with promo-adjusted payouts on the best 3 from (base+add)
-    eff = effective_payouts(cfg)
-    p_top3 = pd.concat([base, add]).sort_values("p_final", ascending=False).head(3)["p_final"].tolist()
-    if len(p_top3) < 3:
-        diag["reason"] = "still_short_after_fill"
-        return enriched, diag
-
-    if fmt.upper().startswith("FLEX"):
-        ev = ev_flex_multiple_3(p_top3, eff["FLEX"])
-    else:
-        ev = ev_standard_multiple_k(p_top3, eff["STANDARD"])
+    card = pd.concat([base, add])
+    ev = card_ev(card["p_final"].to_numpy(float), effective_payouts(cfg), flex)
+    if ev <= 0:
+        diag["reason"] = f"no_payout_for_{min_legs}_legs"
+        return None, diag
     roi = ev - 1.0
     if roi < min_roi_after:
         diag["reason"] = f"roi_after_haircut_below_floor({roi:.3f}<{min_roi_after:.3f})"
-        return enriched, diag
+        return None, diag
 
-    # Accept: append the added legs (dedupe on player+market+team)
-    out = pd.concat([enriched, add]).drop_duplicates(subset=["player","market","team"], keep="first")
-    diag.update({"applied": True, "added": int(len(add)), "thr": thr, "margin_p": margin_p, "roi_after": round(roi,4)})
-    return out, diag
+    diag.update({"applied": True, "added": int(len(add)), "rows": add.index.tolist(), "legs": min_legs,
+                 "thr": thr, "margin_p": margin_p, "roi_after": round(roi,4)})
+    return card, diag
@@ -0,0 +1,199 @@
+"""
+Promo engine: every promo in promo_template.yaml priced against every candidate lineup in one batch.
+
+Lineups are packed into fixed-width arrays (probabilities, sport codes, leg counts, stakes),
+eligibility is an (N lineups x M promos) boolean mask, and promo-adjusted EV comes from a single
+batched hit distribution. Supported promo types:
+- boost:     perfect-hit multiplier * (1 + boost_pct), same semantics as promo.effective_payouts
+- insurance: exactly one miss refunds the stake (on top of any FLEX one_miss payout, up to 1x)
+"""
+from __future__ import annotations
+from typing import Dict, Any, List, Optional
+import numpy as np
+import yaml
+from .config import PROMO_TEMPLATE_PATH
+from .promo import hit_distribution, payout_matrix
+
+PROMO_TYPES = ("boost", "insurance")
+
+def load_promos(path: Optional[str] = None, include_inactive: bool = False) -> List[Dict[str,Any]]:
+    """Load and normalize promos; those with apply_now: false are skipped unless include_inactive."""
+    with open(path or PROMO_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        raw = (yaml.safe_load(f) or {}).get("promos", []) or []
+    return normalize_promos(raw, include_inactive)
+
+def normalize_promos(raw: List[Dict[str,Any]], include_inactive: bool = False) -> List[Dict[str,Any]]:
+    promos = []
+    for p in raw:
+        if p.get("type") not in PROMO_TYPES:
+            continue
+        if not include_inactive and not p.get("apply_now", True):
+            continue
+        promos.append({
+            "name": str(p.get("name") or p["type"]),
+            "type": p["type"],
+            "sports": [str(s).upper() for s in p["sports"]] if p.get("sports") else None,
+            "min_legs": int(p.get("min_legs", 2)),
+            "required_sports": int(p.get("required_sports", 1)),
+            "max_stake": float(p["max_stake"]) if p.get("max_stake") is not None else float("inf"),
+            "boost_pct": float(p.get("boost_pct", 0.0)),
+            "apply_now": bool(p.get("apply_now", True)),
+        })
+    return promos
+
+class LineupBatch:
+    """Fixed-width view of N candidate lineups (legs padded with NaN / -1)."""
+
+    def __init__(self, probs: List[List[float]], sports: List[List[str]], stakes: List[float], flex: List[bool]):
+        n = len(probs); L = max((len(p) for p in probs), default=0)
+        self.P = np.full((n, L), np.nan)
+        self.sport_codes = np.full((n, L), -1, dtype=np.int32)
+        self.sport_names: List[str] = []
+        codes: Dict[str,int] = {}
+        for i, (ps, ss) in enumerate(zip(probs, sports)):
+            self.P[i, :len(ps)] = ps
+            for j, s in enumerate(ss):
+                s = str(s or "").upper()
+                if s not in codes:
+                    codes[s] = len(self.sport_names); self.sport_names.append(s)
+                self.sport_codes[i, j] = codes[s]
+        self.mask = ~np.isnan(self.P)
+        self.num_legs = self.mask.sum(axis=1)
+        self.stake = np.asarray(stakes, dtype=float)
+        self.flex = np.asarray(flex, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.P)
+
+    @classmethod
+    def from_entries(cls, entries: List[Dict[str,Any]]) -> "LineupBatch":
+        """Build from `optimizer.build_entries` entries (legs carry p_est and sport)."""
+        probs, sports, stakes, flex = [], [], [], []
+        for e in entries:
+            legs = e.get("legs") or []
+            probs.append([float(l.get("p_est", l.get("p_final", 0.0))) for l in legs])
+            sports.append([l.get("sport") for l in legs])
+            stakes.append(float(e.get("stake", 0.0)))
+            flex.append("flex" in str(e.get("product", e.get("format", ""))).lower())
+        return cls(probs, sports, stakes, flex)
+
+    def distinct_sports(self) -> np.ndarray:
+        codes = np.sort(self.sport_codes, axis=1)
+        new = np.ones_like(codes, dtype=bool)
+        new[:, 1:] = codes[:, 1:] != codes[:, :-1]
+        return (new & (codes >= 0)).sum(axis=1)
+
+def eligibility(batch: LineupBatch, promos: List[Dict[str,Any]]) -> np.ndarray:
+    """(N, M) mask: sports allowed, min legs, required distinct sports, stake <= max stake."""
+    n, m = len(batch), len(promos)
+    elig = np.ones((n, m), dtype=bool)
+    if not n or not m:
+        return elig
+    distinct = batch.distinct_sports()
+    for j, p in enumerate(promos):
+        ok = (batch.num_legs >= p["min_legs"]) & (distinct >= p["required_sports"]) & (batch.stake <= p["max_stake"])
+        if p["sports"] is not None:
+            allowed = np.array([s in p["sports"] for s in batch.sport_names] + [True])  # last slot = padding (-1)
+            ok &= allowed[batch.sport_codes].all(axis=1)
+        elig[:, j] = ok
+    return elig
+
+def evaluate_promos(batch: LineupBatch, promos: List[Dict[str,Any]], payouts: Dict[str,Any]) -> Dict[str,np.ndarray]:
+    """
+    Batch-price every promo on every lineup.
+    Returns base_ev (N,), promo_ev (N, M) in currency (stake-weighted), gain (N, M) and eligible (N, M).
+    Ineligible cells carry promo_ev == base_ev and gain == 0.
+    """
+    n, m = len(batch), len(promos)
+    max_legs = max(8, int(batch.num_legs.max()) if n else 0)
+    std, flex = payout_matrix(payouts, max_legs)
+    dist = hit_distribution(batch.P, batch.mask)                           # (N, L+1)
+    L = dist.shape[1] - 1
+    table = np.where(batch.flex[:, None], flex[batch.num_legs, :L+1], std[batch.num_legs, :L+1])
+    base_mult = (dist * table).sum(axis=1)
+    base_ev = batch.stake * (base_mult - 1.0)
+
+    rows = np.arange(n)
+    p_perfect = dist[rows, batch.num_legs]
+    p_one_miss = dist[rows, np.maximum(batch.num_legs - 1, 0)]
+    perfect_mult = table[rows, batch.num_legs]
+    one_miss_mult = table[rows, np.maximum(batch.num_legs - 1, 0)]
+
+    elig = eligibility(batch, promos)
+    gain = np.zeros((n, m))
+    for j, p in enumerate(promos):
+        covered = np.minimum(batch.stake, p["max_stake"])
+        if p["type"] == "boost":
+            g = p_perfect * perfect_mult * p["boost_pct"]
+        else:  # insurance
+            g = p_one_miss * np.maximum(0.0, 1.0 - one_miss_mult)
+        gain[:, j] = np.where(elig[:, j], covered * g, 0.0)
+    return {"base_ev": base_ev, "promo_ev": base_ev[:, None] + gain, "gain": gain, "eligible": elig}
+
+def _max_weight_assignment(W: List[List[float]]) -> List[tuple[int,int]]:
+    """Hungarian algorithm (potentials, O(n^2 m)) on an n x m weight matrix with n <= m:
+    the (row, col) pairs, one col per row, with the largest total weight."""
+    n, m = len(W), len(W[0])
+    INF = float("inf")
+    u, v, p, way = [0.0] * (n + 1), [0.0] * (m + 1), [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0], j0 = i, 0
+        minv, used = [INF] * (m + 1), [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], INF, 0
+            row = W[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = -row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta; v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]; p[j0] = p[j1]; j0 = j1
+    return [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+def assign_promos(gain: np.ndarray, eligible: np.ndarray) -> List[tuple[int,int]]:
+    """
+    One promo per lineup, each promo used once, maximizing the total gain (exact).
+    Only the top-M lineups per promo can be in an optimal assignment, so it is solved on at most
+    M*M candidate lineups regardless of N; pairs without a positive gain are left out.
+    """
+    n, m = gain.shape
+    if not n or not m:
+        return []
+    k = min(n, m)
+    G = np.where(eligible, gain, -np.inf)
+    top = np.argpartition(-G, k - 1, axis=0)[:k] if k < n else np.tile(np.arange(n)[:, None], (1, m))
+    rows = sorted({int(i) for j in range(m) for i in top[:, j] if G[i, j] > 0})
+    if not rows:
+        return []
+    W = np.maximum(G[rows].T, 0.0)                                   # promos x candidate lineups
+    if W.shape[1] < m:
+        W = np.hstack([W, np.zeros((m, m - W.shape[1]))])
+    pairs = _max_weight_assignment(W.tolist())
+    return sorted((rows[c], j) for j, c in pairs if c < len(rows) and W[j, c] > 0)
+
+def apply_promos_to_entries(entries: List[Dict[str,Any]], promos: List[Dict[str,Any]], payouts: Dict[str,Any]) -> Dict[str,Any]:
+    """Annotate `build_entries` entries with their assigned promo; returns meta diagnostics."""
+    if not entries or not promos:
+        return {"evaluated": len(promos), "assigned": []}
+    batch = LineupBatch.from_entries(entries)
+    res = evaluate_promos(batch, promos, payouts)
+    assigned = []
+    for i, j in assign_promos(res["gain"], res["eligible"]):
+        p = promos[j]
+        entries[i]["promo"] = {"name": p["name"], "type": p["type"],
+                               "ev_base": round(float(res["base_ev"][i]), 4),
+                               "ev_promo": round(float(res["promo_ev"][i, j]), 4)}
+        assigned.append({"entry": i, "promo": p["name"]})
+    return {"evaluated": len(promos), "eligible_pairs": int(res["eligible"].sum()), "assigned": assigned}
@@ -0,0 +1,115 @@
+"""
+Content-addressed cache for idempotent /optimize responses.
+
+Key = sha256(route, canonical request, active config version). Values are the serialized JSON
+response, held in an in-process LRU bounded by entry count and bytes, with a TTL. An optional
+disk tier (one file per key) survives restarts and is shared by worker processes. Everything is
+dropped when the config cache swaps in a new version.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib, json, os, threading, time
+from .config import CACHE_SIZE, CACHE_TTL_SECONDS, CACHE_MAX_BYTES, CACHE_DIR
+
+def request_key(route: str, payload: Any, config_version: str) -> str:
+    """Canonical hash: dict payloads are dumped with sorted keys, bytes are hashed as-is."""
+    h = hashlib.sha256(route.encode() + b"\0" + config_version.encode() + b"\0")
+    if isinstance(payload, (bytes, bytearray)):
+        h.update(payload)
+    else:
+        h.update(json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode())
+    return h.hexdigest()
+
+class ResponseCache:
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL_SECONDS,
+                 max_bytes: int = CACHE_MAX_BYTES, disk_dir: Optional[str] = CACHE_DIR or None):
+        self.maxsize, self.ttl, self.max_bytes, self.disk_dir = maxsize, ttl, max_bytes, disk_dir
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0; self.disk_hits = 0; self.misses = 0
+        self.evictions = 0; self.expired = 0; self.invalidations = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def get(self, key: str) -> Tuple[Optional[bytes], str]:
+        """(body, 'HIT' | 'HIT-DISK' | 'MISS')."""
+        now = time.time()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                if now - hit[0] <= self.ttl:
+                    self._data.move_to_end(key); self.hits += 1
+                    return hit[1], "HIT"
+                self._drop(key); self.expired += 1
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                if now - os.path.getmtime(path) <= self.ttl:
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                    self._put_memory(key, body, os.path.getmtime(path))
+                    with self._lock:
+                        self.disk_hits += 1
+                    return body, "HIT-DISK"
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self.misses += 1
+        return None, "MISS"
+
+    def put(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        self._put_memory(key, body, time.time())
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+    def _put_memory(self, key: str, body: bytes, stamp: float) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (stamp, body); self._bytes += len(body)
+            while self._data and (len(self._data) > self.maxsize or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._data))); self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, body = self._data.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self, _config=None) -> None:
+        """Drop every entry (memory and disk); registered as a config reload listener."""
+        with self._lock:
+            self._data.clear(); self._bytes = 0; self.invalidations += 1
+        if self.disk_dir:
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if name.endswith(".json"):
+                        try:
+                            os.remove(os.path.join(root, name))
+                        except OSError:
+                            pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {"entries": len(self._data), "bytes": self._bytes, "max_entries": self.maxsize,
+                "max_bytes": self.max_bytes, "ttl_s": self.ttl, "disk_dir": self.disk_dir,
+                "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+                "evictions": self.evictions, "expired": self.expired, "invalidations": self.invalidations}
+
+RESPONSE_CACHE = ResponseCache()
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+STD_TOP_K_MAX = 50  # staggered standard entries one request may ask for
 class PropRow(BaseModel):
     source: str
     platform: str = "underdog"
@@ -26,6 +27,24 @@ class OptimizeRequest(BaseModel):
     props: List[PropRow]
     team_trends_csv_path: Optional[str] = None
     promos_csv_path: Optional[str] = None
+    std_top_k: int = Field(1, ge=1, le=STD_TOP_K_MAX)  # staggered 3-leg standard entries to return
 class OptimizeResponse(BaseModel):
     entries: list
     totals: dict
+    meta: dict = {}
+class BatchVariant(BaseModel):
+    bankroll: float
+    std_top_k: int = Field(1, ge=0, le=STD_TOP_K_MAX)  # 0 = no standard entries for this variant
+    id: Optional[str] = None
+class BatchSlate(BaseModel):
+    props: List[PropRow]
+    variants: List[BatchVariant]
+    id: Optional[str] = None
+class BatchOptimizeRequest(BaseModel):
+    # either one prop set + variants, or several slates (each with its own variants)
+    props: Optional[List[PropRow]] = None
+    variants: List[BatchVariant] = []
+    slates: List[BatchSlate] = []
+class BatchOptimizeResponse(BaseModel):
+    results: List[OptimizeResponse]
+    meta: dict = {}
@@ -0,0 +1,76 @@
+"""
+/optimize work as a plain, picklable function so it can run inline or in a worker process.
+Everything it needs arrives as arguments (props records or a columnar frame + a CompiledConfig snapshot).
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Union
+import pandas as pd
+from .config_cache import CompiledConfig
+from .decision_tree import decide_format
+from .metrics import span
+from .optimizer import candidate_entries, stake_entries
+from .promo_engine import apply_promos_to_entries
+
+def run_optimize(props: Union[List[Dict[str,Any]], pd.DataFrame], bankroll: float, cc: CompiledConfig, std_top_k: int = 1) -> Dict[str,Any]:
+    return run_optimize_batch([{"props": props, "variants": [{"bankroll": bankroll, "std_top_k": std_top_k}]}], cc)[0]
+
+def run_optimize_batch(slates: List[Dict[str,Any]], cc: CompiledConfig, tag: bool = False) -> List[Dict[str,Any]]:
+    """
+    Probabilities, pools and format decisions once per slate; only staking and promo assignment
+    (stake-dependent via max_stake) per variant. Results come back flat, slate-major; with `tag`
+    each result's meta carries its slate/variant ids (positional when not given).
+    """
+    results = []
+    for s_idx, slate in enumerate(slates):
+        with span("dataframe"):
+            props_df = pd.DataFrame(slate["props"])
+        variants = slate["variants"]
+        k_max = max((int(v.get("std_top_k", 1)) for v in variants), default=1)
+        haircut: Dict[str,Any] = {}; std_search: Dict[str,Any] = {}
+        pooled = {"entries": candidate_entries(props_df, sigma_table=cc.sigma_table, std_top_k=k_max,
+                                               cfg=cc.raw, haircut=haircut, std_search=std_search)}
+        with span("format_decision"):
+            annotate_format_decision(pooled, cc)
+        for v_idx, v in enumerate(variants):
+            k = int(v.get("std_top_k", 1))
+            result = stake_entries(pooled["entries"], float(v["bankroll"]), k)
+            meta = result.setdefault('meta', {})
+            if std_search.get("truncated") and k > std_search["found"]:
+                meta['std_search_truncated'] = True   # pop budget ran out before k standard entries
+            meta['config_version'] = cc.version
+            if 'format_decision_error' in pooled.get('meta', {}):
+                meta['format_decision_error'] = pooled['meta']['format_decision_error']
+            if haircut:
+                meta['promo_haircut'] = haircut
+            with span("promos"):
+                annotate_promos(result, cc)
+            if tag:
+                meta['slate'] = slate.get('id') if slate.get('id') is not None else s_idx
+                meta['variant'] = v.get('id') if v.get('id') is not None else v_idx
+            results.append(result)
+    return results
+
+def annotate_promos(result: Dict[str,Any], cc: CompiledConfig) -> None:
+    """Price every template promo against the candidate entries."""
+    try:
+        if isinstance(result, dict):
+            result.setdefault('meta', {})['promos'] = apply_promos_to_entries(result.get('entries', []), cc.promos, cc.base_payouts)
+    except Exception as _err:
+        if isinstance(result, dict):
+            result.setdefault('meta', {})['promo_error'] = str(_err)
+
+_FORMATS = {"STD3": "standard", "FLEX3": "flex"}
+
+def annotate_format_decision(result: Dict[str,Any], cc: CompiledConfig) -> None:
+    """Standard vs flex for every 3-leg entry from its legs' p_est (decision_tree.decide_format);
+    the decision goes under the entry's meta, REJECT leaves `format` as it was."""
+    try:
+        for e in result.get("entries", []):
+            p_list = [float(leg["p_est"]) for leg in e.get("legs") or [] if leg.get("p_est") is not None]
+            if len(p_list) != 3:
+                continue
+            pick = decide_format(p_list, cc.raw, delta=0.02, payouts=cc.payouts)
+            e["format"] = _FORMATS.get(pick["format"], e.get("format", "unknown"))
+            e["meta"] = {**(e.get("meta") or {}), "format_decision": pick, "p_list": p_list}
+    except (KeyError, TypeError, ValueError) as err:   # config without FILTERS.GLOBAL floors / payouts
+        result.setdefault("meta", {})["format_decision_error"] = f"{type(err).__name__}: {err}"
@@ -4,6 +4,7 @@ from champions.models import Lineup, Pick
 from champions.payouts import calculate_lineup_metrics
 
 def allocate_stakes(lineups: List[Lineup], config: dict) -> List[Lineup]:
+    """Stake the best 2-leg and the best 4-6-leg lineup. Returns copies; `lineups` is left untouched."""
     BR = config["BANKROLL"]["BASE"]
     daily_budget = BR * config["RISK"]["DAILY_BUDGET_FRACTION"]
     top_share = config["RISK"]["TOP_PLAY_SHARE"]
@@ -25,11 +26,13 @@ def allocate_stakes(lineups: List[Lineup], config: dict) -> List[Lineup]:
 
     out = []
     if best_two:
+        best_two = best_two.model_copy()
         best_two.stake = max(min_stake, daily_budget * top_share)
         best_two.category = "STANDARD"
         out.append(best_two)
 
     if best_parlay:
+        best_parlay = best_parlay.model_copy()
         # Decide FLEX vs STANDARD by EV using payout tables
         std_table = config["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"]
         flex_table = config["CHAMPIONS"]["PAYOUT_TABLE_FLEX"]
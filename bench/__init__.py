@@ -0,0 +1 @@
+"""Benchmarks for PropEdge hot paths (run as `python -m bench.<module>`)."""
@@ -0,0 +1,44 @@
+"""Row-wise `blend_p` apply vs column-wise `blend_p_frame` on 1k-100k props; asserts the outputs agree
+to TOLERANCE (the vectorized erf vs `math.erf`)."""
+from __future__ import annotations
+import argparse, time
+import numpy as np, pandas as pd
+from app.optimizer import blend_p, blend_p_frame
+
+TOLERANCE = 1e-15
+
+MARKETS = {"NBA": ["points", "reb", "ast", "pa", "pr", "ra", "pra", "3pm"], "NFL": ["receptions", "rush_attempts"],
+           "MLB": ["k", "outs"], "NHL": ["sog", "saves"]}
+
+def make_props(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    sports = rng.choice(list(MARKETS), n)
+    markets = [MARKETS[s][i % len(MARKETS[s])] for i, s in zip(rng.integers(0, 8, n), sports)]
+    line = np.round(rng.uniform(0.5, 40, n)) + 0.5
+    kind = rng.integers(0, 3, n)          # 0: prob_over, 1: proj_mean only, 2: neither
+    return pd.DataFrame({
+        "sport": sports, "player": [f"P{i}" for i in range(n)], "market": markets, "line": line,
+        "side": rng.choice(["over", "under"], n),
+        "proj_mean": np.where(kind <= 1, line * rng.uniform(0.7, 1.3, n), np.nan),
+        "prob_over": np.where(kind == 0, rng.uniform(0.3, 0.8, n), np.nan),
+    })
+
+def run(sizes=(1_000, 10_000, 100_000)) -> list[dict]:
+    rows = []
+    for n in sizes:
+        df = make_props(n)
+        t0 = time.perf_counter(); legacy = df.apply(lambda r: blend_p(r, 100.0), axis=1).to_numpy(float)
+        t1 = time.perf_counter(); vec = blend_p_frame(df, 100.0)
+        t2 = time.perf_counter()
+        err = float(np.abs(legacy - vec).max())
+        assert err <= TOLERANCE, f"blend_p_frame differs from blend_p by {err:g} at n={n}"
+        rows.append({"n": n, "max_abs_err": err, "apply_s": round(t1 - t0, 4), "vectorized_s": round(t2 - t1, 4),
+                     "speedup": round((t1 - t0) / max(t2 - t1, 1e-9), 1)})
+    return rows
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    args = ap.parse_args()
+    for r in run(tuple(int(x) for x in args.sizes.split(","))):
+        print(r)
@@ -0,0 +1,76 @@
+"""
+CLI start-up budget: wall time of `python main.py --help` and of a small CSV run (fresh
+interpreters), minus bare interpreter start-up, plus the heavy modules each path must not import.
+Exits 1 when a budget is exceeded or a forbidden module shows up.
+
+    python -m bench.bench_imports [--budget-help-ms 60] [--budget-csv-ms 250]
+"""
+from __future__ import annotations
+import argparse, json, subprocess, sys, tempfile, time
+from pathlib import Path
+from .slate import write_raw_csv
+from .suite import CONFIG
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("pandas", "numpy", "openpyxl", "fastapi", "starlette", "scipy")
+# what each path may not import at all
+FORBIDDEN = {"help": HEAVY + ("pydantic", "yaml"), "csv": HEAVY}
+
+_PROBE = ("import sys, runpy; sys.argv = {argv!r}\n"
+          "try:\n    runpy.run_path('main.py', run_name='__main__')\n"
+          "except SystemExit:\n    pass\n"
+          "sys.stderr.write('\\n' + ' '.join(m for m in {heavy!r} if m in sys.modules))")
+
+def _wall_ms(cmd, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+def _loaded(argv) -> list:
+    probe = _PROBE.format(argv=argv, heavy=tuple(sorted(set(FORBIDDEN["help"]))))
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True)
+    return out.stderr.strip().splitlines()[-1].split() if out.stderr.strip() else []
+
+def run(repeats: int = 5) -> dict:
+    import yaml
+    with tempfile.TemporaryDirectory(prefix="propedge-startup-") as d:
+        csv = write_raw_csv(Path(d) / "slate.csv", 100)
+        cfg = Path(d) / "config.yaml"; cfg.write_text(yaml.safe_dump(CONFIG))
+        argv = {"help": ["main.py", "--help"],
+                "csv": ["main.py", "--playerprops", str(csv), "--config", str(cfg), "--output", str(Path(d) / "plan.json"),
+                        "--no-stage-cache"]}
+        bare = _wall_ms([sys.executable, "-c", "pass"], repeats)
+        out = {"interpreter_ms": round(bare, 1)}
+        for name, args in argv.items():
+            out[name] = {"ms": round(_wall_ms([sys.executable] + args, repeats) - bare, 1),
+                         "forbidden_loaded": [m for m in _loaded(args) if m in FORBIDDEN[name]]}
+    return out
+
+def check(result: dict, budgets: dict) -> list:
+    problems = []
+    for name, budget in budgets.items():
+        r = result[name]
+        if r["ms"] > budget:
+            problems.append(f"{name}: {r['ms']} ms over the {budget} ms budget")
+        if r["forbidden_loaded"]:
+            problems.append(f"{name}: imported {', '.join(r['forbidden_loaded'])}")
+    return problems
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="CLI start-up budget check")
+    ap.add_argument("--budget-help-ms", type=float, default=60.0, help="over bare interpreter start-up")
+    ap.add_argument("--budget-csv-ms", type=float, default=250.0, help="over bare interpreter start-up, 100-prop CSV")
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args(argv)
+    result = run(args.repeats)
+    print(json.dumps(result, indent=2))
+    problems = check(result, {"help": args.budget_help_ms, "csv": args.budget_csv_ms})
+    for p in problems:
+        print("FAIL", p)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Seeded synthetic slates for benchmarks: the same (n, seed) always yields the same props.
+
+- raw_lines / write_raw_csv:   PlayerProps.ai raw-text lines (`csv_loaders._parse_raw_line` format)
+- structured_frame / write_xlsx: structured sheet columns read by `excel_loaders._parse_structured_row`
+- prop_rows:                   API `PropRow` dicts for /optimize
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List
+import numpy as np, pandas as pd
+
+TEAMS = ["BUF", "KC", "DAL", "PHI", "SF", "GB", "MIA", "NYJ", "BAL", "CIN", "DET", "LAR"]
+POSITIONS = ["QB", "RB", "WR", "TE"]
+STATS = {"Passing Yards": (180, 320), "Rushing Yards": (20, 110), "Receiving Yards": (15, 100),
+         "Receptions": (1.5, 8.5), "Passing TDs": (0.5, 2.5), "Rushing TDs": (0.5, 1.5), "Receiving TDs": (0.5, 1.5)}
+API_MARKETS = {"NBA": ["points", "reb", "ast", "pa", "pr", "ra", "pra", "3pm"], "NFL": ["receptions", "rush_attempts"],
+               "MLB": ["k", "outs"], "NHL": ["sog", "saves"]}
+FIRST = ["Josh", "Jalen", "Patrick", "Tyreek", "Davante", "Travis", "Justin", "Saquon", "Derrick", "Amon", "Jamarr", "CeeDee"]
+LAST = ["Allen", "Hurts", "Mahomes", "Hill", "Adams", "Kelce", "Jefferson", "Barkley", "Henry", "Brown", "Chase", "Lamb"]
+
+def _players(rng: np.random.Generator, n: int) -> List[str]:
+    """Two-word names (the raw-text regex takes exactly two tokens); ~n/3 distinct players."""
+    k = max(1, n // 3)
+    ids = rng.integers(0, k, n)
+    return [f"{FIRST[i % len(FIRST)]} {LAST[(i // len(FIRST)) % len(LAST)]}{i // (len(FIRST)*len(LAST)) or ''}" for i in ids]
+
+def _slate(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    stat_names = list(STATS)
+    stat = rng.choice(stat_names, n)
+    lo = np.array([STATS[s][0] for s in stat]); hi = np.array([STATS[s][1] for s in stat])
+    line = np.floor(rng.uniform(lo, hi)) + 0.5
+    team_idx = rng.integers(0, len(TEAMS), n)
+    opp_idx = (team_idx + rng.integers(1, len(TEAMS), n)) % len(TEAMS)
+    l5 = rng.integers(10, 95, n).astype(float); l5[rng.random(n) < 0.05] = np.nan
+    l10 = rng.integers(10, 95, n).astype(float); l10[rng.random(n) < 0.05] = np.nan
+    szn = rng.integers(20, 85, n).astype(float); szn[rng.random(n) < 0.3] = np.nan
+    return pd.DataFrame({
+        "Player": _players(rng, n), "Team": np.array(TEAMS)[team_idx], "Opp": np.array(TEAMS)[opp_idx],
+        "Pos": rng.choice(POSITIONS, n), "Stat": stat, "Line": line,
+        "Direction": rng.choice(["Over", "Under"], n, p=[0.7, 0.3]),
+        "Odds": rng.choice([-140, -130, -120, -115, -110, 100, 105], n),
+        "Implied": np.round(rng.uniform(45, 62, n), 1),
+        "Projection": np.round(line * rng.uniform(0.75, 1.35, n), 1),
+        "L5": l5, "L10": l10, "SZN": szn,
+    })
+
+def raw_lines(n: int, seed: int = 0) -> List[str]:
+    df = _slate(n, seed)
+    pct = lambda v: "N/A" if np.isnan(v) else f"{int(v)}"
+    return [f"{r.Player} {r.Team} {r.Pos} ( {r.Pos} ) {r.Team} @ {r.Opp} {r.Stat} {r.Line} {r.Direction} {r.Odds} "
+            f"Implied {r.Implied}% Projection {r.Projection} L5: {pct(r.L5)}% L10: {pct(r.L10)}% SZN: {pct(r.SZN)}%"
+            for r in df.itertuples(index=False)]
+
+def write_raw_csv(path: str | Path, n: int, seed: int = 0) -> Path:
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("Player props export\n" + "\n".join(raw_lines(n, seed)) + "\n", encoding="utf-8")
+    return path
+
+def structured_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    df = _slate(n, seed).drop(columns=["Pos"])
+    df[["L5", "L10", "SZN"]] = df[["L5", "L10", "SZN"]] / 100.0   # structured sheets carry 0-1 rates
+    return df
+
+def write_xlsx(path: str | Path, n: int, seed: int = 0) -> Path:
+    """Needs openpyxl (pandas' xlsx engine)."""
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    structured_frame(n, seed).to_excel(path, index=False)
+    return path
+
+def prop_rows(n: int, seed: int = 0) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    sports = rng.choice(list(API_MARKETS), n, p=[0.55, 0.25, 0.1, 0.1])
+    markets = [API_MARKETS[s][i % len(API_MARKETS[s])] for i, s in zip(rng.integers(0, 8, n), sports)]
+    line = np.floor(rng.uniform(1, 35, n)) + 0.5
+    proj = np.round(line * rng.uniform(0.8, 1.3, n), 1)
+    prob = np.where(rng.random(n) < 0.5, np.round(rng.uniform(0.45, 0.75, n), 2), np.nan)
+    players = _players(rng, n)
+    sides = rng.choice(["over", "under"], n)
+    teams = rng.choice(TEAMS, n)
+    return [{"source": "playerpropsai", "platform": "underdog", "sport": str(sports[i]),
+             "game_datetime_utc": "2025-10-29T23:00:00Z", "player": players[i], "team": str(teams[i]), "opponent": "OPP",
+             "market": markets[i], "line": float(line[i]), "side": str(sides[i]), "proj_mean": float(proj[i]),
+             "prob_over": None if np.isnan(prob[i]) else float(prob[i])} for i in range(n)]
@@ -0,0 +1,247 @@
+"""
+Benchmark suite for the pipeline and API hot paths on seeded synthetic slates.
+
+    python -m bench.suite                                    # 100 / 1k / 10k, compare to the baseline
+    python -m bench.suite --sizes 100000 --only load_csv,build_entries
+    python -m bench.suite --save-baseline                    # (re)write the baseline from this run
+
+Each benchmark is timed `--repeats` times (best run kept) after its inputs are prepared.
+A result slower than `threshold` x baseline (and by more than `--min-delta` seconds, to ignore
+timer noise on tiny cases) is a regression and the run exits 1.
+"""
+from __future__ import annotations
+import os
+os.environ.setdefault("PROPEDGE_WORKERS", "0")        # /optimize inline, no process pool
+os.environ.setdefault("PROPEDGE_CACHE_SIZE", "0")     # never benchmark the response cache
+os.environ.setdefault("NBA_API_URL", "http://127.0.0.1:9")
+import argparse, json, platform, sys, tempfile, time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .slate import write_raw_csv, write_xlsx, prop_rows
+
+BASELINE = Path(__file__).parent / "baselines" / "reference.json"
+SIZES = (100, 1_000, 10_000)
+CONFIG = {
+    "SCORING": {"EDGE_WEIGHT": 0.4, "ACCURACY_WEIGHT": 0.2, "RECENT_WEIGHT": 0.25, "DTM_WEIGHT": 0.15,
+                "MIN_ACCURACY_SAMPLE": 10,
+                "TIER_THRESHOLDS": {"S": {"MIN_SCORE": 55, "MIN_P": 0.5, "MIN_EDGE": 0.0},
+                                    "A": {"MIN_SCORE": 45, "MIN_P": 0.45, "MIN_EDGE": 0.0}, "B": {"MIN_SCORE": 0}}},
+    "CHAMPIONS": {"PAYOUT_TABLE_STANDARD": {2: {2: 3.0}, 3: {3: 6.0}, 4: {4: 10.0}, 5: {5: 20.0}, 6: {6: 25.0}}},
+    "CORRELATION": {"SAME_GAME_PENALTY": 0.1},
+    "RISK": {"DAILY_BUDGET_FRACTION": 0.2, "TOP_PLAY_SHARE": 0.8, "PARLAY_PLAY_SHARE": 0.2, "MIN_STAKE": 1.0,
+             "MAX_PROP_APPEARANCES": 3, "MIN_EV_BY_LEG": {2: -1, 3: -1, 4: -1, 5: -1, 6: -1}},
+    "BANKROLL": {"BASE": 100},
+}
+
+# -- shared, cached inputs (built once per size, outside the timed region)
+
+_cache: Dict[tuple, object] = {}
+
+def _once(key: tuple, build: Callable[[], object]):
+    if key not in _cache:
+        _cache[key] = build()
+    return _cache[key]
+
+def _csv(n: int, tmp: Path) -> Path:
+    return _once(("csv", n), lambda: write_raw_csv(tmp / f"slate_{n}.csv", n))
+
+def _props(n: int, tmp: Path):
+    from ingest.csv_loaders import load_playerprops_csv
+    return _once(("props", n), lambda: load_playerprops_csv(_csv(n, tmp)))
+
+def _unified(n: int, tmp: Path):
+    from unify.unify import merge_sources
+    return _once(("unified", n), lambda: merge_sources(_props(n, tmp)))
+
+def _score(unified):
+    from scoring.scoring import score_all_props
+    sc = CONFIG["SCORING"]
+    return score_all_props(unified, weights={k: sc[k] for k in ("EDGE_WEIGHT", "ACCURACY_WEIGHT", "RECENT_WEIGHT", "DTM_WEIGHT")},
+                           tier_thresholds=sc["TIER_THRESHOLDS"], min_accuracy_sample=sc["MIN_ACCURACY_SAMPLE"])
+
+def _scored_sa(n: int, tmp: Path):
+    return _once(("scored", n), lambda: [s for s in _score(_unified(n, tmp)) if s.tier in ("S", "A")])
+
+def _build(scored, legs=(2, 3, 4, 5, 6)):
+    from champions.builder import build_lineups
+    return build_lineups(scored, payout_table=CONFIG["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"],
+                         correlation_penalties=CONFIG["CORRELATION"], min_ev_by_leg=CONFIG["RISK"]["MIN_EV_BY_LEG"],
+                         max_prop_appearances=CONFIG["RISK"]["MAX_PROP_APPEARANCES"], leg_counts=legs)
+
+# -- benchmarks: setup(n, tmp) -> zero-arg callable (None = skip, e.g. optional dependency missing)
+
+def bench_load_csv(n, tmp):
+    from ingest.csv_loaders import load_playerprops_csv
+    path = _csv(n, tmp)
+    return lambda: load_playerprops_csv(path)
+
+def bench_load_xlsx(n, tmp):
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return None
+    from ingest.excel_loaders import load_playerprops_excel
+    path = _once(("xlsx", n), lambda: write_xlsx(tmp / f"slate_NFL_{n}.xlsx", n))
+    return lambda: load_playerprops_excel(path)
+
+def bench_merge_sources(n, tmp):
+    from unify.unify import merge_sources
+    props = _props(n, tmp)
+    return lambda: merge_sources(props)
+
+def bench_score_all_props(n, tmp):
+    unified = _unified(n, tmp)
+    return lambda: _score(unified)
+
+def _bench_build(legs: int):
+    def setup(n, tmp):
+        scored = _scored_sa(n, tmp)
+        return lambda: _build(scored, (legs,))
+    return setup
+
+def bench_calculate_lineup_metrics(n, tmp):
+    from champions.payouts import calculate_lineup_metrics
+    rng = np.random.default_rng(0)
+    probs = [rng.uniform(0.45, 0.75, 2 + i % 5).tolist() for i in range(n)]
+    table = CONFIG["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"]
+    return lambda: [calculate_lineup_metrics(p, table) for p in probs]
+
+def bench_allocate_stakes(n, tmp):
+    from bankroll.bankroll import allocate_stakes
+    base = _once(("lineups", 1000), lambda: _build(_scored_sa(1_000, tmp)))
+    if not base:
+        return None
+    lineups = (base * (n // len(base) + 1))[:n]
+    return lambda: allocate_stakes(lineups, CONFIG)
+
+def bench_board_update(n, tmp):
+    """One line move on a LineupBoard (re-price, re-rank, re-diversify) instead of a rebuild."""
+    from itertools import cycle
+    from champions.store import LineupBoard, prop_key
+    board = LineupBoard.build(_scored_sa(n, tmp), payout_table=CONFIG["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"],
+                              correlation_penalties=CONFIG["CORRELATION"], min_ev_by_leg=CONFIG["RISK"]["MIN_EV_BY_LEG"],
+                              max_prop_appearances=CONFIG["RISK"]["MAX_PROP_APPEARANCES"])
+    moves = [s.model_copy(update={"model_prob": s.model_prob * f}) for s in _scored_sa(n, tmp)
+             if board.affected(prop_key(s)).size for f in (0.97, 1.0)]
+    if not moves:
+        return None
+    nxt = cycle(moves).__next__
+    return lambda: board.update(rescored=[nxt()])
+
+def bench_build_entries(n, tmp):
+    import pandas as pd
+    from app.optimizer import build_entries
+    df = pd.DataFrame(prop_rows(n))
+    return lambda: build_entries(df, 50.0)
+
+def bench_api_optimize(n, tmp):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = _once(("client",), lambda: TestClient(app).__enter__())
+    payload = {"bankroll": 50, "props": prop_rows(n)}
+    def call():
+        r = client.post("/optimize", json=payload)
+        assert r.status_code == 200, r.text[:200]
+    return call
+
+BENCHES: Dict[str, Callable] = {
+    "load_csv": bench_load_csv,
+    "load_xlsx": bench_load_xlsx,
+    "merge_sources": bench_merge_sources,
+    "score_all_props": bench_score_all_props,
+    **{f"build_lineups_{k}leg": _bench_build(k) for k in (2, 3, 4, 5, 6)},
+    "calculate_lineup_metrics": bench_calculate_lineup_metrics,
+    "allocate_stakes": bench_allocate_stakes,
+    "board_update": bench_board_update,
+    "build_entries": bench_build_entries,
+    "api_optimize": bench_api_optimize,
+}
+
+def run(sizes=SIZES, only: Optional[List[str]] = None, repeats: int = 3, log=print) -> Dict:
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="propedge-bench-") as d:
+        tmp = Path(d)
+        for name, setup in BENCHES.items():
+            if only and name not in only:
+                continue
+            for n in sizes:
+                fn = setup(n, tmp)
+                if fn is None:
+                    log(f"{name:28s} n={n:<7d} skipped"); continue
+                best = float("inf")
+                for _ in range(repeats if n < 100_000 else 1):
+                    t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+                results.setdefault(name, {})[str(n)] = round(best, 6)
+                log(f"{name:28s} n={n:<7d} {best*1000:10.2f} ms")
+        _cache.clear()
+    return {"meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                     "machine": platform.machine(), "platform": platform.platform(terse=True),
+                     "sizes": list(sizes), "repeats": repeats}, "results": results}
+
+def compare(current: Dict, baseline: Dict, threshold: float = 1.5, min_delta: float = 0.005) -> List[Dict]:
+    """Rows for every benchmark/size in `current`; `regressed` when slower than threshold x baseline,
+    `missing` (and never regressed) when the baseline has no entry for it."""
+    rows = []
+    for name, by_size in current["results"].items():
+        for n, t in by_size.items():
+            b = baseline.get("results", {}).get(name, {}).get(n)
+            if b is None:
+                rows.append({"bench": name, "n": int(n), "baseline_s": None, "current_s": t, "ratio": None,
+                             "regressed": False, "missing": True})
+                continue
+            ratio = t / b if b > 0 else float("inf")
+            rows.append({"bench": name, "n": int(n), "baseline_s": b, "current_s": t, "ratio": round(ratio, 3),
+                         "regressed": ratio > threshold and t - b > min_delta, "missing": False})
+    return rows
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="PropEdge benchmark suite")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    ap.add_argument("--only", default=None, help=f"comma list of: {', '.join(BENCHES)}")
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--threshold", type=float, default=1.5, help="fail when current > threshold x baseline")
+    ap.add_argument("--min-delta", type=float, default=0.005, help="ignore regressions smaller than this many seconds")
+    ap.add_argument("--save-baseline", action="store_true", help="write this run as the baseline (merged by bench/size)")
+    ap.add_argument("--out", default=None, help="also write results JSON here (default bench_results/<timestamp>.json)")
+    args = ap.parse_args(argv)
+
+    only = args.only.split(",") if args.only else None
+    unknown = set(only or []) - set(BENCHES)
+    if unknown:
+        ap.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    current = run(tuple(int(x) for x in args.sizes.split(",")), only, args.repeats)
+
+    out = Path(args.out or Path("bench_results") / f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True); out.write_text(json.dumps(current, indent=2))
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        merged = json.loads(baseline_path.read_text()) if baseline_path.exists() else {"results": {}}
+        for name, by_size in current["results"].items():
+            merged["results"].setdefault(name, {}).update(by_size)
+        merged["meta"] = current["meta"]
+        baseline_path.parent.mkdir(parents=True, exist_ok=True); baseline_path.write_text(json.dumps(merged, indent=2) + "\n")
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline first")
+        return 0
+    rows = compare(current, json.loads(baseline_path.read_text()), args.threshold, args.min_delta)
+    bad = [r for r in rows if r["regressed"]]
+    missing = [r for r in rows if r["missing"]]
+    for r in rows:
+        if r["missing"]:
+            print(f"{r['bench']:28s} n={r['n']:<7d} {'-':>10s} -> {r['current_s']*1000:10.2f} ms  NO BASELINE")
+            continue
+        flag = "REGRESSED" if r["regressed"] else ""
+        print(f"{r['bench']:28s} n={r['n']:<7d} {r['baseline_s']*1000:10.2f} -> {r['current_s']*1000:10.2f} ms  x{r['ratio']:<6} {flag}")
+    print(f"{len(bad)} regression(s) over x{args.threshold} in {len(rows) - len(missing)} comparisons")
+    if missing:
+        print(f"{len(missing)} benchmark size(s) have no baseline and were not checked; "
+              f"add them with --save-baseline --only {','.join(sorted({r['bench'] for r in missing}))}")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
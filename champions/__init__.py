@@ -3,9 +3,24 @@ from .builder import build_lineups, diversify_lineups
 from .payouts import calculate_expected_value, calculate_lineup_metrics
 from .correlation import calculate_correlation_index
 from .validate import validate_lineup
+from .constraints import Constraints
+
+def __getattr__(name):
+    # the lineup board needs numpy; CSV runs that only build lineups never import it
+    if name in ("LineupBoard", "prop_key"):
+        from . import store
+        return getattr(store, name)
+    if name == "LateSwap":
+        from .late_swap import LateSwap
+        return LateSwap
+    if name in ("LineupArchive", "write_archive"):
+        from . import archive
+        return getattr(archive, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "Lineup", "Pick", "build_lineups", "diversify_lineups",
     "calculate_expected_value", "calculate_lineup_metrics",
-    "calculate_correlation_index", "validate_lineup"
+    "calculate_correlation_index", "validate_lineup", "Constraints", "LineupBoard", "prop_key", "LateSwap",
+    "LineupArchive", "write_archive"
 ]
@@ -0,0 +1,179 @@
+"""
+Compact lineup archive: one file holding a shared prop table and fixed-width arrays, memory-mapped
+on open so readers page in only the rows they slice.
+
+    write_archive("slate.lineups", lineups, meta={"source": "props.csv"})
+    arc = LineupArchive("slate.lineups")          # header parse + mmap; no per-lineup work
+    top = arc.top(100)                            # row ids by EV (win prob, correlation break ties)
+    arc.records(top)                              # plan.json-style dicts, no pydantic
+    arc.lineups(top[:2])                          # Lineup models, picks shared per prop
+    wp, mult, ev = arc.reprice(arc.prop_win_prob * 0.98, payout_table)
+
+Layout: 16-byte preamble (MAGIC, version u32, header length u64), a JSON header (prop table as
+columns, array dtypes/shapes/offsets, meta), then each array 64-byte aligned. A lineup costs
+about 60 bytes plus 4 per leg slot; prop strings are stored once per prop, not once per pick.
+"""
+from __future__ import annotations
+import json, os, struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .models import Lineup, Pick
+from .store import lineup_metrics
+
+MAGIC = b"PELA"
+VERSION = 1
+SUFFIX = ".lineups"
+ALIGN = 64
+TIERS = ("S", "A", "B")
+CATEGORIES = ("STANDARD", "FLEX")
+PICK_FIELDS = ("player_name", "stat_type", "line", "direction", "sport", "game_date", "team",
+               "win_prob", "raw_win_prob", "score", "tier", "start_time", "ingested_at", "raw_offset")
+_DATES = ("start_time", "ingested_at")
+_PRE = struct.Struct("<4sIQ")
+
+class ArchiveError(ValueError):
+    pass
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+def write_archive(path: str | Path, lineups: Sequence[Lineup], meta: Optional[dict] = None) -> Path:
+    """Write `lineups` (in the given order) to `path` atomically."""
+    path = Path(path)
+    n = len(lineups)
+    width = max((L.num_legs for L in lineups), default=2)
+    index: Dict[tuple, int] = {}
+    legs = np.full((n, width), -1, dtype=np.int32)
+    for i, L in enumerate(lineups):
+        for j, p in enumerate(L.picks):
+            legs[i, j] = index.setdefault(tuple(getattr(p, f) for f in PICK_FIELDS), len(index))
+    rows = list(index)
+    props = {f: [r[k] for r in rows] for k, f in enumerate(PICK_FIELDS)}
+    for f in _DATES:
+        props[f] = [d.isoformat() if d is not None else None for d in props[f]]
+    cats = list(CATEGORIES) + sorted({L.category for L in lineups} - set(CATEGORIES))
+    arrays = {
+        "legs": legs,
+        "num_legs": np.array([L.num_legs for L in lineups], dtype=np.uint8),
+        "tier": np.array([TIERS.index(L.tier) for L in lineups], dtype=np.uint8),
+        "category": np.array([cats.index(L.category) for L in lineups], dtype=np.uint8),
+        "expected_value": np.array([L.expected_value for L in lineups], dtype=np.float64),
+        "expected_win_prob": np.array([L.expected_win_prob for L in lineups], dtype=np.float64),
+        "expected_base_multiplier": np.array([L.expected_base_multiplier for L in lineups], dtype=np.float64),
+        "correlation_index": np.array([L.correlation_index for L in lineups], dtype=np.float64),
+        "avg_score": np.array([L.avg_score for L in lineups], dtype=np.float64),
+        "min_score": np.array([L.min_score for L in lineups], dtype=np.float64),
+        "stake": np.array([L.stake for L in lineups], dtype=np.float64),
+    }
+    offset, layout = 0, {}
+    for name, a in arrays.items():
+        layout[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes + _pad(a.nbytes)
+    header = json.dumps({"n": n, "width": width, "categories": cats, "props": props, "arrays": layout,
+                         "meta": meta or {}, "created": datetime.now().isoformat()}).encode()
+    header += b" " * _pad(_PRE.size + len(header))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as fh:
+        fh.write(_PRE.pack(MAGIC, VERSION, len(header)))
+        fh.write(header)
+        for a in arrays.values():
+            fh.write(np.ascontiguousarray(a).tobytes())
+            fh.write(b"\0" * _pad(a.nbytes))
+    os.replace(tmp, path)
+    return path
+
+class LineupArchive:
+    """Read-only view of an archive; the arrays are slices of one read-only memory map."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with self.path.open("rb") as fh:
+            pre = fh.read(_PRE.size)
+            if len(pre) < _PRE.size:
+                raise ArchiveError(f"{self.path}: not a lineup archive")
+            magic, version, hlen = _PRE.unpack(pre)
+            if magic != MAGIC or version != VERSION:
+                raise ArchiveError(f"{self.path}: not a lineup archive (v{VERSION})")
+            header = json.loads(fh.read(hlen))
+        self.meta: dict = header["meta"]
+        self.created: str = header["created"]
+        self.categories: List[str] = header["categories"]
+        self.props: Dict[str, list] = header["props"]
+        self._n, self.width = header["n"], header["width"]
+        base = _PRE.size + hlen
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode="r") if self._n else None
+        for name, spec in header["arrays"].items():
+            dt, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            nbytes = int(np.prod(shape)) * dt.itemsize
+            a = (self._mm[base + spec["offset"]:base + spec["offset"] + nbytes].view(dt).reshape(shape)
+                 if self._mm is not None else np.zeros(shape, dtype=dt))
+            setattr(self, name, a)
+        self.prop_win_prob = np.asarray(self.props["win_prob"], dtype=float)
+        self._picks: Dict[int, Pick] = {}
+
+    def __len__(self) -> int:
+        return self._n
+
+    def top(self, k: Optional[int] = None, by: str = "expected_value", num_legs: Optional[int] = None) -> np.ndarray:
+        """Row ids, best first by `by` (ties: higher win prob, then lower correlation, then row order)."""
+        rows = np.arange(self._n) if num_legs is None else np.flatnonzero(self.num_legs == num_legs)
+        order = np.lexsort((rows, self.correlation_index[rows], -self.expected_win_prob[rows], -getattr(self, by)[rows]))
+        return rows[order[:k] if k is not None else order]
+
+    def _pick(self, q: int) -> Pick:
+        p = self._picks.get(q)
+        if p is None:
+            fields = {f: self.props[f][q] for f in PICK_FIELDS if f in self.props}
+            for f in _DATES:
+                fields[f] = datetime.fromisoformat(fields[f]) if fields[f] else None
+            p = self._picks[q] = Pick(**fields)
+        return p
+
+    def lineup(self, i: int) -> Lineup:
+        k = int(self.num_legs[i])
+        return Lineup(picks=[self._pick(q) for q in self.legs[i, :k].tolist()], num_legs=k,
+                      tier=TIERS[self.tier[i]], category=self.categories[self.category[i]],
+                      expected_win_prob=float(self.expected_win_prob[i]), expected_value=float(self.expected_value[i]),
+                      expected_base_multiplier=float(self.expected_base_multiplier[i]),
+                      correlation_index=float(self.correlation_index[i]), avg_score=float(self.avg_score[i]),
+                      min_score=float(self.min_score[i]), stake=float(self.stake[i]))
+
+    def lineups(self, rows: Optional[Iterable[int]] = None) -> List[Lineup]:
+        return [self.lineup(int(i)) for i in (range(self._n) if rows is None else rows)]
+
+    def records(self, rows: Optional[Iterable[int]] = None) -> List[dict]:
+        """plan.json lineup records (see pipeline.stages.plan_dict) straight from the arrays."""
+        P = self.props
+        src = P.get("raw_offset")
+        out = []
+        for i in (range(self._n) if rows is None else rows):
+            i = int(i); k = int(self.num_legs[i])
+            out.append({"mode": self.categories[self.category[i]], "tier": TIERS[self.tier[i]], "num_legs": k,
+                        "stake": round(float(self.stake[i]), 2), "win_prob": round(float(self.expected_win_prob[i]), 4),
+                        "ev": round(float(self.expected_value[i]), 4),
+                        "picks": [{"player": P["player_name"][q], "stat": P["stat_type"][q], "line": P["line"][q],
+                                   "dir": P["direction"][q], "sport": P["sport"][q], "tier": P["tier"][q],
+                                   "win_prob": round(P["win_prob"][q], 4),
+                                   **({"raw_prob": round(P["raw_win_prob"][q], 4)}
+                                      if P.get("raw_win_prob") and P["raw_win_prob"][q] is not None else {}),
+                                   **({"date": P["game_date"][q][:10]} if P["game_date"][q] else {}),
+                                   **({"raw_offset": src[q]} if src and src[q] is not None else {})}
+                                  for q in self.legs[i, :k].tolist()]})
+        return out
+
+    def reprice(self, prop_win_prob: np.ndarray, payout_table: dict,
+                rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(win_prob, base_mult, ev) for `rows` (default all) with new per-prop probabilities, priced as
+        the builder does (the stored correlation index sets each lineup's haircut)."""
+        rows = np.arange(self._n) if rows is None else np.asarray(rows)
+        wp, mult, ev = (np.zeros(len(rows)) for _ in range(3))
+        haircut = np.minimum(0.30, self.correlation_index[rows])
+        nlegs = self.num_legs[rows]
+        for k in np.unique(nlegs):
+            sel = np.flatnonzero(nlegs == k)
+            probs = np.clip(prop_win_prob[self.legs[rows[sel], :k]] * (1 - haircut[sel, None]), 0.01, 0.99)
+            wp[sel], mult[sel], ev[sel] = lineup_metrics(probs, payout_table)
+        return wp, mult, ev
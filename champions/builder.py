@@ -1,10 +1,38 @@
 """Build and optimize Champions lineups."""
-from itertools import combinations
+from datetime import datetime
+from functools import lru_cache
 from scoring.models import ScoredProp
 from .models import Lineup, Pick
 from .payouts import calculate_lineup_metrics
 from .correlation import calculate_correlation_index
-from .validate import validate_lineup
+from .constraints import Constraints
+
+@lru_cache(maxsize=4096)
+def parse_start_time(game_date: str | None) -> datetime | None:
+    """`ScoredProp.game_date` (the export's game time, ISO) as a datetime; None without a time of day."""
+    if not game_date or len(game_date) <= 10:
+        return None
+    try:
+        return datetime.fromisoformat(game_date)
+    except ValueError:
+        return None
+
+def to_pick(p: ScoredProp) -> Pick:
+    return Pick(
+        player_name=p.player_name,
+        stat_type=p.stat_type,
+        line=p.line,
+        direction=p.direction,
+        sport=p.sport,
+        team=getattr(p, 'team', None),
+        win_prob=p.model_prob,
+        raw_win_prob=p.raw_model_prob,
+        score=p.total_score,
+        tier=p.tier,
+        game_date=p.game_date,
+        start_time=parse_start_time(p.game_date),
+        raw_offset=p.raw_offset
+    )
 
 def rank_key(lineup):
     return (lineup.expected_value, lineup.expected_win_prob, -lineup.correlation_index)
@@ -16,50 +44,49 @@ def build_lineups(
     min_ev_by_leg: dict,
     max_prop_appearances: int = 3,
     max_lineups: int = 1000,
-    timeout_seconds: int = 60
+    timeout_seconds: int = 60,
+    stats: dict | None = None,
+    leg_counts: tuple[int, ...] = (2, 3, 4, 5, 6),
+    diversify: bool = True,
+    constraints: dict | Constraints | None = None
 ) -> list[Lineup]:
+    """`stats`, when given, is filled with search counters (combos built, combos cut per rule, timeout).
+    `diversify=False` returns every accepted lineup, ranked (what `champions.store.LineupBoard` indexes).
+    `constraints` is the CONSTRAINTS spec (see `champions.constraints`); the defaults match `validate_lineup`.
+    Rules and the usage cap are checked per leg while enumerating; `max_lineups` still counts every
+    combination in order, cut ones included, so tighter rules never widen the search."""
     import time
     start_time = time.time()
+    rules = Constraints.of(constraints)
+    examined = rej_ev = 0
+    pruned: dict = {}
+    timed_out = capped = False
 
-    # Filter to S and A tier only (drop B by design)
+    # Filter to S and A tier only (drop B by design), and banned players
     s_tier = sorted([p for p in scored_props if p.tier == "S"], key=lambda x: x.total_score, reverse=True)
     a_tier = sorted([p for p in scored_props if p.tier == "A"], key=lambda x: x.total_score, reverse=True)
     candidates = s_tier + a_tier
+    if rules.banned:
+        candidates = [p for p in candidates if rules.allowed(p)]
+    cand_picks: list = [None] * len(candidates)   # one Pick per candidate, made on first use
+    compiled = rules.compile(candidates)
 
     lineups = []
     prop_usage = {}
+    retired = set()   # props at the usage cap (player, stat, direction: any line), skipped from then on
+    if max_prop_appearances <= 0:
+        leg_counts = ()
 
-    for num_legs in [2, 3, 4, 5, 6]:
+    for num_legs in leg_counts:
         if len(candidates) < num_legs:
             continue
-        pool = candidates[:80] if num_legs <= 2 else candidates[:60] if num_legs in [3,4] else candidates
-        for i, combo in enumerate(combinations(pool, num_legs)):
+        n = min(len(candidates), 80 if num_legs <= 2 else 60 if num_legs in [3,4] else len(candidates))
+        for i, idxs in compiled.combos(num_legs, n, retired, limit=max_lineups, pruned=pruned):
             if i >= max_lineups or time.time() - start_time > timeout_seconds:
+                capped |= i >= max_lineups; timed_out |= i < max_lineups
                 break
-            # prop usage limit
-            skip = False
-            for p in combo:
-                key = (p.player_name, p.stat_type, p.direction)
-                if prop_usage.get(key, 0) >= max_prop_appearances:
-                    skip = True; break
-            if skip:
-                continue
-            picks = [Pick(
-                player_name=p.player_name,
-                stat_type=p.stat_type,
-                line=p.line,
-                direction=p.direction,
-                sport=p.sport,
-                team=getattr(p, 'team', None),
-                win_prob=p.model_prob,
-                score=p.total_score,
-                tier=p.tier,
-                game_date=p.game_date
-            ) for p in combo]
-
-            ok, _ = validate_lineup(picks)
-            if not ok:
-                continue
+            examined += 1
+            combo = [candidates[j] for j in idxs]
 
             # simple correlation haircut
             win_probs = [p.model_prob for p in combo]
@@ -69,6 +96,7 @@ def build_lineups(
 
             expected_win_prob, base_mult, ev = calculate_lineup_metrics(win_probs, payout_table)
             if ev < min_ev_by_leg.get(num_legs, 0.0):
+                rej_ev += 1
                 continue
 
             # Determine lineup tier
@@ -82,8 +110,11 @@ def build_lineups(
             else:
                 tier = "B"
 
+            for j in idxs:
+                if cand_picks[j] is None:
+                    cand_picks[j] = to_pick(candidates[j])
             lineup = Lineup(
-                picks=picks,
+                picks=[cand_picks[j] for j in idxs],
                 num_legs=num_legs,
                 expected_win_prob=expected_win_prob,
                 expected_base_multiplier=base_mult,
@@ -97,17 +128,29 @@ def build_lineups(
             )
             lineups.append(lineup)
 
-            for p in combo:
-                key = (p.player_name, p.stat_type, p.direction)
+            for j in idxs:
+                key = compiled.prop[j]
                 prop_usage[key] = prop_usage.get(key, 0) + 1
+                if prop_usage[key] >= max_prop_appearances:
+                    retired.add(key)
 
     # Sort by EV/Win prob/Low corr
     lineups.sort(key=rank_key, reverse=True)
-    # De-duplicate similar lineups (basic overlap filter)
+    diversified = diversify_lineups(lineups) if diversify else lineups
+    if stats is not None:
+        stats.update({"candidates": len(candidates), "combos_examined": examined,
+                      "combos_pruned": sum(pruned.values()), "pruned_by_rule": dict(sorted(pruned.items())),
+                      "rejected_ev_floor": rej_ev, "accepted": len(lineups),
+                      "dropped_overlap": len(lineups) - len(diversified), "max_lineups_hit": capped,
+                      "timeout_hit": timed_out, "elapsed_s": round(time.time() - start_time, 4)})
+    return diversified
+
+def diversify_lineups(lineups: list[Lineup], max_overlap: int = 3) -> list[Lineup]:
+    """De-duplicate similar lineups (basic overlap filter); input must already be ranked."""
     diversified = []
     for L in lineups:
         picks_set = {(p.player_name, p.stat_type, p.direction) for p in L.picks}
-        if any(len(picks_set & {(q.player_name, q.stat_type, q.direction) for q in E.picks}) > 3 for E in diversified):
+        if any(len(picks_set & {(q.player_name, q.stat_type, q.direction) for q in E.picks}) > max_overlap for E in diversified):
             continue
         diversified.append(L)
     return diversified
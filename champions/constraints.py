@@ -0,0 +1,238 @@
+"""
+Lineup constraints: the config's CONSTRAINTS section, compiled against the candidate pool into
+integer ids and count vectors so `build_lineups` checks each leg as it is added and cuts a partial
+lineup at the depth where no completion can satisfy the rules.
+
+    CONSTRAINTS:
+      MIN_TEAMS: 2           # distinct known teams (legs without a team don't count against it)
+      MIN_GAMES: 1           # distinct games; a game is (sport, game_date), as in correlation.py
+      MIN_SPORTS: {5: 3}     # any numeric rule may be given per leg count, like RISK.MIN_EV_BY_LEG
+      MAX_PER_GAME: 0        # legs from one game; 0 = no limit
+      MAX_SAME_STAT: 0       # legs with one stat_type; 0 = no limit
+      REQUIRED_PLAYERS: []   # every lineup includes all of them
+      BANNED_PLAYERS: []
+
+One leg per player always holds (hence no OVER + UNDER on a prop), as in `validate_lineup`; the
+defaults reproduce `validate_lineup`'s rules.
+"""
+from __future__ import annotations
+from math import comb
+from typing import Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULTS = {"MIN_TEAMS": 2, "MIN_GAMES": 1, "MIN_SPORTS": 1, "MAX_PER_GAME": 0, "MAX_SAME_STAT": 0,
+            "REQUIRED_PLAYERS": [], "BANNED_PLAYERS": []}
+NUMERIC = ("MIN_TEAMS", "MIN_GAMES", "MIN_SPORTS", "MAX_PER_GAME", "MAX_SAME_STAT")
+
+def game_key(p) -> tuple:
+    return (p.sport, p.game_date)
+
+def _team(p):
+    """p.team, or None. ScoredProp has no team field, and a missed pydantic attribute raises (slowly)."""
+    fields = getattr(type(p), "model_fields", None)
+    return getattr(p, "team", None) if fields is None or "team" in fields else None
+
+class Constraints:
+    def __init__(self, spec: Optional[dict] = None):
+        spec = dict(spec or {})
+        unknown = set(spec) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown CONSTRAINTS keys: {sorted(unknown)}")
+        self.spec = {**DEFAULTS, **{k: v for k, v in spec.items() if v is not None}}
+        self.required = tuple(dict.fromkeys(self.spec["REQUIRED_PLAYERS"] or ()))
+        self.banned = frozenset(self.spec["BANNED_PLAYERS"] or ())
+
+    @classmethod
+    def of(cls, spec) -> "Constraints":
+        return spec if isinstance(spec, cls) else cls(spec)
+
+    def limits(self, num_legs: int) -> Tuple[int, ...]:
+        """(min teams, min games, min sports, max per game, max same stat) for `num_legs`-leg lineups."""
+        out = []
+        for key in NUMERIC:
+            v = self.spec[key]
+            if isinstance(v, dict):
+                v = {int(k): n for k, n in v.items()}.get(num_legs, DEFAULTS[key])
+            out.append(int(v or 0))
+        return tuple(out)
+
+    def allowed(self, p) -> bool:
+        return p.player_name not in self.banned
+
+    def check(self, picks: Sequence) -> Tuple[bool, str]:
+        """Whole-lineup check (Picks or ScoredProps), for lineups assembled outside the builder."""
+        k = len(picks)
+        min_teams, min_games, min_sports, max_game, max_stat = self.limits(k)
+        players = [p.player_name for p in picks]
+        if len(set(players)) != k:
+            return False, "player"
+        if self.banned.intersection(players):
+            return False, "banned"
+        if not set(self.required) <= set(players):
+            return False, "required"
+        teams = [t for p in picks if (t := _team(p)) is not None]
+        if teams and len(set(teams)) < min_teams:
+            return False, "teams"
+        games = [game_key(p) for p in picks]
+        if len(set(games)) < min_games:
+            return False, "games"
+        if len({p.sport for p in picks}) < min_sports:
+            return False, "sports"
+        if max_game and max(games.count(g) for g in games) > max_game:
+            return False, "per_game"
+        stats = [p.stat_type for p in picks]
+        if max_stat and max(stats.count(s) for s in stats) > max_stat:
+            return False, "same_stat"
+        return True, "Valid"
+
+    def compile(self, candidates: Sequence) -> "CompiledPool":
+        return CompiledPool(self, candidates)
+
+class CompiledPool:
+    """Candidates as id vectors (player, team, game, sport, stat, and prop = the usage-cap key). Ids are
+    assigned as `combos` first reaches an index, so a budgeted walk never pays for a long pool's tail."""
+
+    def __init__(self, constraints: Constraints, candidates: Sequence):
+        self.constraints, self.candidates = constraints, candidates
+        self.player, self.team, self.game, self.sport, self.stat, self.prop = ([] for _ in range(6))
+        self._index: List[Dict] = [{} for _ in range(6)]
+
+    def grow(self, m: int) -> None:
+        """Assign ids through candidate m - 1."""
+        ip, it, ig, isp, ist, ipr = self._index
+        for p in self.candidates[len(self.player):m]:
+            name, team = p.player_name, _team(p)
+            self.player.append(ip.setdefault(name, len(ip)))
+            self.team.append(-1 if team is None else it.setdefault(team, len(it)))
+            self.game.append(ig.setdefault(game_key(p), len(ig)))
+            self.sport.append(isp.setdefault(p.sport, len(isp)))
+            self.stat.append(ist.setdefault(p.stat_type, len(ist)))
+            self.prop.append(ipr.setdefault((name, p.stat_type, p.direction), len(ipr)))
+
+    def combos(self, k: int, n: int, retired: Collection[int] = (), limit: Optional[int] = None,
+               pruned: Optional[Dict[str, int]] = None) -> Iterator[Tuple[int, Optional[Tuple[int, ...]]]]:
+        """(combo index, pool indices) for the k-subsets of the first `n` candidates that satisfy the
+        rules, in `itertools.combinations` order. The index counts every combination, cut or not, so it
+        can be held against a combo budget; a walk that `limit` cuts short yields (limit, None) last.
+        A cut subtree adds its leaf count to `pruned[rule]`. No combination uses a prop id in `retired`;
+        it is re-read after every yield, so the caller can retire props (a usage cap) mid-walk."""
+        pruned = {} if pruned is None else pruned
+        if k > n:
+            return
+        total = comb(n, k)
+        cap = total if limit is None else min(limit, total)          # counts stop at the budget
+        player, team, game, sport, stat, prop = self.player, self.team, self.game, self.sport, self.stat, self.prop
+        min_teams, min_games, min_sports, max_game, max_stat = self.constraints.limits(k)
+        required: List[Tuple[int, int]] = []                           # (player id, last pool index)
+        if self.constraints.required:
+            self.grow(n)
+            last = {pid: i for i, pid in enumerate(player[:n])}
+            ids = self._index[0]
+            required = [(ids.get(name, -1), last.get(ids.get(name, -1), -1)) for name in self.constraints.required]
+            if any(j < 0 for _, j in required):
+                pruned["required"] = pruned.get("required", 0) + cap
+                if cap < total:
+                    yield cap, None
+                return
+        size = len(self.candidates)
+        n_player, n_team, n_game, n_sport, n_stat = ([0] * size for _ in range(5))
+        distinct = [0, 0, 0]            # teams, games, sports
+        known = 0                       # legs with a team
+        chosen = [0] * k
+        nxt = [0] * (k + 1)
+        passed = 0
+
+        def add(i: int) -> None:
+            nonlocal known
+            n_player[player[i]] += 1
+            t = team[i]
+            if t >= 0:
+                known += 1
+                n_team[t] += 1
+                distinct[0] += n_team[t] == 1
+            n_game[game[i]] += 1
+            distinct[1] += n_game[game[i]] == 1
+            n_sport[sport[i]] += 1
+            distinct[2] += n_sport[sport[i]] == 1
+            n_stat[stat[i]] += 1
+
+        def remove(i: int) -> None:
+            nonlocal known
+            n_player[player[i]] -= 1
+            t = team[i]
+            if t >= 0:
+                known -= 1
+                n_team[t] -= 1
+                distinct[0] -= n_team[t] == 0
+            n_game[game[i]] -= 1
+            distinct[1] -= n_game[game[i]] == 0
+            n_sport[sport[i]] -= 1
+            distinct[2] -= n_sport[sport[i]] == 0
+            n_stat[stat[i]] -= 1
+
+        def blocked(i: int, rest: int) -> Optional[str]:
+            """Why candidate i cannot join the current prefix with `rest` legs still to pick (it is added
+            when this returns None)."""
+            if prop[i] in retired:
+                return "usage"
+            if n_player[player[i]]:
+                return "player"
+            if max_game and n_game[game[i]] >= max_game:
+                return "per_game"
+            if max_stat and n_stat[stat[i]] >= max_stat:
+                return "same_stat"
+            add(i)
+            why = None
+            if known and distinct[0] + rest < min_teams:
+                why = "teams"
+            elif distinct[1] + rest < min_games:
+                why = "games"
+            elif distinct[2] + rest < min_sports:
+                why = "sports"
+            elif required:
+                missing = [j for r, j in required if not n_player[r]]
+                if len(missing) > rest or any(j <= i for j in missing):
+                    why = "required"
+            if why is not None:
+                remove(i)
+            return why
+
+        d = 0
+        while d >= 0:
+            i = nxt[d]
+            if i > n - (k - d):                     # this depth is exhausted
+                d -= 1
+                if d >= 0:
+                    remove(chosen[d])
+                continue
+            nxt[d] = i + 1
+            if i >= len(player):
+                self.grow(min(n, 2 * i + 64))
+            rest = k - d - 1
+            why = blocked(i, rest)
+            if why is not None:
+                leaves = min(comb(n - 1 - i, rest), cap - passed)
+                passed += leaves
+                pruned[why] = pruned.get(why, 0) + leaves
+            elif rest:
+                chosen[d] = i
+                nxt[d + 1] = i + 1
+                d += 1
+                continue
+            else:
+                chosen[d] = i
+                yield passed, tuple(chosen)
+                passed += 1
+                remove(i)
+                # a yield may have retired a prefix leg: skip what is left of its subtree
+                j = next((j for j in range(k - 1) if prop[chosen[j]] in retired), None)
+                if j is not None:
+                    leaves = min(sum(comb(n - nxt[dd], k - dd) for dd in range(j + 1, k)), cap - passed)
+                    passed += leaves
+                    pruned["usage"] = pruned.get("usage", 0) + leaves
+                    for dd in range(k - 2, j - 1, -1):
+                        remove(chosen[dd])
+                    d = j
+            if passed >= cap:
+                if cap < total:
+                    yield cap, None
+                return
@@ -0,0 +1,148 @@
+"""
+Late swap: re-optimize a slate as its games lock.
+
+A prop locks at its game's start (`Pick.start_time`, from the export's GameTimeCDT). Each
+`reoptimize(placed, now)`:
+
+- scratches the props that locked since the previous call from a `LineupBoard` built once from the
+  scored slate, so the board only holds lineups over open games and a call costs only the new locks;
+- keeps placed lineups whose legs have all locked as they are ("frozen");
+- keeps the locked legs of partly locked lineups and searches only open props for the rest ("swapped");
+- refills lineups with no locked leg from the board's allocation ("open").
+
+Props without a start time never lock. `now` must be on the same clock as the start times (the
+export's naive CDT times); `now_cdt()` is that clock and the default.
+
+    swap = LateSwap(scored, config)
+    plan = swap.reoptimize(None, now)        # nothing placed yet: the board's allocation
+    plan = swap.reoptimize(plan, later)      # as games lock
+    swap.last                                # counts, per-lineup status and timing of the last call
+"""
+from __future__ import annotations
+import bisect, time
+from datetime import datetime
+import pytz
+from itertools import chain, combinations, islice
+from typing import Dict, List, Optional, Sequence
+from scoring.models import ScoredProp
+from .builder import parse_start_time, to_pick
+from .constraints import Constraints
+from .correlation import calculate_correlation_index
+from .models import Lineup, Pick
+from .payouts import calculate_lineup_metrics
+from .store import LineupBoard, PropKey, prop_key
+
+LOCK_TZ = pytz.timezone("America/Chicago")
+
+def now_cdt() -> datetime:
+    """Wall-clock time in Chicago as a naive datetime, comparable with the export's GameTimeCDT."""
+    return datetime.now(LOCK_TZ).replace(tzinfo=None)
+
+def start_time(p) -> Optional[datetime]:
+    """Lock time of a Pick or ScoredProp; None when unknown."""
+    t = getattr(p, "start_time", None)
+    return t if t is not None else parse_start_time(getattr(p, "game_date", None))
+
+def is_locked(p, now: datetime) -> bool:
+    t = start_time(p)
+    return t is not None and t <= now
+
+def _role(L: Lineup) -> str:
+    return "two" if L.num_legs == 2 else "parlay"
+
+class LateSwap:
+    def __init__(self, scored_props: List[ScoredProp], config: dict, max_overlap: int = 3,
+                 max_swap_combos: int = 1000):
+        """`scored_props` as scored (S/A are used); the board is built from them once."""
+        self.config, self.max_swap_combos = config, max_swap_combos
+        risk = config["RISK"]
+        self.rules = Constraints(config.get("CONSTRAINTS"))
+        self.board = LineupBoard.build(scored_props, config["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"],
+                                       config["CORRELATION"], risk["MIN_EV_BY_LEG"], max_overlap,
+                                       max_prop_appearances=risk["MAX_PROP_APPEARANCES"], constraints=self.rules)
+        # open candidates in the builder's order (S then A, best score first), as Picks
+        cands = sorted((p for p in scored_props if p.tier in ("S", "A")), key=lambda p: (p.tier != "S", -p.total_score))
+        self._open: List[Pick] = [to_pick(p) for p in cands]
+        timeline = sorted(((t, prop_key(p)) for p in self._open if (t := p.start_time) is not None),
+                          key=lambda x: x[0])
+        self._times = [t for t, _ in timeline]
+        self._keys = [k for _, k in timeline]
+        self._cursor = 0
+        self.locked: set = set()
+        self.last: Dict = {}
+
+    @property
+    def next_lock(self) -> Optional[datetime]:
+        """Start of the next game still open on the board; None once everything has locked."""
+        return self._times[self._cursor] if self._cursor < len(self._times) else None
+
+    def advance(self, now: datetime) -> List[PropKey]:
+        """Lock the props whose game started by `now` and scratch them from the board; returns them."""
+        end = bisect.bisect_right(self._times, now)
+        newly = list(dict.fromkeys(self._keys[self._cursor:end]))
+        self._cursor = max(self._cursor, end)
+        if newly:
+            self.locked.update(newly)
+            self.board.update(scratched=newly)
+            self._open = [p for p in self._open if prop_key(p) not in self.locked]
+        return newly
+
+    def _price(self, L: Lineup, picks: List[Pick]) -> tuple:
+        """(win_prob, base_mult, ev, corr) the way L was priced: the 2-leg play as the builder does
+        (correlation haircut), the 4-6 leg play as `allocate_stakes` does (raw probs, L's payout table)."""
+        corr = calculate_correlation_index(picks, self.config["CORRELATION"])
+        if _role(L) == "two":
+            haircut = min(0.30, corr)
+            probs = [max(0.01, min(0.99, p.win_prob * (1 - haircut))) for p in picks]
+            return (*calculate_lineup_metrics(probs, self.config["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"]), corr)
+        table = self.config["CHAMPIONS"]["PAYOUT_TABLE_FLEX" if L.category == "FLEX" else "PAYOUT_TABLE_STANDARD"]
+        return (*calculate_lineup_metrics([p.win_prob for p in picks], table), corr)
+
+    def _swap(self, L: Lineup, kept: List[Pick]) -> Lineup:
+        """Best lineup of L's size keeping the `kept` legs, the rest from open props (L's own open legs included)."""
+        players = {p.player_name for p in kept}
+        pool = [p for p in self._open if p.player_name not in players]
+        own = [p for p in L.picks if p not in kept]
+        best = None
+        for combo in chain([own], islice(combinations(pool, len(own)), self.max_swap_combos)):
+            picks = kept + list(combo)
+            if not self.rules.check(picks)[0]:
+                continue
+            wp, mult, ev, corr = self._price(L, picks)
+            if best is None or (ev, wp, -corr) > best[0]:
+                best = ((ev, wp, -corr), picks, corr, mult)
+        if best is None:
+            return L
+        (ev, wp, _), picks, corr, mult = best
+        scores = [p.score for p in picks]
+        tier = "S" if all(p.tier == "S" for p in picks) else "A" if all(p.tier in ("S", "A") for p in picks) else "B"
+        return L.model_copy(update={"picks": picks, "expected_win_prob": wp, "expected_base_multiplier": mult,
+                                    "expected_value": ev, "correlation_index": corr, "tier": tier,
+                                    "avg_score": sum(scores) / len(scores), "min_score": min(scores)})
+
+    def reoptimize(self, placed: Optional[Sequence[Lineup]], now: Optional[datetime] = None) -> List[Lineup]:
+        """Plan for `now` given the lineups already entered (None/empty: plan from scratch).
+        Frozen and swapped lineups keep their stake and category."""
+        t0 = time.perf_counter()
+        now = now or now_cdt()
+        newly = self.advance(now)
+        fresh: Optional[Dict[str, Lineup]] = None
+        out: List[Lineup] = []
+        status: List[str] = []
+        for L in placed or ():
+            locked = [p for p in L.picks if is_locked(p, now)]
+            if len(locked) == len(L.picks):
+                out.append(L); status.append("frozen")
+            elif locked:
+                out.append(self._swap(L, locked)); status.append("swapped")
+            else:
+                if fresh is None:
+                    fresh = {_role(x): x for x in self.board.allocate(self.config)}
+                out.append(fresh.get(_role(L), L)); status.append("open")
+        if not placed:
+            out = self.board.allocate(self.config)
+            status = ["open"] * len(out)
+        self.last = {"now": now.isoformat(), "newly_locked": len(newly), "locked": len(self.locked),
+                     "open_props": len(self._open), "open_lineups": len(self.board), "status": status,
+                     "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3)}
+        return out
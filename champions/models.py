@@ -14,10 +14,12 @@ class Pick(BaseModel):
     game_date: str | None = None
     team: str | None = None
     win_prob: float = Field(ge=0, le=1)
+    raw_win_prob: Optional[float] = None  # uncalibrated model probability (what calibration fits on)
     score: float
     tier: Literal["S", "A", "B"]
     start_time: Optional[datetime] = None
     ingested_at: Optional[datetime] = None
+    raw_offset: Optional[int] = None  # source record in the ingest audit log
 
 class Lineup(BaseModel):
     """Complete Champions lineup."""
@@ -0,0 +1,330 @@
+"""
+Lineup board: every lineup the builder accepted, plus an inverted index from each prop to the
+lineups that contain it, so a line move or a scratch re-prices only the affected lineups.
+
+    board = LineupBoard.build(scored, payout_table=..., correlation_penalties=..., min_ev_by_leg=...)
+    board.update(rescored=[prop])                                    # new line / probability
+    board.update(scratched=[("Josh Allen", "Passing Yards", "OVER")])
+    plan = board.allocate(config)
+
+Legs are priced per `leg_key` (player, stat, line, direction); overlap and scratches use `prop_key`
+(player, stat, direction), the key the builder uses for its usage cap and diversification.
+No lineups are added after the build: a re-priced lineup that falls under its leg count's EV floor
+is hidden (and returns if it recovers), and scratched lineups are dropped.
+
+Diversification (`diversify_lineups`: skip a lineup sharing more than `max_overlap` prop keys with
+one already kept) is a greedy pass in rank order. Two lineups share more than m keys exactly when
+they share an (m+1)-subset of keys, so the board indexes those subsets and, after an update, only
+re-decides the changed lineups and whatever their flips reach, in rank order.
+"""
+from __future__ import annotations
+import bisect, heapq, time
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scoring.models import ScoredProp
+from .models import Lineup
+from .builder import build_lineups
+
+PropKey = Tuple[str, str, str]
+LegKey = Tuple[str, str, float, str]
+
+def prop_key(p) -> PropKey:
+    return (p.player_name, p.stat_type, p.direction)
+
+def leg_key(p) -> LegKey:
+    return (p.player_name, p.stat_type, p.line, p.direction)
+
+def _csr(keys: np.ndarray, owners: np.ndarray, n_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverted index: key -> owner ids, as (indptr, indices)."""
+    order = np.argsort(keys, kind="stable")
+    ptr = np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=n_keys)))).astype(np.int64)
+    return ptr, owners[order]
+
+def lineup_metrics(probs: np.ndarray, payout_table: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """`calculate_lineup_metrics` for m lineups of k legs at once: (m, k) leg probabilities ->
+    (win_prob, base_mult, ev) arrays, with the same operation order as the scalar version."""
+    m, k = probs.shape
+    dp = np.zeros((m, k + 1)); dp[:, 0] = 1.0
+    for i in range(1, k + 1):
+        p = probs[:, i - 1:i]
+        nxt = np.zeros_like(dp)
+        nxt[:, 1:i + 1] += dp[:, 0:i] * p
+        nxt[:, 0:i] += dp[:, 0:i] * (1 - p)
+        dp = nxt
+    table = payout_table.get(k, {})
+    payout = np.zeros(m)
+    if 2 <= k <= 6:
+        for w in range(k + 1):
+            payout += dp[:, w] * table.get(w, 0.0)
+    win_prob = np.zeros(m)
+    for w, mult in table.items():
+        if mult > 0:
+            win_prob += dp[:, w]
+    return win_prob, payout, (payout - 1.0) if 2 <= k <= 6 else np.zeros(m)
+
+class LineupBoard:
+    def __init__(self, lineups: List[Lineup], payout_table: dict, min_ev_by_leg: Optional[dict] = None,
+                 max_overlap: int = 3):
+        """`lineups` as accepted by the builder (ranked, not yet diversified)."""
+        self.payout_table, self.max_overlap = payout_table, max_overlap
+        self._lineups = list(lineups)
+        n = len(self._lineups)
+        width = max((L.num_legs for L in self._lineups), default=2)
+        self._pid: Dict[LegKey, int] = {}       # priced leg -> prop id
+        self._gid: Dict[PropKey, int] = {}      # prop key (any line) -> group id, for overlap and scratches
+        self._legs = np.full((n, width), -1, dtype=np.int32)
+        probs: List[float] = []; group: List[int] = []; tier_s: List[bool] = []
+        for i, L in enumerate(self._lineups):
+            for j, p in enumerate(L.picks):
+                pid = self._pid.setdefault(leg_key(p), len(self._pid))
+                if pid == len(probs):
+                    probs.append(p.win_prob); tier_s.append(p.tier == "S")
+                    group.append(self._gid.setdefault(prop_key(p), len(self._gid)))
+                self._legs[i, j] = pid
+        self._prob = np.array(probs, dtype=float)
+        self._prop_s = np.array(tier_s, dtype=bool)
+        self._group = np.array(group, dtype=np.int32)
+        self._nlegs = np.array([L.num_legs for L in self._lineups], dtype=np.int32)
+        self._tier_s = np.array([L.tier == "S" for L in self._lineups], dtype=bool)
+        self._ev = np.array([L.expected_value for L in self._lineups], dtype=float)
+        self._wp = np.array([L.expected_win_prob for L in self._lineups], dtype=float)
+        self._mult = np.array([L.expected_base_multiplier for L in self._lineups], dtype=float)
+        self._corr = np.array([L.correlation_index for L in self._lineups], dtype=float)
+        self._haircut = np.minimum(0.30, self._corr)
+        floors = min_ev_by_leg or {}
+        self._floor = np.array([floors.get(int(k), 0.0) if floors else -np.inf for k in self._nlegs], dtype=float)
+        self._alive = np.ones(n, dtype=bool)
+
+        used = self._legs >= 0
+        self._inv_ptr, self._inv_idx = _csr(self._legs[used], np.nonzero(used)[0].astype(np.int32), len(self._pid))
+        self._index_overlap()
+
+        self._fields: Dict[int, dict] = {}     # prop id -> Pick fields changed since the build
+        self._dirty: set = set()               # lineups whose Lineup object is stale
+        self._rank_all()
+        self._select_all()
+
+    def _index_overlap(self) -> None:
+        """lineup -> its (max_overlap+1)-subsets of prop keys, and subset -> lineups holding it."""
+        m1, n = self.max_overlap + 1, len(self._lineups)
+        owners, subsets = [], []
+        for k in np.unique(self._nlegs[self._nlegs >= m1]):
+            ids = np.flatnonzero(self._nlegs == k)
+            g = np.sort(self._group[self._legs[ids, :k]], axis=1)
+            combos = np.array(list(combinations(range(k), m1)))
+            subsets.append(g[:, combos].reshape(-1, m1))
+            owners.append(np.repeat(ids, len(combos)))
+        self._subs: List[List[int]] = [[] for _ in range(n)]
+        self._post: List[List[int]] = []
+        if not subsets:
+            return
+        owners_a = np.concatenate(owners).astype(np.int32)
+        uniq, sid = np.unique(np.concatenate(subsets), axis=0, return_inverse=True)
+        sid = sid.ravel()
+        for i, s in zip(owners_a.tolist(), sid.tolist()):
+            self._subs[i].append(s)
+        ptr, idx = _csr(sid, owners_a, len(uniq))
+        idx = idx.tolist()
+        self._post = [idx[ptr[s]:ptr[s + 1]] for s in range(len(uniq))]
+
+    @classmethod
+    def build(cls, scored_props: List[ScoredProp], payout_table: dict, correlation_penalties: dict,
+              min_ev_by_leg: dict, max_overlap: int = 3, **kwargs) -> "LineupBoard":
+        """`build_lineups` into a board; extra kwargs go to the builder."""
+        accepted = build_lineups(scored_props, payout_table, correlation_penalties, min_ev_by_leg,
+                                 diversify=False, **kwargs)
+        return cls(accepted, payout_table, min_ev_by_leg, max_overlap)
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    # ----- ranking and diversification -----
+    def _rank_all(self) -> None:
+        """Visible lineups in `rank_key` order (ties keep build order, as the builder's stable sort)."""
+        n = len(self._lineups)
+        self._visible = self._alive & (self._ev >= self._floor)
+        order = np.lexsort((np.arange(n), self._corr, -self._wp, -self._ev))
+        self._order = order[self._visible[order]]
+        self._rank = np.full(n, n, dtype=np.int64)
+        self._rank[self._order] = np.arange(len(self._order))
+
+    def _rank_key(self, i: int) -> tuple:
+        return (-self._ev[i], -self._wp[i], self._corr[i], i)
+
+    def _rerank(self, changed: np.ndarray) -> None:
+        """Move only the `changed` lineups: take them out of the order and bisect them back in."""
+        if len(changed) * 16 > len(self._order):
+            return self._rank_all()
+        n = len(self._lineups)
+        self._visible = self._alive & (self._ev >= self._floor)
+        out = np.zeros(n, dtype=bool); out[changed] = True
+        kept = self._order[~out[self._order]]
+        ins = sorted(changed[self._visible[changed]].tolist(), key=self._rank_key)
+        pos = [bisect.bisect_left(kept, self._rank_key(i), key=self._rank_key) for i in ins]
+        self._order = np.insert(kept, pos, ins)
+        self._rank[:] = n
+        self._rank[self._order] = np.arange(len(self._order))
+
+    def _select_all(self) -> None:
+        owner = [-1] * len(self._post)          # each subset has at most one selected holder
+        sel = bytearray(len(self._lineups))
+        for i in self._order.tolist():
+            subs = self._subs[i]
+            if any(owner[s] >= 0 for s in subs):
+                continue
+            sel[i] = 1
+            for s in subs:
+                owner[s] = i
+        self._owner, self._sel = owner, sel
+        self._selected = np.frombuffer(sel, dtype=bool)
+
+    def _release(self, i: int) -> List[int]:
+        """Deselect i; returns the unselected holders of the subsets it owned, which may now be free."""
+        owner, sel = self._owner, self._sel
+        sel[i] = 0
+        freed = []
+        for s in self._subs[i]:
+            if owner[s] == i:
+                owner[s] = -1
+                freed.extend(j for j in self._post[s] if not sel[j])
+        return freed
+
+    def _reselect(self, changed: np.ndarray) -> int:
+        """Repeat the greedy pass only where `changed` lineups can flip a decision, in rank order;
+        returns the number of lineups re-decided."""
+        rank, sel, owner, visible = self._rank, self._sel, self._owner, self._visible
+        seeds = set()
+        for x in changed.tolist():
+            if not visible[x]:
+                if sel[x]:
+                    seeds.update(self._release(x))
+                continue
+            seeds.add(x)
+            for s in self._subs[x]:
+                if owner[s] == x:   # lineups x blocked may now rank ahead of it
+                    seeds.update(j for j in self._post[s] if not sel[j])
+        heap = [(int(rank[i]), i) for i in seeds if visible[i]]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            r, i = heapq.heappop(heap)
+            if i in done:
+                continue
+            done.add(i)
+            subs = self._subs[i]
+            keep = not any(owner[s] not in (-1, i) and rank[owner[s]] < r for s in subs)
+            if keep == bool(sel[i]):
+                continue
+            if keep:
+                sel[i] = 1
+                for s in subs:
+                    if owner[s] != -1:      # a later-ranked owner loses the subset
+                        heapq.heappush(heap, (int(rank[owner[s]]), owner[s]))
+                    owner[s] = i
+            else:
+                for j in self._release(i):
+                    if rank[j] > r:
+                        heapq.heappush(heap, (int(rank[j]), j))
+        return len(done)
+
+    # ----- updates -----
+    def affected(self, key: PropKey) -> np.ndarray:
+        """Ids of the lineups holding `key` at any line (scratched ones included)."""
+        gid = self._gid.get(key)
+        return np.empty(0, dtype=np.int32) if gid is None else self._lineups_of(np.flatnonzero(self._group == gid))
+
+    def _lineups_of(self, pids: Iterable[int]) -> np.ndarray:
+        parts = [self._inv_idx[self._inv_ptr[q]:self._inv_ptr[q + 1]] for q in pids]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32)
+
+    def _reprice(self, ids: np.ndarray) -> None:
+        for k in np.unique(self._nlegs[ids]):
+            grp = ids[self._nlegs[ids] == k]
+            legs = self._legs[grp, :k]
+            probs = np.clip(self._prob[legs] * (1 - self._haircut[grp, None]), 0.01, 0.99)
+            self._wp[grp], self._mult[grp], self._ev[grp] = lineup_metrics(probs, self.payout_table)
+            self._tier_s[grp] = self._prop_s[legs].all(axis=1)
+
+    def _match(self, p: ScoredProp) -> Optional[int]:
+        pid = self._pid.get(leg_key(p))
+        if pid is not None:
+            return pid
+        gid = self._gid.get(prop_key(p))
+        if gid is None:
+            return None
+        pids = np.flatnonzero(self._group == gid)
+        if len(pids) != 1:
+            return None                      # several lines on the board: ambiguous move
+        pid = int(pids[0])
+        old = next(k for k, v in self._pid.items() if v == pid)
+        self._pid[leg_key(p)] = self._pid.pop(old)
+        return pid
+
+    def update(self, rescored: Iterable[ScoredProp] = (), scratched: Iterable[PropKey | str] = ()) -> dict:
+        """Apply re-scored props and scratches, re-price the lineups containing them and refresh
+        ranking and selection.
+
+        A re-scored prop replaces the leg with the same (player, stat, line, direction); failing that,
+        the only line on the board for its `prop_key` (a line move). Falling to tier B counts as a
+        scratch. `scratched` takes prop keys, or a player name to scratch all of that player's props."""
+        t0 = time.perf_counter()
+        dead = set()
+        for k in scratched:
+            groups = ([g for (player, *_), g in self._gid.items() if player == k] if isinstance(k, str)
+                      else [self._gid[k]] if k in self._gid else [])
+            dead.update(np.flatnonzero(np.isin(self._group, groups)).tolist())
+        changed, unmatched = [], 0
+        for p in rescored:
+            pid = self._match(p)
+            if pid is None:
+                unmatched += 1; continue   # lineups are never added after the build
+            if p.tier not in ("S", "A"):
+                dead.add(pid); continue
+            self._prob[pid] = p.model_prob
+            self._prop_s[pid] = p.tier == "S"
+            self._fields[pid] = {"line": p.line, "win_prob": p.model_prob, "raw_win_prob": p.raw_model_prob,
+                                 "score": p.total_score, "tier": p.tier}
+            changed.append(pid)
+        dropped = self._lineups_of(dead)
+        dropped = dropped[self._alive[dropped]]
+        self._alive[dropped] = False
+        repriced = self._lineups_of(changed)
+        repriced = repriced[self._alive[repriced]]
+        if repriced.size:
+            self._reprice(repriced)
+            self._dirty.update(repriced.tolist())
+        touched = np.union1d(repriced, dropped).astype(np.int64)
+        self._rerank(touched)
+        redecided = self._reselect(touched)
+        return {"repriced": int(repriced.size), "dropped": int(dropped.size), "unmatched": unmatched,
+                "redecided": redecided, "selected": int(self._selected.sum()),
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+    # ----- output -----
+    def _materialize(self, i: int) -> Lineup:
+        if i in self._dirty:
+            L = self._lineups[i]
+            picks = [p.model_copy(update=self._fields[q]) if q in self._fields else p
+                     for p, q in zip(L.picks, self._legs[i, :L.num_legs].tolist())]
+            scores = [p.score for p in picks]
+            self._lineups[i] = L.model_copy(update={
+                "picks": picks, "expected_win_prob": float(self._wp[i]), "expected_value": float(self._ev[i]),
+                "expected_base_multiplier": float(self._mult[i]), "avg_score": sum(scores) / len(scores),
+                "min_score": min(scores), "tier": "S" if self._tier_s[i] else "A"})
+            self._dirty.discard(i)
+        return self._lineups[i]
+
+    def lineups(self) -> List[Lineup]:
+        """The diversified, ranked lineups, as `build_lineups` would return them."""
+        return [self._materialize(i) for i in self._order[self._selected[self._order]].tolist()]
+
+    def allocate(self, config: dict) -> List[Lineup]:
+        """`allocate_stakes` over the board. Its picks (best S 2-leg, else best 2-leg; best 4-6 leg) are
+        the first such lineups in rank order, so only those are materialized and passed on."""
+        from bankroll.bankroll import allocate_stakes
+        ranked = self._order[self._selected[self._order]]
+        k = self._nlegs[ranked]
+        two = ranked[k == 2]
+        picks = [c[0] for c in (two[self._tier_s[two]], two, ranked[(k >= 4) & (k <= 6)]) if len(c)]
+        return allocate_stakes([self._materialize(int(i)) for i in dict.fromkeys(picks)], config)
@@ -1,8 +1,14 @@
 from .schema import CanonicalProp, normalize_stat_name, CANONICAL_STATS
 from .csv_loaders import load_playerprops_csv
-from .excel_loaders import load_playerprops_excel
 from .ingest_any import ingest_playerprops
 
+def __getattr__(name):
+    # the Excel loader needs pandas (+ openpyxl); CSV runs never import it
+    if name == "load_playerprops_excel":
+        from .excel_loaders import load_playerprops_excel
+        return load_playerprops_excel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     "CanonicalProp",
     "normalize_stat_name",
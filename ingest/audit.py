@@ -0,0 +1,238 @@
+"""
+Ingest audit trail: each source record (a raw-text line, or a structured row as JSON) is appended
+once to a sidecar log and the prop keeps only `raw_offset`, instead of carrying the text around.
+
+The log is a sequence of zlib blocks: a 12-byte header (MAGIC, record count u32, payload length
+u32), then the compressed payload (n+1 little-endian u32 record ends, then the UTF-8 records).
+`raw_offset` is (block position << 16) | index in block, so a lookup maps the file, decompresses
+one block and slices.
+
+    with AuditWriter("audit/ingest.audit") as audit:
+        props = ingest_playerprops("props.csv", audit=audit)
+    AuditReader("audit/ingest.audit").get(props[0].raw_offset)      # the original line
+
+    python -m ingest.audit audit/ingest.audit 123456 ...            # print records
+
+`<log>.index` remembers where each source (by content digest) was written, so re-ingesting the
+same export replays its offsets (`find_source`) instead of appending it again. Rotate the log by
+moving it and its index aside together; truncating it in place orphans raw_offsets held elsewhere.
+"""
+from __future__ import annotations
+import mmap, struct, sys, zlib
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory lock; keep one writer per log
+    fcntl = None
+
+MAGIC = b"PEAB"
+BLOCK_BYTES = 64 * 1024
+MAX_RECORDS = 1 << 16
+_HEAD = struct.Struct("<4sII")
+
+def _u32(values) -> array:
+    a = array("I", values)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
+
+class AuditWriter:
+    """Appends records to `path`; holds an exclusive lock on it until closed. zlib level 1 keeps
+    compression cheap; source text still shrinks ~3.5x."""
+
+    def __init__(self, path: str | Path, block_bytes: int = BLOCK_BYTES, level: int = 1):
+        self.path, self.block_bytes, self.level = Path(path), block_bytes, level
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("ab")
+        if fcntl is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        self._pos = self.start = self._fh.seek(0, 2)
+        self._pending: List[bytes] = []
+        self._size = 0
+        self.records = 0
+
+    def add(self, text: str) -> int:
+        """Queue one record; returns its raw_offset."""
+        if self._size >= self.block_bytes or len(self._pending) >= MAX_RECORDS:
+            self.flush()
+        data = text.encode("utf-8", "replace")
+        self._pending.append(data)
+        self._size += len(data)
+        self.records += 1
+        return (self._pos << 16) | (len(self._pending) - 1)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        ends, n = [0], 0
+        for data in self._pending:
+            n += len(data)
+            ends.append(n)
+        payload = zlib.compress(_u32(ends).tobytes() + b"".join(self._pending), self.level)
+        self._fh.write(_HEAD.pack(MAGIC, len(self._pending), len(payload)) + payload)
+        self._pos += _HEAD.size + len(payload)
+        self._pending, self._size = [], 0
+
+    def close(self) -> None:
+        if self._fh.closed:
+            return
+        self.flush()
+        self._fh.flush()
+        if fcntl is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+        self._fh.close()
+
+    def __enter__(self) -> "AuditWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class AuditReader:
+    """Random access to a log by raw_offset; the file is re-mapped when it has grown."""
+
+    def __init__(self, path: str | Path, cache_blocks: int = 8):
+        self.path, self.cache_blocks = Path(path), cache_blocks
+        self._mm: Optional[mmap.mmap] = None
+        self._blocks: "OrderedDict[int, Tuple[array, bytes]]" = OrderedDict()
+
+    def _map(self, end: int) -> mmap.mmap:
+        if self._mm is None or len(self._mm) < end:
+            size = self.path.stat().st_size
+            if size < end:
+                raise KeyError(end)
+            if self._mm is not None:
+                self._mm.close()
+            with self.path.open("rb") as fh:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _block(self, pos: int) -> Tuple[array, bytes]:
+        hit = self._blocks.get(pos)
+        if hit is not None:
+            self._blocks.move_to_end(pos)
+            return hit
+        mm = self._map(pos + _HEAD.size)
+        magic, n, length = _HEAD.unpack_from(mm, pos)
+        if magic != MAGIC:
+            raise KeyError(pos)
+        mm = self._map(pos + _HEAD.size + length)
+        payload = zlib.decompress(mm[pos + _HEAD.size:pos + _HEAD.size + length])
+        ends = _u32(())
+        ends.frombytes(payload[:4 * (n + 1)])
+        if sys.byteorder == "big":
+            ends.byteswap()
+        block = self._blocks[pos] = (ends, payload[4 * (n + 1):])
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def offsets(self, pos: int, n: int) -> List[int]:
+        """raw_offsets of `n` records written from the block at `pos` on; KeyError when the log
+        does not hold them (rotated, truncated, or not a block boundary)."""
+        out: List[int] = []
+        while len(out) < n:
+            magic, count, length = _HEAD.unpack_from(self._map(pos + _HEAD.size), pos)
+            if magic != MAGIC or not count:
+                raise KeyError(pos)
+            self._map(pos + _HEAD.size + length)
+            out.extend((pos << 16) | i for i in range(min(count, n - len(out))))
+            pos += _HEAD.size + length
+        return out
+
+    def get(self, raw_offset: int) -> str:
+        """The record written at `raw_offset`; KeyError when it does not point at one."""
+        pos, idx = raw_offset >> 16, raw_offset & 0xFFFF
+        ends, data = self._block(pos)
+        if idx + 1 >= len(ends):
+            raise KeyError(raw_offset)
+        return data[ends[idx]:ends[idx + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        """(raw_offset, record) for the whole log, in write order."""
+        pos, size = 0, self.path.stat().st_size
+        while pos + _HEAD.size <= size:
+            ends, data = self._block(pos)
+            for i in range(len(ends) - 1):
+                yield (pos << 16) | i, data[ends[i]:ends[i + 1]].decode("utf-8")
+            pos += _HEAD.size + _HEAD.unpack_from(self._map(pos + _HEAD.size), pos)[2]
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._blocks.clear()
+
+class AuditReplay:
+    """Stands in for an AuditWriter when a source is already in the log: `add` hands back the
+    offsets its records got the first time, in order."""
+
+    def __init__(self, offsets: List[int]):
+        self.offsets, self.records = offsets, 0
+
+    def add(self, text: str) -> Optional[int]:
+        self.records += 1
+        return self.offsets[self.records - 1] if self.records <= len(self.offsets) else None
+
+    @property
+    def complete(self) -> bool:
+        return self.records == len(self.offsets)
+
+def log_identity(path: str | Path) -> List[int]:
+    """[st_dev, st_ino] of the log, created empty when missing; changes when it is rotated or recreated."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch(exist_ok=True)
+    st = path.stat()
+    return [st.st_dev, st.st_ino]
+
+def _index_path(path: str | Path) -> Path:
+    return Path(f"{path}.index")
+
+def find_source(path: str | Path, digest: str) -> Optional[AuditReplay]:
+    """Replay for a source already written to this log (same file identity, records still there);
+    None when it has to be written."""
+    index = _index_path(path)
+    if not index.exists() or not Path(path).exists():
+        return None
+    ident, found = log_identity(path), None
+    for line in index.read_text().splitlines():
+        parts = line.split()
+        if len(parts) == 5 and parts[0] == digest and [int(parts[1]), int(parts[2])] == ident:
+            found = int(parts[3]), int(parts[4])
+    if found is None:
+        return None
+    reader = AuditReader(path)
+    try:
+        return AuditReplay(reader.offsets(*found))
+    except (KeyError, OSError, struct.error):
+        return None
+    finally:
+        reader.close()
+
+def record_source(path: str | Path, digest: str, start: int, records: int) -> None:
+    """Note in the index that `records` records of source `digest` were written from `start` on."""
+    dev, ino = log_identity(path)
+    with _index_path(path).open("a") as fh:
+        fh.write(f"{digest} {dev} {ino} {start} {records}\n")
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m ingest.audit", description="Print ingest audit records")
+    ap.add_argument("log", help="Audit log (INGEST.AUDIT_LOG)")
+    ap.add_argument("offsets", nargs="*", type=int, help="raw_offset values; all records when omitted")
+    args = ap.parse_args()
+    reader = AuditReader(args.log)
+    if args.offsets:
+        for off in args.offsets:
+            try:
+                print(f"{off}\t{reader.get(off)}")
+            except KeyError:
+                print(f"{off}\t<no record>", file=sys.stderr)
+    else:
+        for off, text in reader:
+            print(f"{off}\t{text}")
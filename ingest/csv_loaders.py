@@ -1,11 +1,13 @@
 """CSV loaders for PlayerProps.ai raw text format."""
+from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
 import re
 from .schema import CanonicalProp, normalize_stat_name
 
-def load_playerprops_csv(path: str | Path, sport_hint: Optional[str] = None) -> List[CanonicalProp]:
-    """Load PlayerProps.ai raw text export."""
+def load_playerprops_csv(path: str | Path, sport_hint: Optional[str] = None, audit=None) -> List[CanonicalProp]:
+    """Load PlayerProps.ai raw text export. With an `ingest.audit.AuditWriter` each parsed line is
+    logged there and the prop gets its `raw_offset`."""
     path = Path(path)
     props = []
     with open(path, 'r', encoding='utf-8') as f:
@@ -13,12 +15,12 @@ def load_playerprops_csv(path: str | Path, sport_hint: Optional[str] = None) ->
             line = line.strip()
             if not line or line.lower().startswith('player'):
                 continue
-            prop = _parse_raw_line(line, sport_hint)
+            prop = _parse_raw_line(line, sport_hint, audit)
             if prop:
                 props.append(prop)
     return props
 
-def _parse_raw_line(text: str, sport_hint: Optional[str]) -> Optional[CanonicalProp]:
+def _parse_raw_line(text: str, sport_hint: Optional[str], audit=None) -> Optional[CanonicalProp]:
     pattern = r'(\w+(?:\s+\w+)?)\s+(\w+)\s+.*?\(\s*\w+\s*\).*?(\w+)\s+@\s+(\w+).*?(Receiving Yards|Rushing Yards|Passing Yards|Receptions|Passing TDs|Rushing TDs|Receiving TDs)\s+([\d.]+)\s+(Over|Under).*?(-?\d+).*?Implied.*?([\d.]+)%.*?Projection\s+([\d.]+).*?L5\s*:\s*([\d.]+|N/A)%.*?L10\s*:\s*([\d.]+|N/A)%.*?SZN\s*:\s*([\d.]+|N/A)%'
     match = re.search(pattern, text, re.IGNORECASE)
     if not match:
@@ -69,9 +71,26 @@ def _parse_raw_line(text: str, sport_hint: Optional[str]) -> Optional[CanonicalP
         h2h=None,
         odds_american=odds,
         accuracy_sample=50,
-        raw_text=text
+        game_time_cdt=_game_time(text),
+        raw_offset=audit.add(text) if audit is not None else None
     )
 
+# A game time in the line ("2025-10-19 19:30" or "10/19/2025 7:30 PM"), read as CDT like the
+# XLSX GameTimeCDT column; lines without one never lock for late swap.
+_GAME_TIME = re.compile(r'(\d{4}-\d{2}-\d{2}[ T]\d{1,2}:\d{2}|\d{1,2}/\d{1,2}/\d{4}\s+\d{1,2}:\d{2}\s*[AP]M)', re.IGNORECASE)
+
+def _game_time(text: str) -> Optional[datetime]:
+    match = _GAME_TIME.search(text)
+    if not match:
+        return None
+    raw = re.sub(r'\s*([AP]M)$', r' \1', match.group(1).replace('T', ' ').upper())
+    for fmt in ('%Y-%m-%d %H:%M', '%m/%d/%Y %I:%M %p'):
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    return None
+
 def _american_to_probability(odds: int) -> float:
     if odds > 0:
         return 100 / (odds + 100)
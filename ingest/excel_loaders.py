@@ -1,11 +1,14 @@
 """Excel loader for PlayerProps.ai .xlsx exports."""
+import json
 from pathlib import Path
 from typing import List, Optional
 from datetime import datetime
 import pandas as pd
 from .schema import CanonicalProp, normalize_stat_name
 
-def load_playerprops_excel(path: str | Path, sport_hint: Optional[str] = None) -> List[CanonicalProp]:
+def load_playerprops_excel(path: str | Path, sport_hint: Optional[str] = None, audit=None) -> List[CanonicalProp]:
+    """With an `ingest.audit.AuditWriter`, each parsed row (raw text, or the structured row as JSON)
+    is logged there and the prop gets its `raw_offset`."""
     path = Path(path)
     if not sport_hint:
         filename = path.stem.upper()
@@ -25,17 +28,17 @@ def load_playerprops_excel(path: str | Path, sport_hint: Optional[str] = None) -
     if len(df.columns) == 1:
         for idx, row in df.iterrows():
             text = str(row.iloc[0])
-            prop = _parse_raw_text(text, sport_hint, ingested_at)
+            prop = _parse_raw_text(text, sport_hint, ingested_at, audit)
             if prop:
                 props.append(prop)
     else:
         for idx, row in df.iterrows():
-            prop = _parse_structured_row(row, sport_hint, ingested_at)
+            prop = _parse_structured_row(row, sport_hint, ingested_at, audit)
             if prop:
                 props.append(prop)
     return props
 
-def _parse_raw_text(text: str, sport: str, ingested_at: datetime) -> Optional[CanonicalProp]:
+def _parse_raw_text(text: str, sport: str, ingested_at: datetime, audit=None) -> Optional[CanonicalProp]:
     import re
     pattern = r'(\w+(?:\s+\w+)?)\s+(\w+)\s+.*?\(\s*\w+\s*\).*?(\w+)\s+@\s+(\w+).*?(Receiving Yards|Rushing Yards|Passing Yards|Receptions|Passing TDs|Rushing TDs|Receiving TDs)\s+([\d.]+)\s+(Over|Under).*?(-?\d+).*?Implied.*?([\d.]+)%.*?Projection\s+([\d.]+).*?L5\s*:\s*([\d.]+|N/A)%.*?L10\s*:\s*([\d.]+|N/A)%.*?SZN\s*:\s*([\d.]+|N/A)%'
     match = re.search(pattern, text, re.IGNORECASE)
@@ -84,10 +87,10 @@ def _parse_raw_text(text: str, sport: str, ingested_at: datetime) -> Optional[Ca
         accuracy_sample=50,
         ingested_at=ingested_at,
         game_time_cdt=None,
-        raw_text=text
+        raw_offset=audit.add(text) if audit is not None else None
     )
 
-def _parse_structured_row(row: "pd.Series", sport: str, ingested_at: datetime) -> Optional[CanonicalProp]:
+def _parse_structured_row(row: "pd.Series", sport: str, ingested_at: datetime, audit=None) -> Optional[CanonicalProp]:
     import pandas as pd
     try:
         player = str(row.get('Player', '')).strip()
@@ -144,7 +147,7 @@ def _parse_structured_row(row: "pd.Series", sport: str, ingested_at: datetime) -
             accuracy_sample=50,
             ingested_at=ingested_at,
             game_time_cdt=game_time_cdt,
-            raw_text=str(row.to_dict())
+            raw_offset=audit.add(json.dumps(dict(zip(row.index, row.tolist())), default=str)) if audit is not None else None
         )
     except Exception:
         return None
@@ -2,16 +2,45 @@ from pathlib import Path
 from typing import Optional, List
 from .schema import CanonicalProp
 from .csv_loaders import load_playerprops_csv
-from .excel_loaders import load_playerprops_excel
 
-def ingest_playerprops(path: str | Path, sport: Optional[str] = None) -> List[CanonicalProp]:
+def ingest_playerprops(path: str | Path, sport: Optional[str] = None, sigma_table: Optional[dict] = None,
+                       audit=None) -> List[CanonicalProp]:
+    """`audit`: an `ingest.audit.AuditWriter` that receives each parsed source record."""
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
     ext = path.suffix.lower()
     if ext == '.csv':
-        return load_playerprops_csv(path, sport_hint=sport)
+        props = load_playerprops_csv(path, sport_hint=sport, audit=audit)
     elif ext in ['.xlsx', '.xls']:
-        return load_playerprops_excel(path, sport_hint=sport)
+        from .excel_loaders import load_playerprops_excel  # pandas only for Excel inputs
+        props = load_playerprops_excel(path, sport_hint=sport, audit=audit)
     else:
         raise ValueError(f"Unsupported format: {ext}")
+    if sigma_table:
+        derive_distribution_p_model(props, sigma_table)
+    return props
+
+def sigma_market_key(stat: str) -> str:
+    """'Rush Attempts' -> 'rush_attempts' (FILTERS.SIGMA market keys)."""
+    return stat.strip().lower().replace(" ", "_")
+
+def derive_distribution_p_model(props: List[CanonicalProp], sigma_table: dict) -> int:
+    """
+    Replace the `implied + edge*0.3` p_model with P(direction) from the cached normal
+    surfaces (same sigmas and erf as the API), for props whose (sport, stat) has a FILTERS.SIGMA entry.
+    Returns the number of props updated.
+    """
+    from probability.surface import distribution_over_probs
+    idx = [i for i, p in enumerate(props)
+           if p.projection and p.direction and sigma_market_key(p.stat) in sigma_table.get(p.sport.upper(), {})]
+    if not idx:
+        return 0
+    sel = [props[i] for i in idx]
+    p_over = distribution_over_probs([p.player for p in sel], [p.sport for p in sel],
+                                     [sigma_market_key(p.stat) for p in sel], [p.line for p in sel],
+                                     [p.projection for p in sel], sigma_table)
+    for p, po in zip(sel, p_over):
+        p_dir = float(po) if p.direction == "Over" else 1.0 - float(po)
+        p.p_model = min(0.95, max(0.05, p_dir))
+    return len(idx)
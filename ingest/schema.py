@@ -59,7 +59,8 @@ class CanonicalProp(BaseModel):
     recommended: Optional[bool] = Field(None, description="Flags from source if any")
 
     # ===== Audit Trail =====
-    raw_text: Optional[str] = Field(None, description="Original text for traceability")
+    raw_text: Optional[str] = Field(None, description="Original text (loaders write it to the audit log instead)")
+    raw_offset: Optional[int] = Field(None, ge=0, description="Source record in the ingest audit log (ingest.audit)")
     ingested_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp of ingestion")
     
     @field_validator('projection', mode='before')
@@ -1,90 +1,105 @@
 """CLI for PropEdge Champions pipeline (conservative strategy)."""
 from __future__ import annotations
-import argparse, json
+import argparse, json, sys
 from pathlib import Path
-from datetime import datetime
-import yaml
+from profiling import Profiler, MODES as PROFILE_MODES
+from pipeline import stages
 
-from ingest.ingest_any import ingest_playerprops
-from unify.unify import merge_sources
-from scoring.scoring import score_all_props
-from champions.builder import build_lineups
-from bankroll.bankroll import allocate_stakes
+# Stage modules (pydantic models, numpy/pandas when needed) are imported by pipeline.stages on first
+# use, so `--help` and argument errors return immediately and CSV runs never load pandas.
 
-def load_config(config_path: str = "config.yaml") -> dict:
-    cfg = Path(config_path)
-    if not cfg.exists():
-        raise FileNotFoundError(f"Config file not found: {config_path}")
-    return yaml.safe_load(cfg.read_text())
-
-def run_pipeline(playerprops_file: str, bankroll: float | None = None, config_path: str = "config.yaml") -> dict:
-    config = load_config(config_path)
-    if bankroll:
-        config.setdefault("BANKROLL", {})["BASE"] = bankroll
+DEFAULT_STAGE_CACHE = ".propedge_cache"
 
-    # 1) Ingest
-    pp_props = ingest_playerprops(playerprops_file)
-    if not pp_props:
-        return {"error": "no props loaded"}
+def load_config(config_path: str = "config.yaml") -> dict:
+    return stages.load_config(config_path)
 
-    # 2) Unify
-    unified = merge_sources(pp_props)
+def plan_lineups(playerprops_file: str, bankroll: float | None = None, config_path: str = "config.yaml",
+                 results_store: str | None = None, profiler: Profiler | None = None,
+                 stage_cache: str | None | bool = None, archive: str | None = None) -> tuple[dict, list]:
+    """Run the pipeline; returns (plan header, allocated Lineups) or ({"error": ...}, []).
+    Stage outputs are reused from the stage cache (`stage_cache` dir, default PIPELINE.CACHE_DIR;
+    False disables it). With an enabled profiler the header gets a per-stage `profile` section.
+    `archive` also writes every built lineup to that path (see champions.archive)."""
+    from pipeline.dag import PipelineDAG, StageStore, cache_budget
+    prof = profiler or Profiler(mode=None)
+    with prof.stage("setup"):
+        config = load_config(config_path)
+        if bankroll:
+            config.setdefault("BANKROLL", {})["BASE"] = bankroll
+        if stage_cache is None:
+            stage_cache = (config.get("PIPELINE", {}) or {}).get("CACHE_DIR", DEFAULT_STAGE_CACHE)
+        dag = PipelineDAG(config, StageStore(stage_cache or None, max_bytes=cache_budget(config)), results_store, prof)
 
-    # 3) Score (S/A only downstream)
-    scored = score_all_props(
-        unified,
-        weights={
-            "EDGE_WEIGHT": config["SCORING"]["EDGE_WEIGHT"],
-            "ACCURACY_WEIGHT": config["SCORING"]["ACCURACY_WEIGHT"],
-            "RECENT_WEIGHT": config["SCORING"]["RECENT_WEIGHT"],
-            "DTM_WEIGHT": config["SCORING"]["DTM_WEIGHT"],
-        },
-        tier_thresholds=config["SCORING"]["TIER_THRESHOLDS"],
-        min_accuracy_sample=config["SCORING"]["MIN_ACCURACY_SAMPLE"]
-    )
-    scored = [s for s in scored if s.tier in ("S","A")]
+    # ingest+unify -> score (S/A only) -> build (STANDARD payouts) -> allocate (FLEX vs STANDARD for lotto)
+    allocated = dag.run(playerprops_file, stop=lambda stage, out: stage == "ingest" and not out)
+    if dag.last[-1]["stage"] == "ingest":
+        return {"error": "no props loaded", **({"profile": prof.report()} if prof.enabled else {})}, []
 
-    # 4) Build lineups using STANDARD payouts for candidate generation
-    lineups = build_lineups(
-        scored,
-        payout_table=config["CHAMPIONS"]["PAYOUT_TABLE_STANDARD"],
-        correlation_penalties=config["CORRELATION"],
-        min_ev_by_leg=config["RISK"]["MIN_EV_BY_LEG"],
-        max_prop_appearances=config["RISK"]["MAX_PROP_APPEARANCES"]
-    )
+    header = stages.plan_header(config, allocated)
+    if archive:
+        from champions.archive import write_archive
+        with prof.stage("archive") as st:
+            built = dag.output(playerprops_file, "build")
+            write_archive(archive, built, meta={"playerprops": str(playerprops_file), "generated": header["timestamp"]})
+            st.items_out = len(built)
+        header["archive"] = {"path": str(archive), "lineups": len(built)}
+    if prof.enabled:
+        header["profile"] = prof.report()
+    return header, allocated
 
-    # 5) Allocate bankroll and decide FLEX vs STANDARD for lotto
-    allocated = allocate_stakes(lineups, config)
+def run_pipeline(playerprops_file: str, bankroll: float | None = None, config_path: str = "config.yaml",
+                 results_store: str | None = None, profiler: Profiler | None = None,
+                 stage_cache: str | None | bool = None, archive: str | None = None) -> dict:
+    header, allocated = plan_lineups(playerprops_file, bankroll, config_path, results_store, profiler, stage_cache,
+                                     archive)
+    if "error" in header:
+        return header
+    return stages.plan_dict(header, allocated)
 
-    result = {
-        "timestamp": datetime.now().isoformat(),
-        "bankroll": config["BANKROLL"]["BASE"],
-        "daily_budget_fraction": config["RISK"]["DAILY_BUDGET_FRACTION"],
-        "num_allocated": len(allocated),
-        "lineups": [
-            {
-                "mode": L.category,
-                "tier": L.tier,
-                "num_legs": L.num_legs,
-                "stake": round(L.stake, 2),
-                "win_prob": round(L.expected_win_prob, 4),
-                "ev": round(L.expected_value, 4),
-                "picks": [{"player": p.player_name, "stat": p.stat_type, "line": p.line, "dir": p.direction} for p in L.picks],
-            }
-            for L in allocated
-        ],
-    }
-    return result
+def plan_ndjson(header: dict, allocated: list):
+    """NDJSON lines: header, each pick once as {"type": "prop"}, lineups referencing pick ids."""
+    from app.ndjson import LegRefs, stream_lineups
+    refs = LegRefs(lambda p: (p.player_name, p.stat_type, p.line, p.direction, p.sport), stages.pick_record)
+    return stream_lineups(header, allocated, refs, stages.lineup_record, lambda L: L.picks, kind="lineup")
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        from pipeline.watch import main as watch_main
+        sys.exit(watch_main(sys.argv[2:]))
     ap = argparse.ArgumentParser(description="PropEdge v3 (conservative two-play strategy)")
     ap.add_argument("--playerprops", required=True, help="Path to PlayerProps.ai CSV/XLSX")
     ap.add_argument("--bankroll", type=float, default=None, help="Override bankroll base")
     ap.add_argument("--config", default="config.yaml", help="Config path")
     ap.add_argument("--output", default=None, help="Optional JSON output path")
+    ap.add_argument("--output-format", choices=("json", "ndjson"), default="json",
+                    help="ndjson writes one lineup per line with picks written once and referenced by id")
+    ap.add_argument("--results-store", default=None, help="Results store dir for real accuracy samples (default: RESULTS.STORE_DIR)")
+    ap.add_argument("--profile", nargs="?", const="basic", default=None, choices=PROFILE_MODES,
+                    help="Add per-stage timings/counts/memory as a `profile` section; --profile=cprofile also dumps pstats per stage")
+    ap.add_argument("--profile-dir", default="profile", help="Where --profile=cprofile writes <stage>.pstats")
+    ap.add_argument("--stage-cache", default=None, help=f"Stage output store (default: PIPELINE.CACHE_DIR or {DEFAULT_STAGE_CACHE})")
+    ap.add_argument("--no-stage-cache", action="store_true", help="Recompute every stage and store nothing")
+    ap.add_argument("--archive", default=None,
+                    help="Also write every built lineup to this memory-mappable archive (e.g. slate.lineups)")
     args = ap.parse_args()
+    profiler = Profiler(args.profile, args.profile_dir) if args.profile else None
+    stage_cache = False if args.no_stage_cache else args.stage_cache
 
-    plan = run_pipeline(args.playerprops, bankroll=args.bankroll, config_path=args.config)
+    if args.output_format == "ndjson":
+        header, allocated = plan_lineups(args.playerprops, bankroll=args.bankroll, config_path=args.config,
+                                         results_store=args.results_store, profiler=profiler, stage_cache=stage_cache,
+                                         archive=args.archive)
+        if args.output:
+            out = Path(args.output); out.parent.mkdir(parents=True, exist_ok=True)
+            with out.open("wb") as fh:
+                fh.writelines(plan_ndjson(header, allocated))
+            print(f"Saved plan to {out}")
+        else:
+            sys.stdout.buffer.writelines(plan_ndjson(header, allocated))
+        return
+    plan = run_pipeline(args.playerprops, bankroll=args.bankroll, config_path=args.config,
+                        results_store=args.results_store, profiler=profiler, stage_cache=stage_cache,
+                        archive=args.archive)
     if args.output:
         out = Path(args.output); out.parent.mkdir(parents=True, exist_ok=True)
         out.write_text(json.dumps(plan, indent=2))
@@ -0,0 +1 @@
+"""Pipeline stages and the warm watch daemon built on them."""
@@ -0,0 +1,255 @@
+"""
+The CLI pipeline as a DAG of memoized stages.
+
+    ingest(file) -> score -> build -> allocate
+
+Each stage's key is a hash of its parent keys, the config values it reads (dotted paths in
+STAGES) and any external inputs it depends on (the export's bytes, the results store and
+calibration tables). Outputs go to a content-addressed StageStore, so a what-if run that only
+touches BANKROLL or the allocation half of RISK reuses every lineup already enumerated.
+
+    dag = PipelineDAG(config, StageStore(".propedge_cache"))
+    allocated = dag.run("props.csv")
+    dag.last                         # [{"stage", "key", "cache": "skipped"|"memory"|"hit"|"miss"}]
+"""
+from __future__ import annotations
+import hashlib, json, os, pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import stages
+
+# Bump when a stage's output changes shape so old store entries stop matching.
+VERSION = 4
+DEFAULT_CACHE_MAX_MB = 512
+
+# stage -> (parents, config paths it reads)
+STAGES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "ingest": ((), ("INGEST.P_MODEL", "INGEST.AUDIT_LOG", "FILTERS.SIGMA")),
+    "score": (("ingest",), ("SCORING", "CALIBRATION", "RESULTS.STORE_DIR")),
+    "build": (("score",), ("CHAMPIONS.PAYOUT_TABLE_STANDARD", "CORRELATION",
+                           "RISK.MIN_EV_BY_LEG", "RISK.MAX_PROP_APPEARANCES", "CONSTRAINTS")),
+    "allocate": (("build",), ("BANKROLL.BASE", "CHAMPIONS.PAYOUT_TABLE_STANDARD", "CHAMPIONS.PAYOUT_TABLE_FLEX",
+                              "RISK.DAILY_BUDGET_FRACTION", "RISK.TOP_PLAY_SHARE", "RISK.PARLAY_PLAY_SHARE",
+                              "RISK.MIN_STAKE")),
+}
+
+def config_slice(config: dict, paths: Tuple[str, ...]) -> dict:
+    out = {}
+    for path in paths:
+        node: Any = config
+        for part in path.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        out[path] = node
+    return out
+
+def digest(obj: Any) -> str:
+    blob = obj if isinstance(obj, bytes) else json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+def file_digest(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def dir_fingerprint(directory: Optional[str | Path], pattern: str = "*") -> Optional[list]:
+    """(name, size, mtime_ns) of the files a stage reads from `directory`; None when it doesn't exist."""
+    if not directory or not Path(directory).is_dir():
+        return None
+    return [(str(p.relative_to(directory)), p.stat().st_size, p.stat().st_mtime_ns)
+            for p in sorted(Path(directory).glob(pattern)) if p.is_file()]
+
+def cache_budget(config: dict) -> int:
+    """PIPELINE.CACHE_MAX_MB in bytes (default DEFAULT_CACHE_MAX_MB); 0 = unbounded."""
+    mb = (config.get("PIPELINE", {}) or {}).get("CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)
+    return int(float(mb or 0) * 1024 * 1024)
+
+class StageStore:
+    """Content-addressed stage outputs: <root>/<key[:2]>/<key>.pkl, plus a small in-memory LRU.
+    `root=None` keeps the memory tier only. On disk, files past `max_bytes` are pruned least
+    recently used first (a hit touches its file's mtime); `max_bytes=0` never prunes."""
+
+    def __init__(self, root: Optional[str | Path] = None, memory_items: int = 64,
+                 max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        self.root = Path(root) if root else None
+        self.memory_items, self.max_bytes = memory_items, max_bytes
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None   # running total, scanned on the first put
+        self.pruned = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def has(self, key: str) -> bool:
+        return key in self._mem or (self.root is not None and self._path(key).exists())
+
+    def get(self, key: str) -> Tuple[Any, Optional[str]]:
+        """(value, "memory"|"hit") or (None, None) on a miss."""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._mem[key], "memory"
+        if self.root is not None:
+            path = self._path(key)
+            try:
+                with path.open("rb") as fh:
+                    value = pickle.load(fh)
+                os.utime(path)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                return None, None
+            self._remember(key, value)
+            return value, "hit"
+        return None, None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        if self.root is None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp.open("wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        if self.max_bytes > 0:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._disk_bytes += path.stat().st_size
+            if self._disk_bytes > self.max_bytes:
+                self.prune(keep=path)
+
+    def _files(self) -> List[Tuple[Path, int, int]]:
+        out = []
+        for p in self.root.glob("*/*.pkl"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            out.append((p, st.st_size, st.st_mtime_ns))
+        return out
+
+    def prune(self, max_bytes: Optional[int] = None, keep: Optional[Path] = None) -> int:
+        """Delete the least recently used files until the store fits `max_bytes` (default the
+        store's budget); returns the bytes freed. `keep` (the entry just written) is never removed."""
+        if self.root is None or not self.root.is_dir():
+            return 0
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        files = sorted(self._files(), key=lambda f: f[2])
+        total, freed = sum(size for _, size, _ in files), 0
+        for p, size, _ in files:
+            if total <= budget:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size; freed += size; self.pruned += 1
+        self._disk_bytes = total
+        return freed
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self.memory_items <= 0:
+            return
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_items:
+            self._mem.popitem(last=False)
+
+class PipelineDAG:
+    """Runs the stages for one config, computing a stage only when its key is not in the store."""
+
+    def __init__(self, config: dict, store: Optional[StageStore] = None, results_store: Optional[str] = None,
+                 profiler=None):
+        from profiling import Profiler
+        self.config, self.store = config, store or StageStore()
+        self.results_store = results_store or (config.get("RESULTS", {}) or {}).get("STORE_DIR")
+        self.prof = profiler or Profiler(mode=None)
+        self.last: List[Dict[str, Any]] = []
+        self.builder_stats: Optional[dict] = {} if self.prof.enabled else None
+
+    def _externals(self, stage: str, path: Path) -> Any:
+        if stage == "ingest":
+            ext = {"file": file_digest(path), "suffix": path.suffix.lower()}
+            audit_log = stages.audit_log_for(self.config)
+            if audit_log:   # raw_offsets point into this log; a rotated one means re-ingesting
+                from ingest.audit import log_identity
+                ext["audit"] = log_identity(audit_log)
+            return ext
+        if stage == "score":
+            cal_dir = (self.config.get("CALIBRATION", {}) or {}).get("DIR")
+            return {"results": dir_fingerprint(self.results_store, "**/*"),
+                    "calibration": dir_fingerprint(cal_dir, "calibration-v*.json")}
+        return None
+
+    def keys(self, playerprops_file: str | Path) -> Dict[str, str]:
+        path, keys = Path(playerprops_file), {}
+        for stage, (parents, paths) in STAGES.items():
+            keys[stage] = digest({"v": VERSION, "stage": stage, "parents": [keys[p] for p in parents],
+                                  "config": config_slice(self.config, paths), "ext": self._externals(stage, path)})
+        return keys
+
+    def _compute(self, stage: str, path: Path, inputs: Dict[str, Any]):
+        cfg = self.config
+        if stage == "ingest":
+            props = stages.ingest(path, stages.sigma_table_for(cfg), stages.audit_log_for(cfg))
+            return stages.unify(props) if props else []
+        if stage == "score":
+            scored = stages.score(inputs["ingest"], cfg, stages.load_accuracy_lookup(cfg, self.results_store),
+                                  stages.load_calibrator(cfg))
+            return [s for s in scored if s.tier in ("S", "A")]
+        if stage == "build":
+            return stages.build(inputs["score"], cfg, self.builder_stats)
+        return stages.allocate(inputs["build"], cfg)
+
+    def output(self, playerprops_file: str | Path, stage: str) -> Any:
+        """Output of `stage` for this export: from the store, else computed (with whatever it needs)."""
+        value, how = self.store.get(self.keys(playerprops_file)[stage])
+        return value if how is not None else self.run(playerprops_file, until=stage)
+
+    def run(self, playerprops_file: str | Path, stop: Optional[Callable[[str, Any], bool]] = None,
+            until: Optional[str] = None) -> Any:
+        """Output of the last stage reached (`until`, default the last stage). Only the newest cached
+        stage is loaded (stages above it are `skipped`); the rest are computed and stored.
+        `stop(stage, output)` may end the run early."""
+        path = Path(playerprops_file)
+        keys = self.keys(path)
+        names = list(STAGES)
+        if until is not None:
+            names = names[:names.index(until) + 1]
+        self.last = []
+        outputs: Dict[str, Any] = {}
+        start = 0
+        for i in range(len(names) - 1, -1, -1):
+            if not self.store.has(keys[names[i]]):
+                continue
+            with self.prof.stage(names[i]) as st:
+                value, how = self.store.get(keys[names[i]])
+                if how is not None:
+                    st.items_out = len(value)
+                    st.set(cache=how)
+            if how is None:   # unreadable entry: recompute it
+                continue
+            self.last = [{"stage": n, "key": keys[n][:12], "cache": "skipped"} for n in names[:i]]
+            self.last.append({"stage": names[i], "key": keys[names[i]][:12], "cache": how})
+            outputs[names[i]], start = value, i + 1
+            if stop is not None and stop(names[i], value):
+                return value
+            break
+        for stage in names[start:]:
+            parents = STAGES[stage][0]
+            with self.prof.stage(stage, len(outputs[parents[0]]) if parents else None) as st:
+                value = self._compute(stage, path, outputs)
+                self.store.put(keys[stage], value)
+                st.items_out = len(value)
+                st.set(cache="miss")
+                if stage == "build" and self.builder_stats:
+                    st.set(builder=dict(self.builder_stats))
+            outputs[stage] = value
+            self.last.append({"stage": stage, "key": keys[stage][:12], "cache": "miss"})
+            if stop is not None and stop(stage, value):
+                break
+        return value
@@ -0,0 +1,225 @@
+"""
+Warm watch daemon: `python main.py watch <dir>`.
+
+Keeps one interpreter, the parsed config and every stage's last result in memory, watches <dir>
+for new or changed PlayerProps exports (inotify via the optional `inotify_simple`, else polling),
+waits for a burst of writes to settle, then reruns only the stages whose inputs changed and writes
+<out>/<stem>.plan.json atomically.
+
+Stage outputs live in a `pipeline.dag.StageStore` (in memory, plus on disk with --stage-cache),
+keyed by the export's content and the config values each stage reads, so an edit to RISK.MIN_STAKE
+reruns only allocate and re-saving an identical export reruns nothing.
+
+With --late-swap each export's last plan is taken as entered: as games start, locked legs are
+frozen and only the open games are re-optimized (`champions.late_swap`), reusing the cached scores
+and one lineup board per export, and the plan is rewritten with a `late_swap` status per lineup.
+"""
+from __future__ import annotations
+import argparse, json, logging, os, time
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from . import stages
+from .dag import PipelineDAG, StageStore, cache_budget
+
+try:
+    import inotify_simple
+except ImportError:  # optional; polling works everywhere
+    inotify_simple = None
+
+log = logging.getLogger("propedge.watch")
+
+EXPORT_SUFFIXES = (".csv", ".xlsx", ".xls")
+TEMP_SUFFIXES = (".tmp", ".part", ".crdownload")
+
+def is_export(name: str) -> bool:
+    return (name.lower().endswith(EXPORT_SUFFIXES) and not name.startswith((".", "~$"))
+            and not name.lower().endswith(TEMP_SUFFIXES))
+
+def write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+class WarmPipeline:
+    """The stage DAG with config and stage outputs kept between runs."""
+
+    def __init__(self, config_path: str = "config.yaml", results_store: Optional[str] = None,
+                 bankroll: Optional[float] = None, store: Optional[StageStore] = None, late_swap: bool = False):
+        self.config_path, self.results_store, self.bankroll = Path(config_path), results_store, bankroll
+        self.store = store or StageStore()
+        self.late_swap = late_swap
+        self._swaps: Dict[str, Tuple[str, object]] = {}   # export -> (score stage key, LateSwap)
+        self._plans: Dict[str, list] = {}                 # export -> last planned lineups, taken as entered
+        self._config_mtime: Optional[int] = None
+        self.reload_config()
+
+    def reload_config(self) -> bool:
+        """Re-read the config when its mtime moved; True when it did."""
+        mtime = self.config_path.stat().st_mtime_ns
+        if mtime == self._config_mtime:
+            return False
+        config = stages.load_config(str(self.config_path))
+        if self.bankroll:
+            config.setdefault("BANKROLL", {})["BASE"] = self.bankroll
+        self.store.max_bytes = cache_budget(config)
+        self.dag = PipelineDAG(config, self.store, self.results_store)
+        self._swaps.clear()
+        self._config_mtime = mtime
+        return True
+
+    def plan(self, path: str | Path, now: Optional[datetime] = None) -> Tuple[dict, List[str]]:
+        """Plan dict for one export, plus the stages that actually ran."""
+        if self.late_swap:
+            return self._swap_plan(str(path), now)
+        allocated = self.dag.run(path, stop=lambda stage, out: stage == "ingest" and not out)
+        ran = [s["stage"] for s in self.dag.last if s["cache"] == "miss"]
+        if self.dag.last[-1]["stage"] == "ingest":
+            return {"error": "no props loaded"}, ran
+        return stages.plan_dict(stages.plan_header(self.dag.config, allocated), allocated), ran
+
+    def _swap_plan(self, path: str, now: Optional[datetime]) -> Tuple[dict, List[str]]:
+        from champions.late_swap import LateSwap
+        scored = self.dag.run(path, stop=lambda stage, out: stage == "ingest" and not out, until="score")
+        ran = [s["stage"] for s in self.dag.last if s["cache"] == "miss"]
+        if self.dag.last[-1]["stage"] == "ingest":
+            return {"error": "no props loaded"}, ran
+        key = self.dag.last[-1]["key"]
+        if self._swaps.get(path, (None,))[0] != key:
+            self._swaps[path] = (key, LateSwap(scored, self.dag.config))
+            ran.append("board")
+        swap = self._swaps[path][1]
+        allocated = self._plans[path] = swap.reoptimize(self._plans.get(path), now)
+        plan = stages.plan_dict(stages.plan_header(self.dag.config, allocated), allocated)
+        plan["late_swap"] = {k: v for k, v in swap.last.items() if k != "status"}
+        for rec, status in zip(plan["lineups"], swap.last["status"]):
+            rec["late_swap"] = status
+        return plan, ran + ["late_swap"]
+
+    def due(self, now: Optional[datetime] = None) -> List[str]:
+        """Late-swap exports with a game that started since their last plan (`now` defaults to CDT wall time)."""
+        if now is None:
+            from champions.late_swap import now_cdt
+            now = now_cdt()
+        return [p for p, (_, swap) in self._swaps.items() if swap.next_lock is not None and swap.next_lock <= now]
+
+    def forget(self, path: str) -> None:
+        self._swaps.pop(path, None)
+        self._plans.pop(path, None)
+
+class DirWatcher:
+    """Yields settled batches of changed exports. inotify just wakes the loop early; a directory
+    snapshot of (mtime_ns, size) decides what changed, so both back-ends behave the same."""
+
+    def __init__(self, directory: str | Path, interval: float = 0.5, debounce: float = 0.3):
+        self.dir, self.interval, self.debounce = Path(directory), interval, debounce
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._inotify = None
+        if inotify_simple is not None:
+            f = inotify_simple.flags
+            self._inotify = inotify_simple.INotify()
+            self._inotify.add_watch(str(self.dir), f.CLOSE_WRITE | f.MOVED_TO | f.CREATE | f.MODIFY | f.DELETE)
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    @property
+    def known(self) -> List[str]:
+        return sorted(self._seen)
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        out = {}
+        with os.scandir(self.dir) as it:
+            for e in it:
+                if e.is_file() and is_export(e.name):
+                    st = e.stat()
+                    out[e.path] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def _wait(self, timeout: float) -> None:
+        if self._inotify is not None:
+            self._inotify.read(timeout=int(timeout * 1000))
+        else:
+            time.sleep(timeout)
+
+    def changes(self, snap: Dict[str, Tuple[int, int]]) -> Tuple[List[str], List[str]]:
+        changed = [p for p, sig in snap.items() if self._seen.get(p) != sig]
+        removed = [p for p in self._seen if p not in snap]
+        return changed, removed
+
+    def poll(self, timeout: Optional[float] = None) -> Tuple[List[str], List[str]]:
+        """Block up to `timeout` (default: interval) for changes, then until they settle for `debounce`."""
+        self._wait(self.interval if timeout is None else timeout)
+        snap = self.snapshot()
+        changed, removed = self.changes(snap)
+        while changed:
+            time.sleep(self.debounce)
+            nxt = self.snapshot()
+            if nxt == snap:
+                break
+            snap = nxt
+            changed, removed = self.changes(snap)
+        self._seen = snap
+        return sorted(changed), removed
+
+def _write_plan(pipe: WarmPipeline, export: str, out_dir: Path) -> None:
+    t0 = time.perf_counter()
+    try:
+        plan, ran = pipe.plan(export)
+    except Exception:
+        log.exception("planning %s failed", export)
+        return
+    target = out_dir / f"{Path(export).stem}.plan.json"
+    write_atomic(target, json.dumps(plan, indent=2))
+    log.info("%s -> %s in %.0f ms (ran: %s)", Path(export).name, target,
+             (time.perf_counter() - t0) * 1000, ", ".join(ran) or "nothing, all cached")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="main.py watch", description="Re-plan exports in DIR as they change")
+    ap.add_argument("dir", help="Directory PlayerProps.ai CSV/XLSX exports land in")
+    ap.add_argument("--config", default="config.yaml", help="Config path (re-read when it changes)")
+    ap.add_argument("--out", default=None, help="Plan directory (default: DIR/plans)")
+    ap.add_argument("--bankroll", type=float, default=None, help="Override bankroll base")
+    ap.add_argument("--results-store", default=None, help="Results store dir (default: RESULTS.STORE_DIR)")
+    ap.add_argument("--stage-cache", default=None, help="Also persist stage outputs in this dir (see main.py --stage-cache)")
+    ap.add_argument("--memory-items", type=int, default=256, help="Stage outputs kept in memory")
+    ap.add_argument("--interval", type=float, default=0.5, help="Polling interval / inotify wake-up, seconds")
+    ap.add_argument("--debounce", type=float, default=0.3, help="Quiet time before a burst of writes is processed")
+    ap.add_argument("--late-swap", action="store_true",
+                    help="Treat plans as entered and re-optimize only still-open games as games start")
+    ap.add_argument("--once", action="store_true", help="Plan the exports already in DIR and exit")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    directory = Path(args.dir)
+    if not directory.is_dir():
+        ap.error(f"not a directory: {directory}")
+    out_dir = Path(args.out) if args.out else directory / "plans"
+    pipe = WarmPipeline(args.config, args.results_store, args.bankroll,
+                        StageStore(args.stage_cache, memory_items=args.memory_items), args.late_swap)
+    watcher = DirWatcher(directory, args.interval, args.debounce)
+    changed, _ = watcher.poll(timeout=0)
+    for export in changed:
+        _write_plan(pipe, export, out_dir)
+    if args.once:
+        return 0
+    log.info("watching %s (%s), plans -> %s", directory, watcher.backend, out_dir)
+    try:
+        while True:
+            changed, removed = watcher.poll()
+            for export in removed:
+                pipe.forget(export)
+            try:
+                if pipe.reload_config():
+                    log.info("config changed; re-planning %d export(s)", len(watcher.known))
+                    changed = watcher.known
+            except Exception:
+                log.exception("config reload failed; keeping the previous config")
+            if pipe.late_swap:
+                changed += [p for p in pipe.due() if p not in changed]
+            for export in changed:
+                _write_plan(pipe, export, out_dir)
+    except KeyboardInterrupt:
+        return 0
@@ -0,0 +1 @@
+"""Distribution-based prop probabilities shared by the API and ingest (numpy; imported on demand)."""
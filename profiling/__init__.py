@@ -0,0 +1,2 @@
+from .profiler import Profiler, StageRecord, MODES
+__all__ = ["Profiler", "StageRecord", "MODES"]
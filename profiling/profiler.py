@@ -0,0 +1,114 @@
+"""
+Per-stage instrumentation for run_pipeline.
+
+    prof = Profiler(mode="basic")             # or "cprofile", or None for a no-op
+    with prof.stage("ingest") as st:
+        props = ingest_playerprops(...)
+        st.items_out = len(props)
+    plan["profile"] = prof.report()
+
+Each stage records wall/CPU seconds, items in/out, tracemalloc peak and the process peak RSS,
+plus any extra counters the stage sets. In cprofile mode every stage also gets its own
+cProfile.Profile, dumped as <dir>/<stage>.pstats and summarized (top functions) in the report.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import cProfile, io, pstats, sys, time, tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ("basic", "cprofile")
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0, 1)
+
+class StageRecord:
+    def __init__(self, name: str, items_in: Optional[int] = None):
+        self.name = name
+        self.items_in = items_in
+        self.items_out: Optional[int] = None
+        self.extra: Dict[str, Any] = {}
+        self.wall_s = 0.0; self.cpu_s = 0.0
+        self.alloc_peak_mb: Optional[float] = None
+        self.rss_peak_mb: Optional[float] = None
+        self.top: List[Dict[str, Any]] = []
+
+    def set(self, **counters: Any) -> None:
+        self.extra.update(counters)
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = {"stage": self.name, "wall_s": round(self.wall_s, 4), "cpu_s": round(self.cpu_s, 4),
+               "items_in": self.items_in, "items_out": self.items_out,
+               "alloc_peak_mb": self.alloc_peak_mb, "rss_peak_mb": self.rss_peak_mb}
+        out.update(self.extra)
+        if self.top:
+            out["top"] = self.top
+        return out
+
+class Profiler:
+    def __init__(self, mode: Optional[str] = "basic", pstats_dir: str | Path = "profile", top_n: int = 15):
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"profile mode must be one of {MODES}")
+        self.mode, self.pstats_dir, self.top_n = mode, Path(pstats_dir), top_n
+        self.stages: List[StageRecord] = []
+        self._t0 = time.perf_counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    @contextmanager
+    def stage(self, name: str, items_in: Optional[int] = None) -> Iterator[StageRecord]:
+        rec = StageRecord(name, items_in)
+        if not self.enabled:
+            yield rec
+            return
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        prof = cProfile.Profile() if self.mode == "cprofile" else None
+        w0, c0 = time.perf_counter(), time.process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield rec
+        finally:
+            if prof is not None:
+                prof.disable()
+            rec.wall_s = time.perf_counter() - w0
+            rec.cpu_s = time.process_time() - c0
+            rec.alloc_peak_mb = round((tracemalloc.get_traced_memory()[1] - base) / 2**20, 2)
+            if started_tracing:
+                tracemalloc.stop()
+            rec.rss_peak_mb = peak_rss_mb()
+            if prof is not None:
+                rec.top = self._dump(name, prof)
+            self.stages.append(rec)
+
+    def _dump(self, name: str, prof: cProfile.Profile) -> List[Dict[str, Any]]:
+        self.pstats_dir.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(str(self.pstats_dir / f"{name}.pstats"))
+        st = pstats.Stats(prof, stream=io.StringIO()).sort_stats("cumulative")
+        top = []
+        for (fname, line, func) in st.fcn_list[:self.top_n]:
+            cc, nc, tt, ct, _ = st.stats[(fname, line, func)]
+            top.append({"func": f"{Path(fname).name}:{line}({func})", "calls": nc,
+                        "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)})
+        return top
+
+    def report(self) -> Dict[str, Any]:
+        out = {"mode": self.mode, "total_s": round(time.perf_counter() - self._t0, 4),
+               "peak_rss_mb": peak_rss_mb(), "stages": [s.as_dict() for s in self.stages]}
+        if self.mode == "cprofile":
+            out["pstats_dir"] = str(self.pstats_dir)
+        return out
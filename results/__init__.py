@@ -0,0 +1,2 @@
+from .store import ResultsStore, RESULT_COLUMNS, PENDING, MISS, HIT, PUSH
+__all__ = ["ResultsStore", "RESULT_COLUMNS", "PENDING", "MISS", "HIT", "PUSH"]
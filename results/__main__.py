@@ -0,0 +1,47 @@
+"""CLI for the results store: python -m results {ingest-plan,ingest-results,hit-rate,calibrate}."""
+from __future__ import annotations
+import argparse, json, sys
+from .store import ResultsStore
+from scoring.calibration import Calibrator
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m results", description="PropEdge results store")
+    ap.add_argument("--store", default="results_store", help="Results store directory")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest-plan", help="Append plan.json picks as pending results")
+    p.add_argument("paths", nargs="+")
+    r = sub.add_parser("ingest-results", help="Append settled outcomes (results_log_template.csv columns)")
+    r.add_argument("paths", nargs="+")
+    q = sub.add_parser("hit-rate", help="Hit rate of settled results matching filters")
+    for flag in ("sport", "player", "stat", "direction", "tier", "since", "until"):
+        q.add_argument(f"--{flag}", default=None)
+    q.add_argument("--last-days", type=int, default=None)
+    c = sub.add_parser("calibrate", help="Fold new settled results into the calibration tables and save a new version")
+    c.add_argument("--dir", default="calibration", help="Calibration table directory (CALIBRATION.DIR)")
+    args = ap.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.cmd == "ingest-plan":
+        n = sum(store.ingest_plan(p) for p in args.paths)
+        print(f"Appended {n} pending picks to {store.root}")
+    elif args.cmd == "ingest-results":
+        n = 0
+        for path in args.paths:
+            skipped: list = []
+            n += store.ingest_results(path, skipped=skipped)
+            for line, reason in skipped:
+                print(f"{path}:{line}: skipped ({reason})", file=sys.stderr)
+        print(f"Appended {n} settled results to {store.root}; {len(store.open_pending())} picks still pending")
+    elif args.cmd == "calibrate":
+        cal = Calibrator.load(args.dir) or Calibrator()
+        n = cal.update_from_store(store)
+        if cal.fit():
+            print(f"Consumed {n} settled results; saved {cal.save(args.dir)}")
+        else:
+            print(f"Consumed {n} settled results; calibration v{cal.version} unchanged")
+    else:
+        filters = {k: getattr(args, k) for k in ("sport", "player", "stat", "direction", "tier", "since", "until", "last_days")}
+        print(json.dumps(store.hit_rate(**{k: v for k, v in filters.items() if v is not None}), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Append-only columnar results store (plan picks + settled outcomes).
+
+Layout on disk::
+
+    <root>/dictionary.json          string tables shared by every partition
+    <root>/part-000001/<col>.npy    one file per column, written once
+    <root>/part-000002/...
+
+Partitions are never rewritten; new plans/results land in a new partition.
+String columns are stored as int32 codes into the shared dictionary so the
+player/stat/sport/tier indexes are plain integer CSR arrays.
+"""
+from __future__ import annotations
+import csv, json, os
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+import numpy as np
+
+STRING_COLUMNS = ("sport", "player", "stat", "direction", "tier")
+NUMERIC_COLUMNS = {"day": np.int32, "line": np.float64, "p_model": np.float64, "stake": np.float64, "outcome": np.int8}
+RESULT_COLUMNS = ("date",) + STRING_COLUMNS + ("line", "p_model", "stake", "outcome")
+
+# outcome codes
+PENDING, MISS, HIT, PUSH = -1, 0, 1, 2
+_OUTCOME_ALIASES = {"hit": HIT, "win": HIT, "w": HIT, "1": HIT, "miss": MISS, "loss": MISS, "l": MISS, "0": MISS,
+                    "push": PUSH, "void": PUSH, "p": PUSH, "": PENDING, "pending": PENDING}
+_EPOCH = date(1970, 1, 1)
+
+
+def _to_day(value) -> int:
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00")).date()
+    return (value - _EPOCH).days
+
+
+def _norm_direction(value) -> str:
+    return str(value or "").strip().upper()
+
+
+class ResultsStore:
+    """Append-only columnar store with player/stat/sport/date indexes."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.version = 0
+        self._dict: dict[str, list[str]] = {c: [] for c in STRING_COLUMNS}
+        self._lookup: dict[str, dict[str, int]] = {c: {} for c in STRING_COLUMNS}
+        self._parts: list[Path] = []
+        self._cols: dict[str, np.ndarray] | None = None
+        self._index: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._day_order: np.ndarray | None = None
+        if self.root.exists():
+            self._load()
+
+    # ----- persistence -----
+    def _load(self) -> None:
+        dpath = self.root / "dictionary.json"
+        if dpath.exists():
+            saved = json.loads(dpath.read_text())
+            for c in STRING_COLUMNS:
+                self._dict[c] = list(saved.get(c, []))
+                self._lookup[c] = {v: i for i, v in enumerate(self._dict[c])}
+        self._parts = sorted(p for p in self.root.glob("part-*") if (p / "_SUCCESS").exists())
+
+    def _code(self, column: str, value) -> int:
+        value = "" if value is None else str(value).strip()
+        codes = self._lookup[column]
+        if value not in codes:
+            codes[value] = len(self._dict[column])
+            self._dict[column].append(value)
+        return codes[value]
+
+    def append(self, rows: Iterable[dict]) -> int:
+        """Write rows as a new immutable partition. Returns number of rows written."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        cols: dict[str, np.ndarray] = {}
+        for c in STRING_COLUMNS:
+            cols[c] = np.fromiter((self._code(c, r.get(c)) for r in rows), dtype=np.int32, count=len(rows))
+        cols["day"] = np.fromiter((_to_day(r["date"]) for r in rows), dtype=np.int32, count=len(rows))
+        for c in ("line", "p_model", "stake"):
+            cols[c] = np.array([np.nan if r.get(c) in (None, "") else float(r[c]) for r in rows], dtype=np.float64)
+        cols["outcome"] = np.array([r.get("outcome", PENDING) for r in rows], dtype=np.int8)
+
+        part = self._claim_part()
+        for name, arr in cols.items():
+            np.save(part / f"{name}.npy", arr)
+        tmp = self.root / "dictionary.json.tmp"
+        tmp.write_text(json.dumps(self._dict))
+        os.replace(tmp, self.root / "dictionary.json")
+        (part / "_SUCCESS").touch()
+        self._parts.append(part)
+        self._invalidate()
+        return len(rows)
+
+    def _claim_part(self) -> Path:
+        """Create the next partition directory. Numbering continues from the highest part-* on disk,
+        complete or not (a crashed append leaves one without _SUCCESS), and mkdir is the claim, so a
+        concurrent writer that took the number first just moves this one to the next."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        nums = [int(p.name[5:]) for p in self.root.glob("part-*") if p.name[5:].isdigit()]
+        n = max(nums, default=0) + 1
+        while True:
+            part = self.root / f"part-{n:06d}"
+            try:
+                part.mkdir()
+                return part
+            except FileExistsError:
+                n += 1
+
+    def _invalidate(self) -> None:
+        self._cols = None
+        self._index = {}
+        self._day_order = None
+        self.version += 1
+
+    # ----- columns & indexes -----
+    def _columns(self) -> dict[str, np.ndarray]:
+        if self._cols is None:
+            names = list(STRING_COLUMNS) + list(NUMERIC_COLUMNS)
+            if not self._parts:
+                self._cols = {n: np.empty(0, dtype=NUMERIC_COLUMNS.get(n, np.int32)) for n in names}
+            else:
+                self._cols = {n: np.concatenate([np.load(p / f"{n}.npy", mmap_mode="r") for p in self._parts])
+                              for n in names}
+        return self._cols
+
+    def __len__(self) -> int:
+        return len(self._columns()["day"])
+
+    def _csr(self, column: str) -> tuple[np.ndarray, np.ndarray]:
+        if column not in self._index:
+            codes = self._columns()[column]
+            order = np.argsort(codes, kind="stable")
+            offsets = np.zeros(len(self._dict[column]) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=len(self._dict[column])), out=offsets[1:])
+            self._index[column] = (order, offsets)
+        return self._index[column]
+
+    def _rows_for(self, column: str, value: str) -> np.ndarray:
+        code = self._lookup[column].get(str(value).strip())
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        order, offsets = self._csr(column)
+        return order[offsets[code]:offsets[code + 1]]
+
+    def _rows_between(self, since: Optional[int], until: Optional[int]) -> np.ndarray:
+        days = self._columns()["day"]
+        if self._day_order is None:
+            self._day_order = np.argsort(days, kind="stable")
+        sorted_days = days[self._day_order]
+        lo = 0 if since is None else np.searchsorted(sorted_days, since, side="left")
+        hi = len(sorted_days) if until is None else np.searchsorted(sorted_days, until, side="right")
+        return self._day_order[lo:hi]
+
+    # ----- queries -----
+    def select(self, sport: str | None = None, player: str | None = None, stat: str | None = None,
+               direction: str | None = None, tier: str | None = None, since=None, until=None,
+               last_days: int | None = None, settled_only: bool = True) -> np.ndarray:
+        """Return row ids matching every given filter (indexed column first, then masks)."""
+        cols = self._columns()
+        since_day = _to_day(since) if since is not None else None
+        until_day = _to_day(until) if until is not None else None
+        if last_days is not None:
+            since_day = _to_day(date.today() - timedelta(days=last_days))
+
+        eq = {"player": player, "stat": stat, "sport": sport, "tier": tier,
+              "direction": _norm_direction(direction) if direction else None}
+        eq = {k: v for k, v in eq.items() if v is not None}
+        candidates = [self._rows_for(k, v) for k, v in eq.items() if k in ("player", "stat", "sport")]
+        if since_day is not None or until_day is not None:
+            candidates.append(self._rows_between(since_day, until_day))
+        if candidates:
+            rows = min(candidates, key=len)
+        else:
+            rows = np.arange(len(cols["day"]))
+        if not len(rows):
+            return rows
+
+        mask = np.ones(len(rows), dtype=bool)
+        for k, v in eq.items():
+            code = self._lookup[k].get(str(v).strip())
+            if code is None:
+                return rows[:0]
+            mask &= cols[k][rows] == code
+        if since_day is not None:
+            mask &= cols["day"][rows] >= since_day
+        if until_day is not None:
+            mask &= cols["day"][rows] <= until_day
+        if settled_only:
+            outcome = cols["outcome"][rows]
+            mask &= (outcome == HIT) | (outcome == MISS)
+        return np.sort(rows[mask])
+
+    def hit_rate(self, **filters) -> dict:
+        """e.g. hit_rate(tier="S", direction="UNDER", stat="Receptions", last_days=30)."""
+        rows = self.select(settled_only=True, **filters)
+        n = int(len(rows))
+        hits = int((self._columns()["outcome"][rows] == HIT).sum()) if n else 0
+        return {"n": n, "hits": hits, "hit_rate": (hits / n) if n else None}
+
+    def records(self, rows: np.ndarray) -> list[dict]:
+        cols = self._columns()
+        out = []
+        for r in rows:
+            rec = {c: self._dict[c][cols[c][r]] for c in STRING_COLUMNS}
+            rec["date"] = (_EPOCH + timedelta(days=int(cols["day"][r]))).isoformat()
+            for c in ("line", "p_model", "stake"):
+                v = float(cols[c][r]); rec[c] = None if np.isnan(v) else v
+            rec["outcome"] = int(cols["outcome"][r])
+            out.append(rec)
+        return out
+
+    def _keys(self, rows: np.ndarray) -> list[tuple]:
+        """(day, player, stat, line, direction) per row, as codes: the identity of a settled prop."""
+        cols = self._columns()
+        return list(zip(cols["day"][rows].tolist(), cols["player"][rows].tolist(), cols["stat"][rows].tolist(),
+                        cols["line"][rows].tolist(), cols["direction"][rows].tolist()))
+
+    def open_pending(self) -> np.ndarray:
+        """Pending rows no settled row resolves yet (a settled row resolves every pending pick with
+        its date, player, stat, line and direction)."""
+        outcome = self._columns()["outcome"]
+        done = set(self._keys(np.flatnonzero(outcome != PENDING)))
+        rows = np.flatnonzero(outcome == PENDING)
+        return rows[np.fromiter((k not in done for k in self._keys(rows)), dtype=bool, count=len(rows))]
+
+    def settled(self, since_row: int = 0):
+        """Settled rows appended at or after `since_row`, for incremental consumers (calibration).
+
+        Returns (sports, stats, directions, p_model, hits, total_rows)."""
+        cols = self._columns()
+        total = len(cols["day"])
+        rows = since_row + np.flatnonzero(np.isin(cols["outcome"][since_row:], (HIT, MISS)))
+        d = self._dict
+        return ([d["sport"][c] for c in cols["sport"][rows]], [d["stat"][c] for c in cols["stat"][rows]],
+                [d["direction"][c] for c in cols["direction"][rows]], np.asarray(cols["p_model"][rows]),
+                np.asarray(cols["outcome"][rows] == HIT), total)
+
+    def accuracy_lookup(self):
+        """Cached (sport, stat) -> settled sample size, for `score_all_props(accuracy_lookup=...)`."""
+        cols = self._columns()
+        settled = (cols["outcome"] == HIT) | (cols["outcome"] == MISS)
+        n_stat = max(1, len(self._dict["stat"]))
+        pair = cols["sport"][settled].astype(np.int64) * n_stat + cols["stat"][settled]
+        counts = np.bincount(pair, minlength=max(1, len(self._dict["sport"])) * n_stat)
+        sport_codes, stat_codes = dict(self._lookup["sport"]), dict(self._lookup["stat"])
+
+        @lru_cache(maxsize=None)
+        def lookup(sport: str, stat: str) -> Optional[int]:
+            s, t = sport_codes.get(str(sport).strip()), stat_codes.get(str(stat).strip())
+            if s is None or t is None:
+                return None
+            return int(counts[s * n_stat + t])
+        return lookup
+
+    # ----- ingestion -----
+    def ingest_plan(self, plan: dict | str | Path) -> int:
+        """Append every pick of a `main.py` plan JSON as a pending result, dated by its game.
+
+        p_model is the pick's uncalibrated `raw_prob`, so calibration never fits on its own output.
+        Picks without a `date` (older plans, props without a game time) fall back to the plan's
+        generation day, and without `raw_prob` to `win_prob`."""
+        if not isinstance(plan, dict):
+            plan = json.loads(Path(plan).read_text())
+        day = plan.get("timestamp") or date.today().isoformat()
+        rows = []
+        for L in plan.get("lineups", []):
+            for p in L.get("picks", []):
+                rows.append({
+                    "date": p.get("date") or day, "sport": p.get("sport"), "player": p.get("player"), "stat": p.get("stat"),
+                    "direction": _norm_direction(p.get("dir")), "tier": p.get("tier") or L.get("tier"),
+                    "line": p.get("line"), "p_model": p.get("raw_prob", p.get("win_prob")), "stake": L.get("stake"),
+                    "outcome": PENDING,
+                })
+        return self.append(rows)
+
+    def ingest_results(self, path: str | Path, skipped: Optional[list] = None) -> int:
+        """Append settled rows from a `results_log_template.csv`-shaped file.
+
+        Each row resolves the open pending pick with the same player/stat/line/direction (on the
+        row's date when it has one, else the most recent): it takes that pick's date, and its
+        missing sport/tier/stake, and the pick's p_model (the uncalibrated probability) wins over
+        the file's, which may have been copied from a calibrated plan `win_prob`. Rows already
+        settled (same date/player/stat/line/direction, in the store or earlier in the file) and
+        rows with no usable date or line are left out and reported in `skipped` as
+        (csv line number, reason), so re-ingesting a file appends nothing.
+        """
+        pending: dict[tuple, list[dict]] = {}
+        for r in self.records(self.open_pending()):
+            pending.setdefault((r["player"], r["stat"], r["line"], r["direction"]), []).append(r)
+        cols = self._columns()
+        done = set(self._keys(np.flatnonzero(cols["outcome"] != PENDING)))
+        settled_props = {k[1:] for k in done}
+        rows = []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            for rec in reader:
+                outcome = _OUTCOME_ALIASES.get(str(rec.get("result", "")).strip().lower(), PENDING)
+                if outcome == PENDING:
+                    continue
+                player, stat = rec.get("player", "").strip(), rec.get("stat", "").strip()
+                direction = _norm_direction(rec.get("direction"))
+                try:
+                    line = float(rec["line"]) if rec.get("line") else None
+                    picks = pending.get((player, stat, line, direction), [])
+                    given = _to_day(rec["date"]) if rec.get("date") else None
+                    if given is not None:
+                        prior = next((p for p in reversed(picks) if _to_day(p["date"]) == given), {})
+                    else:
+                        prior = max(picks, key=lambda p: p["date"]) if picks else {}
+                    day = prior.get("date") or rec.get("date")
+                    codes = (self._lookup["player"].get(player), self._lookup["stat"].get(stat), line,
+                             self._lookup["direction"].get(direction))
+                    if not day:
+                        raise ValueError("already settled" if codes in settled_props
+                                         else "no date and no pending pick to take it from")
+                    key = (_to_day(day),) + codes
+                    if key in done:
+                        raise ValueError("already settled")
+                except ValueError as e:
+                    if skipped is not None:
+                        skipped.append((reader.line_num, str(e)))
+                    continue
+                rows.append({
+                    "date": day, "sport": rec.get("sport") or prior.get("sport"),
+                    "player": player, "stat": stat, "direction": direction,
+                    "tier": rec.get("tier") or prior.get("tier"), "line": line,
+                    "p_model": prior.get("p_model") or rec.get("p_model"),
+                    "stake": rec.get("stake") or prior.get("stake"), "outcome": outcome,
+                })
+                codes = (self._code("player", player), self._code("stat", stat), line, self._code("direction", direction))
+                done.add((key[0],) + codes); settled_props.add(codes)
+        return self.append(rows)
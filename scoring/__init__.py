@@ -1,3 +1,11 @@
 from .models import ScoredProp
 from .scoring import score_all_props, score_prop
-__all__ = ["ScoredProp", "score_all_props", "score_prop"]
+
+def __getattr__(name):
+    # Calibrator pulls in numpy; import it on first use
+    if name == "Calibrator":
+        from .calibration import Calibrator
+        return Calibrator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ["ScoredProp", "score_all_props", "score_prop", "Calibrator"]
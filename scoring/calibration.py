@@ -0,0 +1,137 @@
+"""Incremental reliability statistics + isotonic correction of model probabilities.
+
+Counts are kept per (sport, stat, direction) and per pooled (sport, "*", direction)
+in fixed probability buckets, so each settled result is an O(1) update. `fit()`
+only refits keys that changed (isotonic / PAV over at most `n_buckets` points) and
+`apply()` is a vectorized `np.interp` per key.
+"""
+from __future__ import annotations
+import json, os
+from pathlib import Path
+from typing import Iterable, Optional
+import numpy as np
+
+POOLED = "*"
+
+
+def _pav(y: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Pool-adjacent-violators: weighted non-decreasing fit of y."""
+    vals, wts, sizes = [], [], []
+    for yi, wi in zip(y, w):
+        vals.append(float(yi)); wts.append(float(wi)); sizes.append(1)
+        while len(vals) > 1 and vals[-2] > vals[-1]:
+            wsum = wts[-2] + wts[-1]
+            merged = (vals[-2] * wts[-2] + vals[-1] * wts[-1]) / wsum if wsum > 0 else (vals[-2] + vals[-1]) / 2
+            size = sizes[-2] + sizes[-1]
+            vals[-2:] = [merged]; wts[-2:] = [wsum]; sizes[-2:] = [size]
+    return np.repeat(vals, sizes)
+
+
+class Calibrator:
+    """Per (sport, stat, direction, bucket) reliability counts with a fitted isotonic table."""
+
+    def __init__(self, n_buckets: int = 20, prior_strength: float = 10.0, min_samples: int = 30):
+        self.n_buckets = n_buckets
+        self.prior_strength = prior_strength
+        self.min_samples = min_samples
+        self.centers = (np.arange(n_buckets) + 0.5) / n_buckets
+        self.counts: dict[tuple[str, str, str], np.ndarray] = {}   # key -> [2, n_buckets] (n, hits)
+        self.tables: dict[tuple[str, str, str], np.ndarray] = {}
+        self.rows_seen = 0        # results-store rows already consumed
+        self.version = 0
+        self._dirty: set[tuple[str, str, str]] = set()
+
+    # ----- updates -----
+    def _bucket(self, p: float) -> int:
+        return min(self.n_buckets - 1, max(0, int(p * self.n_buckets)))
+
+    def update(self, sport: str, stat: str, direction: str, p: float, hit: bool) -> None:
+        b = self._bucket(p)
+        direction = str(direction).upper()
+        for key in ((sport, stat, direction), (sport, POOLED, direction)):
+            c = self.counts.get(key)
+            if c is None:
+                c = self.counts[key] = np.zeros((2, self.n_buckets))
+            c[0, b] += 1.0
+            c[1, b] += 1.0 if hit else 0.0
+            self._dirty.add(key)
+
+    def update_from_store(self, store) -> int:
+        """Consume results-store rows appended since the last call (store is append-only)."""
+        sports, stats, directions, probs, hits, total = store.settled(since_row=self.rows_seen)
+        for s, t, d, p, h in zip(sports, stats, directions, probs, hits):
+            if not np.isnan(p):
+                self.update(s, t, d, float(p), bool(h))
+        self.rows_seen = total
+        return len(probs)
+
+    def fit(self) -> int:
+        """Refit isotonic tables for keys touched since the last fit. Returns keys refit."""
+        k = self.prior_strength
+        for key in self._dirty:
+            n, hits = self.counts[key]
+            if n.sum() < self.min_samples:
+                self.tables.pop(key, None)
+                continue
+            # shrink sparse buckets toward the identity before enforcing monotonicity
+            rate = (hits + k * self.centers) / (n + k)
+            self.tables[key] = np.clip(_pav(rate, n + k), 0.01, 0.99)
+        refit = len(self._dirty)
+        self._dirty.clear()
+        if refit:
+            self.version += 1
+        return refit
+
+    # ----- lookup -----
+    def table_for(self, sport: str, stat: str, direction: str) -> Optional[np.ndarray]:
+        direction = str(direction).upper()
+        table = self.tables.get((sport, stat, direction))
+        return table if table is not None else self.tables.get((sport, POOLED, direction))
+
+    def apply(self, sports: Iterable[str], stats: Iterable[str], directions: Iterable[str], probs) -> np.ndarray:
+        """Vectorized correction: one `np.interp` per distinct key present in the batch."""
+        probs = np.asarray(probs, dtype=float)
+        out = probs.copy()
+        if not self.tables or not len(probs):
+            return out
+        groups: dict[tuple[str, str, str], list[int]] = {}
+        for i, key in enumerate(zip(sports, stats, directions)):
+            groups.setdefault(key, []).append(i)
+        for (sport, stat, direction), idx in groups.items():
+            table = self.table_for(sport, stat, direction)
+            if table is not None:
+                idx = np.asarray(idx)
+                out[idx] = np.interp(probs[idx], self.centers, table)
+        return out
+
+    # ----- persistence (versioned on disk) -----
+    def save(self, directory: str | Path) -> Path:
+        directory = Path(directory); directory.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": self.version, "n_buckets": self.n_buckets, "prior_strength": self.prior_strength,
+            "min_samples": self.min_samples, "rows_seen": self.rows_seen,
+            "keys": [{"key": list(key), "counts": c.tolist(),
+                      "table": self.tables[key].tolist() if key in self.tables else None}
+                     for key, c in self.counts.items()],
+        }
+        path = directory / f"calibration-v{self.version:06d}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, directory: str | Path) -> Optional["Calibrator"]:
+        """Load the newest version in `directory`, or None when nothing has been saved yet."""
+        files = sorted(Path(directory).glob("calibration-v*.json"))
+        if not files:
+            return None
+        payload = json.loads(files[-1].read_text())
+        cal = cls(payload["n_buckets"], payload["prior_strength"], payload["min_samples"])
+        cal.version = payload["version"]; cal.rows_seen = payload["rows_seen"]
+        for entry in payload["keys"]:
+            key = tuple(entry["key"])
+            cal.counts[key] = np.asarray(entry["counts"], dtype=float)
+            if entry["table"] is not None:
+                cal.tables[key] = np.asarray(entry["table"], dtype=float)
+        return cal
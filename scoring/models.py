@@ -15,6 +15,7 @@ class ScoredProp(BaseModel):
     # Direction and probabilities
     direction: Literal["OVER", "UNDER"]
     model_prob: float  # Combined probability from sources
+    raw_model_prob: Optional[float] = None  # model_prob before calibration and the single-source penalty
     implied_prob: float  # From odds
 
     # Edge metrics
@@ -44,3 +45,4 @@ class ScoredProp(BaseModel):
     l10_rate: Optional[float] = None
     dtm: Optional[float] = None
     accuracy_sample: Optional[int] = None
+    raw_offset: Optional[int] = None  # source record in the ingest audit log
@@ -1,8 +1,10 @@
 """Score props based on edge, accuracy, recent performance, DTM."""
 from __future__ import annotations
-from typing import Literal, List
+from typing import TYPE_CHECKING, Callable, Literal, List, Optional
 from scoring.models import ScoredProp
 from unify.unify import UnifiedProp
+if TYPE_CHECKING:  # numpy-backed; only needed when a calibrator is passed in
+    from scoring.calibration import Calibrator
 
 def american_to_implied(odds: int) -> float:
     if odds is None:
@@ -41,7 +43,9 @@ def _assign_tier(score: float, p_blend: float, edge: float, num_signals: int, th
         return "B"
     return "B"
 
-def score_prop(unified: UnifiedProp, direction: Literal["OVER","UNDER"], weights: dict[str,float], tier_thresholds: dict, min_accuracy_sample: int = 10) -> ScoredProp:
+AccuracyLookup = Callable[[str, str], Optional[int]]
+
+def score_prop(unified: UnifiedProp, direction: Literal["OVER","UNDER"], weights: dict[str,float], tier_thresholds: dict, min_accuracy_sample: int = 10, accuracy_lookup: AccuracyLookup | None = None, model_prob_override: float | None = None) -> ScoredProp:
     # Extract probs & metadata from unified
     if unified.pp_over_prob is not None:
         over_prob = unified.pp_over_prob
@@ -54,7 +58,15 @@ def score_prop(unified: UnifiedProp, direction: Literal["OVER","UNDER"], weights
     else:
         over_prob = 0.5; under_prob = 0.5; l5_rate=None; l10_rate=None; dtm=None; accuracy_sample=None; odds=-110
 
-    model_prob = over_prob if direction == "OVER" else under_prob
+    # Real per-stat sample from settled results (results store), when available
+    if accuracy_lookup is not None:
+        observed = accuracy_lookup(unified.sport, unified.stat_type)
+        if observed is not None:
+            accuracy_sample = observed
+
+    model_prob = raw_model_prob = over_prob if direction == "OVER" else under_prob
+    if model_prob_override is not None:  # calibrated probability from score_all_props
+        model_prob = model_prob_override
     implied_prob = american_to_implied(odds)
     edge = model_prob - implied_prob
     edge_percent = edge / implied_prob if implied_prob > 0 else 0.0
@@ -108,6 +120,7 @@ def score_prop(unified: UnifiedProp, direction: Literal["OVER","UNDER"], weights
         game_date=gd,
         direction=direction,
         model_prob=model_prob,
+        raw_model_prob=raw_model_prob,
         implied_prob=implied_prob,
         edge=edge,
         edge_percent=edge_percent,
@@ -126,12 +139,27 @@ def score_prop(unified: UnifiedProp, direction: Literal["OVER","UNDER"], weights
         l5_rate=l5_rate,
         l10_rate=l10_rate,
         dtm=dtm,
-        accuracy_sample=accuracy_sample
+        accuracy_sample=accuracy_sample,
+        raw_offset=getattr(unified, "raw_offset", None)
     )
 
-def score_all_props(unified_props: List[UnifiedProp], weights: dict[str,float], tier_thresholds: dict, min_accuracy_sample: int = 10) -> List[ScoredProp]:
+def _calibrated_probs(unified_props: List[UnifiedProp], calibrator: Calibrator) -> tuple[list, list]:
+    sports = [u.sport for u in unified_props]
+    stats = [u.stat_type for u in unified_props]
+    has_pp = [u.pp_over_prob is not None for u in unified_props]
+    over = [u.pp_over_prob if h else 0.5 for u, h in zip(unified_props, has_pp)]
+    under = [u.pp_under_prob if h else 0.5 for u, h in zip(unified_props, has_pp)]
+    cal_over = calibrator.apply(sports, stats, ["OVER"] * len(over), over).tolist()
+    cal_under = calibrator.apply(sports, stats, ["UNDER"] * len(under), under).tolist()
+    return cal_over, cal_under
+
+def score_all_props(unified_props: List[UnifiedProp], weights: dict[str,float], tier_thresholds: dict, min_accuracy_sample: int = 10, accuracy_lookup: AccuracyLookup | None = None, calibrator: Calibrator | None = None) -> List[ScoredProp]:
+    if calibrator is not None and calibrator.tables:
+        cal_over, cal_under = _calibrated_probs(unified_props, calibrator)
+    else:
+        cal_over = cal_under = [None] * len(unified_props)
     scored = []
-    for unified in unified_props:
-        scored.append(score_prop(unified, "OVER", weights, tier_thresholds, min_accuracy_sample))
-        scored.append(score_prop(unified, "UNDER", weights, tier_thresholds, min_accuracy_sample))
+    for unified, p_over, p_under in zip(unified_props, cal_over, cal_under):
+        scored.append(score_prop(unified, "OVER", weights, tier_thresholds, min_accuracy_sample, accuracy_lookup, p_over))
+        scored.append(score_prop(unified, "UNDER", weights, tier_thresholds, min_accuracy_sample, accuracy_lookup, p_under))
     return scored
@@ -1,7 +1,6 @@
 param(
   [string]$BaseUrl = "http://127.0.0.1:8080",
   [string]$Market = "NBA",
-  [ValidateSet("standard","flex")] [string]$Mode = "flex",
   [int]$Bankroll = 100
 )
 
@@ -14,23 +13,18 @@ $outf = Join-Path $data "lineups_$today.json"
 $propsPath = Join-Path $data "props_sample.csv"
 
 if (-not (Test-Path $propsPath)) {
-  "name,player,team,market,line,price
-NBA,LeBron James,LAL,PTS,25.5,0.53
-NBA,Anthony Davis,LAL,REB,12.5,0.49" | Set-Content -Path $propsPath
+  # same layout as data/props_sample.csv; $Market is the sport column
+  "source,platform,sport,game_datetime_utc,player,team,opponent,market,line,side,proj_mean,prob_over
+sample,underdog,$Market,${today}T23:00:00Z,LeBron James,LAL,GSW,points,25.5,over,27.1,0.56
+sample,underdog,$Market,${today}T23:00:00Z,Anthony Davis,LAL,GSW,reb,12.5,over,13.4,0.58
+sample,underdog,$Market,${today}T23:00:00Z,Stephen Curry,GSW,LAL,ast,5.5,over,6.3,0.60" | Set-Content -Path $propsPath
   Write-Host "🆕 Created sample props_sample.csv"
 }
 
-$props = Get-Content -Raw -Path $propsPath
-$payload = @{
-  slate_date = $today
-  market = $Market
-  mode = $Mode
-  bankroll = $Bankroll
-  csv_props = $props
-} | ConvertTo-Json -Depth 6
+$body = [System.IO.File]::ReadAllBytes($propsPath)
 
 try {
-  $res = Invoke-RestMethod -Uri "$BaseUrl/optimize" -Method Post -ContentType 'application/json' -Body $payload -TimeoutSec 60
+  $res = Invoke-RestMethod -Uri "$BaseUrl/optimize/upload?bankroll=$Bankroll" -Method Post -ContentType 'text/csv' -Body $body -TimeoutSec 60
   $res | ConvertTo-Json -Depth 10 | Set-Content -Path $outf -Encoding UTF8
   Write-Host "✅ Optimize complete. Saved to $outf"
 } catch {
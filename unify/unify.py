@@ -5,7 +5,7 @@ class UnifiedProp:
     def __init__(self, player_name, stat_type, line, sport, league="", game_date="",
                  pp_over_prob=None, pp_under_prob=None, pp_over_odds=None, pp_under_odds=None,
                  pp_l5_over_rate=None, pp_l10_over_rate=None, pp_dtm=None, pp_accuracy_sample=None,
-                 sources=None, single_source=True, confidence_penalty=0.0):
+                 sources=None, single_source=True, confidence_penalty=0.0, raw_offset=None):
         self.player_name = player_name
         self.stat_type = stat_type
         self.line = line
@@ -23,6 +23,7 @@ class UnifiedProp:
         self.sources = sources or []
         self.single_source = single_source
         self.confidence_penalty = confidence_penalty
+        self.raw_offset = raw_offset
 
 def merge_sources(pp_props: List[CanonicalProp], **kwargs) -> List[UnifiedProp]:
     """Convert PlayerProps.ai to unified format."""
@@ -37,6 +38,7 @@ def merge_sources(pp_props: List[CanonicalProp], **kwargs) -> List[UnifiedProp]:
             pp_over_odds=pp.odds_american, pp_under_odds=pp.odds_american,
             pp_l5_over_rate=pp.l5, pp_l10_over_rate=pp.l10,
             pp_dtm=pp.dtm_pct, pp_accuracy_sample=pp.accuracy_sample,
-            sources=["PlayerProps.ai"], single_source=True, confidence_penalty=0.0
+            sources=["PlayerProps.ai"], single_source=True, confidence_penalty=0.0,
+            raw_offset=pp.raw_offset
         ))
     return unified